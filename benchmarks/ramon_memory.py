@@ -0,0 +1,38 @@
+"""
+Micro-benchmark for the memory and instantiation cost of RAMON objects.
+
+    python benchmarks/ramon_memory.py [count]
+
+Requires Python 3 (for tracemalloc).
+"""
+from __future__ import absolute_import, print_function
+import sys
+import time
+import tracemalloc
+
+import ndio.ramon as ramon
+
+
+def measure(cls, count, **kwargs):
+    """
+    Create `count` objects of type `cls`, and report the time taken and the
+    memory they hold.
+    """
+    tracemalloc.start()
+    start = time.time()
+    objects = [cls(id=i, **kwargs) for i in range(count)]
+    elapsed = time.time() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("{:<16} {:>10.3f}s {:>10.1f} bytes/object".format(
+        cls.__name__, elapsed, size / float(len(objects))))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print("{} objects each".format(count))
+    measure(ramon.RAMONSynapse, count, segments=[1, 2])
+    measure(ramon.RAMONSegment, count, synapses=[1])
+    measure(ramon.RAMONNeuron, count, segments=[1])
+    measure(ramon.RAMONGeneric, count)
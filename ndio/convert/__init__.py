@@ -5,3 +5,5 @@ Converters between common neuroscience file formats.
 from __future__ import absolute_import
 # Prevent typing ndio.convert.convert.convert
 from .convert import convert
+from .convert import convert_many
+from .convert import register_format
@@ -1,6 +1,10 @@
 from __future__ import absolute_import
 import os
 import shutil
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from six.moves import queue
 from PIL import Image
 
 
@@ -13,15 +17,141 @@ FILE_FORMATS = {
     'matlab':           ['m', 'mat'],
 }
 
+# The number of layers (along the first axis) to stream at a time.
+DEFAULT_BLOCK_DEPTH = 16
+
+# Format.lower(): {load, save, load_blocks, save_blocks}. Use register_format
+# to add to this rather than editing it directly.
+_FORMAT_BACKENDS = {}
+
+
+def register_format(fmt, extensions=None, module=None,
+                    load=None, save=None,
+                    load_blocks=None, save_blocks=None):
+    """
+    Register a reader and/or writer for a file format, so that `convert` can
+    pipe it to and from every other registered format.
+
+    A backend may either be given as a module (imported the first time it is
+    used) that defines any of `load`, `save`, `load_blocks` and `save_blocks`,
+    or by passing those functions directly. Explicit functions take precedence
+    over the module's.
+
+        load(filename) -> numpy.ndarray
+        save(filename, array) -> filename
+        load_blocks(filename, block_depth) -> iterable of numpy.ndarray
+        save_blocks(filename, blocks) -> filename
+
+    The blocks passed between `load_blocks` and `save_blocks` are consecutive
+    slabs along the first axis of the volume. A format that provides both
+    can be converted without ever holding the whole volume in memory.
+
+    Arguments:
+        fmt (str): The name of the format
+        extensions (str[] : None): File extensions, without leading period.
+            By convention, the first is used by default.
+        module (str : None): Dotted name of the module implementing the format
+        load, save, load_blocks, save_blocks (function : None): See above
+
+    Returns:
+        None
+    """
+    fmt = fmt.lower()
+    if extensions is not None:
+        FILE_FORMATS[fmt] = list(extensions)
+    elif fmt not in FILE_FORMATS:
+        FILE_FORMATS[fmt] = [fmt]
+
+    _FORMAT_BACKENDS[fmt] = {
+        'module': module,
+        'load': load,
+        'save': save,
+        'load_blocks': load_blocks,
+        'save_blocks': save_blocks,
+    }
+
+
+def _get_backend(fmt):
+    """
+    Get the reader/writer functions for a registered format.
+
+    Arguments:
+        fmt (str): The format to look up
+
+    Returns:
+        dict: {load, save, load_blocks, save_blocks}, any of which may be None
+    """
+    if fmt not in _FORMAT_BACKENDS:
+        return None
+
+    entry = _FORMAT_BACKENDS[fmt]
+    backend = dict(entry)
+    if entry['module'] is not None:
+        mod = importlib.import_module(entry['module'])
+        for fn in ['load', 'save', 'load_blocks', 'save_blocks']:
+            if backend[fn] is None:
+                backend[fn] = getattr(mod, fn, None)
+    return backend
+
+
+register_format('hdf5', module='ndio.convert.hdf5')
+register_format('tiff', module='ndio.convert.tiff')
+register_format('png', module='ndio.convert.png')
+register_format('nifti', ['nii'], module='ndio.convert.nifti')
+
 
 def _fail_pair_conversion(i, o):
     """
     Helper-function to print failure and pass back False.
     """
-    raise ValueError("Conversion from {0} to {1} " +
+    raise ValueError("Conversion from {0} to {1} "
                      "is not currently supported.".format(i, o))
 
 
+def _prefetch(iterable, depth=2):
+    """
+    Run an iterable in a background thread, keeping at most `depth` items
+    ready ahead of the consumer. This lets reading and decoding the next block
+    overlap with compressing and writing the current one, while keeping
+    memory bounded.
+    """
+    q = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    return
+                q.put((item, None))
+        except Exception as e:
+            q.put((None, e))
+            return
+        q.put((done, None))
+
+    t = threading.Thread(target=produce)
+    t.daemon = True
+    t.start()
+
+    try:
+        while True:
+            item, err = q.get()
+            if err is not None:
+                raise err
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+        # Unblock the producer if it is waiting on a full queue.
+        while t.is_alive():
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                t.join(0.01)
+
+
 def _get_extension_for_format(fmt):
     """
     Get the appropriate file extension for a given format.
@@ -93,16 +223,22 @@ def open(in_file, in_fmt=None):
         raise NotImplementedError("Cannot open file of type {fmt}".format(fmt))
 
 
-def convert(in_file, out_file, in_fmt="", out_fmt=""):
+def convert(in_file, out_file, in_fmt="", out_fmt="",
+            block_depth=DEFAULT_BLOCK_DEPTH):
     """
     Converts in_file to out_file, guessing datatype in the absence of
     in_fmt and out_fmt.
 
+    If both formats support block-wise streaming (see `register_format`), the
+    data are piped across `block_depth` layers at a time, so the whole volume
+    is never held in memory. Otherwise, the file is read in full first.
+
     Arguments:
         in_file:    The name of the (existing) datafile to read
         out_file:   The name of the file to create with converted data
         in_fmt:     Optional. The format of incoming data, if not guessable
         out_fmt:    Optional. The format of outgoing data, if not guessable
+        block_depth: Optional. The number of layers to stream at a time
 
     Returns:
         String. Output filename
@@ -126,36 +262,62 @@ def convert(in_file, out_file, in_fmt="", out_fmt=""):
         raise ValueError("Cannot determine conversion formats.")
         return False
 
-    if in_fmt is out_fmt:
+    if in_fmt == out_fmt:
         # This is the case when this module (intended for LONI) is used
         # indescriminately to 'funnel' data into one format.
-        shutil.copyfileobj(in_file, out_file)
+        shutil.copyfile(in_file, out_file)
         return out_file
 
-    # Import
-    if in_fmt == 'hdf5':
-        from . import hdf5
-        data = hdf5.load(in_file)
-    elif in_fmt == 'tiff':
-        from . import tiff
-        data = tiff.load(in_file)
-    elif in_fmt == 'png':
-        from . import png
-        data = png.load(in_file)
-    else:
+    reader = _get_backend(in_fmt)
+    writer = _get_backend(out_fmt)
+    if reader is None or writer is None:
         return _fail_pair_conversion(in_fmt, out_fmt)
 
-    # Export
-    if out_fmt == 'hdf5':
-        from . import hdf5
-        return hdf5.save(out_file, data)
-    elif out_fmt == 'tiff':
-        from . import tiff
-        return tiff.save(out_file, data)
-    elif out_fmt == 'png':
-        from . import png
-        return png.export_png(out_file, data)
+    # Stream, if both ends can.
+    if reader['load_blocks'] and writer['save_blocks']:
+        blocks = reader['load_blocks'](in_file, block_depth)
+        return writer['save_blocks'](out_file, _prefetch(blocks))
+
+    # Otherwise, import everything...
+    if reader['load']:
+        data = reader['load'](in_file)
+    elif reader['load_blocks']:
+        import numpy
+        data = numpy.concatenate(list(reader['load_blocks'](in_file,
+                                                            block_depth)))
     else:
         return _fail_pair_conversion(in_fmt, out_fmt)
 
+    # ...and export it.
+    if writer['save']:
+        return writer['save'](out_file, data)
+    elif writer['save_blocks']:
+        return writer['save_blocks'](out_file, [data])
+
     return _fail_pair_conversion(in_fmt, out_fmt)
+
+
+def convert_many(jobs, in_fmt="", out_fmt="",
+                 block_depth=DEFAULT_BLOCK_DEPTH, max_workers=4):
+    """
+    Run many conversions concurrently. Each conversion streams its data as
+    described in `convert`, so memory use is bounded by roughly
+    `max_workers` blocks at a time.
+
+    Arguments:
+        jobs (tuple[]): A list of (in_file, out_file) pairs
+        in_fmt:     Optional. The format of all incoming data
+        out_fmt:    Optional. The format of all outgoing data
+        block_depth: Optional. The number of layers to stream at a time
+        max_workers (int : 4): The number of conversions to run at once
+
+    Returns:
+        String[]. Output filenames, in the same order as `jobs`
+
+    Raises:
+        Whatever the first failing conversion raised.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(convert, i, o, in_fmt, out_fmt, block_depth)
+                   for (i, o) in jobs]
+        return [f.result() for f in futures]
@@ -0,0 +1,637 @@
+"""
+Read, write and convert graphs in the formats of the grute graph services
+(`GraphFormats`), as streams of edges or as sparse adjacency matrices.
+
+In a stream, a (vertex, None, None) tuple declares a vertex, so that the
+vertices without edges are kept. Only `iter_graph` yields these.
+"""
+from __future__ import absolute_import
+import os
+import shlex
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import quoteattr
+from array import array
+import xml.etree.ElementTree as ET
+import six
+import numpy
+import scipy.io
+import scipy.sparse
+
+GRAPH_FORMATS = {
+    # Format    # File ext. By convention, use the first by default
+    'graphml':  ['graphml'],
+    'ncol':     ['ncol'],
+    'edgelist': ['edgelist', 'txt'],
+    'lgl':      ['lgl'],
+    'pajek':    ['net', 'pajek'],
+    'numpy':    ['npy'],
+    'mat':      ['mat'],
+}
+
+
+def graph_format(filename):
+    """
+    Guess the format of a graph file from its extension.
+
+    Arguments:
+        filename (str): The file
+
+    Returns:
+        str: A key of GRAPH_FORMATS
+
+    Raises:
+        ValueError: If the extension is not one of a graph format
+    """
+    ext = os.path.splitext(filename)[1].lstrip('.').lower()
+    for fmt, extensions in GRAPH_FORMATS.items():
+        if ext in extensions:
+            return fmt
+    raise ValueError("Unknown graph format for {}.".format(filename))
+
+
+def iter_graph(filename, fmt=None):
+    """
+    Read the vertices and edges of a graph one at a time, without holding the
+    graph in memory (except for the matrix formats, numpy and mat, which are
+    read whole). Vertices are declared where the file lists them (graphml,
+    pajek and lgl) or, for the matrix formats, before the edges.
+
+    Arguments:
+        filename (str): The graph file
+        fmt (str : None): One of GRAPH_FORMATS. Defaults to the format of the
+            file's extension.
+
+    Returns:
+        generator: (source, target, weight) edges, as from `iter_edges`, and
+            (vertex, None, None) declarations
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    fmt = fmt or graph_format(filename)
+    if fmt not in _READERS:
+        raise ValueError("Unsupported graph format {}.".format(fmt))
+    return _READERS[fmt](os.path.expanduser(filename))
+
+
+def iter_edges(filename, fmt=None):
+    """
+    Read the edges of a graph one at a time, without holding the graph in
+    memory (except for the matrix formats, numpy and mat, which are read
+    whole).
+
+    Arguments:
+        filename (str): The graph file
+        fmt (str : None): One of GRAPH_FORMATS. Defaults to the format of the
+            file's extension.
+
+    Returns:
+        generator: (source, target, weight) tuples. Vertices are named as in
+            the file (ints, or strings for ncol, lgl and graphml; unlabelled
+            pajek vertices are numbered from 0, after any integer labels),
+            and weight is None where the file gives none. Undirected graphml
+            edges are yielded once in each direction.
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    return (edge for edge in iter_graph(filename, fmt)
+            if edge[1] is not None)
+
+
+def load(filename, fmt=None, dtype=numpy.float64):
+    """
+    Read a graph into a sparse adjacency matrix. Edges are streamed from the
+    file into compact arrays, so the file is never held in memory as text.
+
+    Arguments:
+        filename (str): The graph file
+        fmt (str : None): One of GRAPH_FORMATS. Defaults to the format of the
+            file's extension.
+        dtype (numpy.dtype : numpy.float64): The type of the edge weights
+
+    Returns:
+        (scipy.sparse.csr_matrix, list): The adjacency matrix, where A[i, j]
+            is the weight of edge i -> j (1 if unweighted, and summed over
+            repeated edges), and the name of each vertex. Where vertices are
+            numbered in the file, vertex i is row i.
+    """
+    fmt = fmt or graph_format(filename)
+    if fmt in _MATRIX_LOADERS:
+        matrix = _MATRIX_LOADERS[fmt](os.path.expanduser(filename))
+        matrix = scipy.sparse.csr_matrix(matrix, dtype=dtype)
+        return matrix, list(range(matrix.shape[0]))
+
+    return _from_edges(iter_graph(filename, fmt), dtype)
+
+
+def _from_edges(edges, dtype=numpy.float64):
+    """
+    Build the (adjacency matrix, vertex names) of a stream of edges and
+    vertex declarations.
+    """
+    index = {}
+    names = []
+    rows, cols, weights = array('l'), array('l'), array('d')
+
+    def vertex(name):
+        i = index.get(name)
+        if i is None:
+            i = index[name] = len(names)
+            names.append(name)
+        return i
+
+    for source, target, weight in edges:
+        if target is None:
+            vertex(source)
+            continue
+        rows.append(vertex(source))
+        cols.append(vertex(target))
+        weights.append(1.0 if weight is None else weight)
+
+    rows, cols = _numpy(rows), _numpy(cols)
+    n = len(names)
+    if n and all(isinstance(name, six.integer_types) for name in names):
+        ids = numpy.array(names)
+        rows, cols = ids[rows], ids[cols]
+        n = int(ids.max()) + 1
+        names = list(range(n))
+    adjacency = scipy.sparse.coo_matrix((_numpy(weights), (rows, cols)),
+                                        shape=(n, n), dtype=dtype)
+    return adjacency.tocsr(), names
+
+
+def save_edges(filename, edges, fmt=None):
+    """
+    Write a stream of edges to a graph file. Edges are written as they are
+    read from `edges`, so it may be a generator over a graph too large for
+    memory (except for the matrix formats, numpy and mat, which are built
+    whole). Only the vertex names are kept in memory.
+
+    Arguments:
+        filename (str): The file to write
+        edges (iterable): (source, target, weight) tuples, as from
+            `iter_graph`. Weight may be None, and (vertex, None, None)
+            declares a vertex. edgelist and ncol files cannot hold vertices
+            without edges.
+        fmt (str : None): One of GRAPH_FORMATS. Defaults to the format of the
+            file's extension.
+
+    Returns:
+        str: The filename written
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    fmt = fmt or graph_format(filename)
+    if fmt not in _WRITERS:
+        raise ValueError("Unsupported graph format {}.".format(fmt))
+    filename = os.path.expanduser(filename)
+    _WRITERS[fmt](filename, edges)
+    return filename
+
+
+def convert(in_file, out_file, in_fmt=None, out_fmt=None):
+    """
+    Convert a graph file from one format to another. Edges are streamed from
+    one file to the other, and the graph is never built in memory unless one
+    of the formats is a matrix (numpy or mat).
+
+    Arguments:
+        in_file (str): The graph file to read
+        out_file (str): The graph file to write
+        in_fmt (str : None): The format to read. Defaults to the format of
+            `in_file`'s extension.
+        out_fmt (str : None): The format to write. Defaults to the format of
+            `out_file`'s extension.
+
+    Returns:
+        str: The output filename
+
+    Raises:
+        IOError: If `in_file` does not exist
+        ValueError: If a format is not supported
+    """
+    in_file = os.path.expanduser(in_file)
+    if not os.path.exists(in_file):
+        raise IOError("Input file {0} does not exist, stopping..."
+                      .format(in_file))
+    in_fmt = in_fmt or graph_format(in_file)
+    out_fmt = out_fmt or graph_format(out_file)
+    if in_fmt in _MATRIX_LOADERS and out_fmt in _MATRIX_SAVERS:
+        out_file = os.path.expanduser(out_file)
+        _MATRIX_SAVERS[out_fmt](out_file, load(in_file, in_fmt)[0])
+        return out_file
+    return save_edges(out_file, iter_graph(in_file, in_fmt), out_fmt)
+
+
+def convert_many(jobs, in_fmt=None, out_fmt=None, max_workers=None):
+    """
+    Run many graph conversions in a pool of processes.
+
+    Arguments:
+        jobs (tuple[]): A list of (in_file, out_file) pairs
+        in_fmt (str : None): The format of all incoming graphs, if not
+            guessable from their extensions
+        out_fmt (str : None): The format of all outgoing graphs, if not
+            guessable from their extensions
+        max_workers (int : None): The number of processes. Defaults to the
+            number of CPUs; 1 converts in this process.
+
+    Returns:
+        str[]: Output filenames, in the same order as `jobs`
+
+    Raises:
+        Whatever the first failing conversion raised.
+    """
+    tasks = [(i, o, in_fmt, out_fmt) for i, o in jobs]
+    if max_workers == 1:
+        return list(map(_convert_task, tasks))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_convert_task, tasks))
+
+
+def convert_dir(in_dir, out_dir, out_fmt, in_fmt=None, max_workers=None):
+    """
+    Convert every graph file in a directory to another format, in a pool of
+    processes. Files whose extensions are not a graph format are skipped.
+
+    Arguments:
+        in_dir (str): The directory of graphs to read
+        out_dir (str): The directory to write to. Created if needed.
+        out_fmt (str): The format to write, one of GRAPH_FORMATS
+        in_fmt (str : None): The format to read. Defaults to reading every
+            file with a graph extension, each in its own format.
+        max_workers (int : None): The number of processes. Defaults to the
+            number of CPUs; 1 converts in this process.
+
+    Returns:
+        dict: {in_file: out_file}
+    """
+    in_dir = os.path.expanduser(in_dir)
+    out_dir = os.path.expanduser(out_dir)
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    jobs = []
+    for name in sorted(os.listdir(in_dir)):
+        in_file = os.path.join(in_dir, name)
+        try:
+            fmt = graph_format(name)
+        except ValueError:
+            continue
+        if not os.path.isfile(in_file) or (in_fmt and fmt != in_fmt):
+            continue
+        base = os.path.splitext(name)[0]
+        jobs.append((in_file, os.path.join(
+            out_dir, base + '.' + GRAPH_FORMATS[out_fmt][0])))
+
+    out_files = convert_many(jobs, in_fmt, out_fmt, max_workers)
+    return dict(zip([i for i, o in jobs], out_files))
+
+
+def _convert_task(task):
+    return convert(*task)
+
+
+def _numpy(a):
+    """
+    View an array.array as a numpy array, without copying it.
+    """
+    if len(a) == 0:
+        return numpy.zeros(0, dtype=a.typecode)
+    return numpy.frombuffer(a, dtype=a.typecode)
+
+
+def _number(token):
+    """
+    Parse a vertex ID or weight as an int if possible, else a float.
+    """
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def _read_edgelist(filename):
+    with open(filename) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 2:
+                yield int(fields[0]), int(fields[1]), None
+
+
+def _read_ncol(filename):
+    with open(filename) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 2:
+                weight = _number(fields[2]) if len(fields) > 2 else None
+                yield fields[0], fields[1], weight
+
+
+def _read_lgl(filename):
+    source = None
+    with open(filename) as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == '#':
+                source = fields[1]
+                yield source, None, None
+            elif source is not None:
+                weight = _number(fields[1]) if len(fields) > 1 else None
+                yield source, fields[0], weight
+
+
+def _pajek_label(label):
+    # Vertices written from integer names keep them
+    try:
+        if str(int(label)) == label:
+            return int(label)
+    except ValueError:
+        pass
+    return label
+
+
+def _read_pajek(filename):
+    # Pajek vertices are numbered from 1. A vertex is named by its label;
+    # the unlabelled ones are numbered from 0, after the integer labels so
+    # that no two vertices share a name.
+    section = None
+    count = 0
+    labels = {}
+    unlabelled = []
+    first = [0]
+
+    def name(i):
+        return labels[i] if i in labels else i - 1 + first[0]
+
+    def end_of_vertices():
+        numbers = [label for label in labels.values()
+                   if isinstance(label, six.integer_types)]
+        first[0] = max(numbers) + 1 if numbers else 0
+        # Including the vertices that are counted but given no line
+        for i in range(1, max([count] + unlabelled) + 1):
+            if i not in labels:
+                yield name(i), None, None
+
+    with open(filename) as f:
+        for line in f:
+            if line.startswith('*'):
+                fields = line.split()
+                if section == '*vertices':
+                    for vertex in end_of_vertices():
+                        yield vertex
+                section = fields[0].lower()
+                if section == '*vertices' and len(fields) > 1:
+                    count = int(fields[1])
+                continue
+            fields = shlex.split(line)
+            if section == '*vertices' and fields:
+                i = int(fields[0])
+                if len(fields) > 1:
+                    labels[i] = _pajek_label(fields[1])
+                    yield labels[i], None, None
+                else:
+                    unlabelled.append(i)
+            elif section in ('*edges', '*arcs') and len(fields) >= 2:
+                weight = _number(fields[2]) if len(fields) > 2 else None
+                yield name(int(fields[0])), name(int(fields[1])), weight
+    if section == '*vertices':
+        for vertex in end_of_vertices():
+            yield vertex
+
+
+def _read_graphml(filename):
+    weight_key = None
+    directed = True
+    parents = []
+    for event, elem in ET.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag.rsplit('}', 1)[-1] == 'graph':
+                directed = elem.get('edgedefault', 'directed') != 'undirected'
+            parents.append(elem)
+            continue
+        parents.pop()
+        tag = elem.tag.rsplit('}', 1)[-1]
+        if tag == 'key':
+            if elem.get('for') in ('edge', 'all') and \
+                    elem.get('attr.name') == 'weight':
+                weight_key = elem.get('id')
+        elif tag == 'edge':
+            weight = None
+            for data in elem:
+                if data.get('key') == weight_key and data.text:
+                    weight = _number(data.text.strip())
+            source, target = elem.get('source'), elem.get('target')
+            yield source, target, weight
+            # An undirected edge goes both ways. Edges may override the
+            # graph's edgedefault.
+            edge_directed = directed
+            if elem.get('directed') is not None:
+                edge_directed = elem.get('directed') == 'true'
+            if not edge_directed and source != target:
+                yield target, source, weight
+        elif tag == 'node':
+            yield elem.get('id'), None, None
+        else:
+            continue
+        # Drop the element from the tree, so that memory does not grow with
+        # the file.
+        if parents:
+            parents[-1].remove(elem)
+
+
+def _read_matrix(matrix):
+    matrix = scipy.sparse.coo_matrix(matrix)
+    for i in range(matrix.shape[0]):
+        yield i, None, None
+    for i, j, w in zip(matrix.row, matrix.col, matrix.data):
+        yield int(i), int(j), w.item()
+
+
+def _load_numpy(filename):
+    return numpy.load(filename)
+
+
+def _load_mat(filename):
+    contents = scipy.io.loadmat(filename)
+    matrices = [v for k, v in sorted(contents.items())
+                if not k.startswith('__')]
+    if not matrices:
+        raise ValueError("No matrix in {}.".format(filename))
+    return matrices[0]
+
+
+_MATRIX_LOADERS = {
+    'numpy': _load_numpy,
+    'mat': _load_mat,
+}
+
+
+_READERS = {
+    'edgelist': _read_edgelist,
+    'ncol': _read_ncol,
+    'lgl': _read_lgl,
+    'pajek': _read_pajek,
+    'graphml': _read_graphml,
+    'numpy': lambda filename: _read_matrix(_load_numpy(filename)),
+    'mat': lambda filename: _read_matrix(_load_mat(filename)),
+}
+
+
+def _write_edgelist(filename, edges):
+    # edgelist vertices are integers. Integer names are kept, and the others
+    # are numbered after the largest of them, so the edges are spooled to
+    # disk until all vertices are known.
+    index = {}
+    names = []
+
+    def vertex(name):
+        i = index.get(name)
+        if i is None:
+            i = index[name] = len(names)
+            names.append(name)
+        return i
+
+    with tempfile.TemporaryFile('w+') as spool:
+        for source, target, weight in edges:
+            if target is None:
+                vertex(source)
+                continue
+            spool.write('{} {}\n'.format(vertex(source), vertex(target)))
+
+        numbers = [name for name in names
+                   if isinstance(name, six.integer_types)]
+        ids = []
+        next_id = max(numbers) + 1 if numbers else 0
+        for name in names:
+            if isinstance(name, six.integer_types):
+                ids.append(name)
+            else:
+                ids.append(next_id)
+                next_id += 1
+
+        spool.seek(0)
+        with open(filename, 'w') as f:
+            for line in spool:
+                source, target = line.split()
+                f.write('{} {}\n'.format(ids[int(source)], ids[int(target)]))
+
+
+def _write_ncol(filename, edges):
+    with open(filename, 'w') as f:
+        for source, target, weight in edges:
+            if target is None:
+                continue
+            if weight is None:
+                f.write('{} {}\n'.format(source, target))
+            else:
+                f.write('{} {} {}\n'.format(source, target, weight))
+
+
+def _write_lgl(filename, edges):
+    # A vertex's header is repeated if its edges are not consecutive. A
+    # declared vertex gets a header of its own, so it is kept without edges.
+    current = None
+    with open(filename, 'w') as f:
+        for source, target, weight in edges:
+            if source != current or target is None:
+                f.write('# {}\n'.format(source))
+                current = source
+            if target is None:
+                continue
+            if weight is None:
+                f.write('{}\n'.format(target))
+            else:
+                f.write('{} {}\n'.format(target, weight))
+
+
+def _write_pajek(filename, edges):
+    # Pajek lists the vertices first, so the edges are spooled to disk until
+    # all vertices are known.
+    index = {}
+    names = []
+
+    def vertex(name):
+        i = index.get(name)
+        if i is None:
+            i = index[name] = len(names) + 1
+            names.append(name)
+        return i
+
+    with tempfile.TemporaryFile('w+') as spool:
+        for source, target, weight in edges:
+            if target is None:
+                vertex(source)
+                continue
+            spool.write('{} {}'.format(vertex(source), vertex(target)))
+            spool.write('\n' if weight is None else ' {}\n'.format(weight))
+        spool.seek(0)
+        with open(filename, 'w') as f:
+            f.write('*Vertices {}\n'.format(len(names)))
+            for i, name in enumerate(names):
+                f.write('{} "{}"\n'.format(i + 1, name))
+            f.write('*Arcs\n')
+            shutil.copyfileobj(spool, f)
+
+
+def _write_graphml(filename, edges):
+    # GraphML allows nodes after the edges that use them, so each vertex is
+    # written once it is first seen.
+    seen = set()
+    with open(filename, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                '  <key id="weight" for="edge" attr.name="weight" '
+                'attr.type="double"/>\n'
+                '  <graph edgedefault="directed">\n')
+        for source, target, weight in edges:
+            for v in (source, target):
+                if v is not None and v not in seen:
+                    seen.add(v)
+                    f.write('    <node id={}/>\n'.format(quoteattr(str(v))))
+            if target is None:
+                continue
+            f.write('    <edge source={} target={}'.format(
+                quoteattr(str(source)), quoteattr(str(target))))
+            if weight is None:
+                f.write('/>\n')
+            else:
+                f.write('><data key="weight">{}</data></edge>\n'.format(
+                    weight))
+        f.write('  </graph>\n</graphml>\n')
+
+
+def _save_numpy(filename, graph):
+    numpy.save(filename, graph.toarray())
+
+
+def _save_mat(filename, graph):
+    scipy.io.savemat(filename, {'graph': scipy.sparse.csc_matrix(graph)})
+
+
+def _save_matrix(saver):
+    def write(filename, edges):
+        saver(filename, _from_edges(edges)[0])
+    return write
+
+
+_MATRIX_SAVERS = {
+    'numpy': _save_numpy,
+    'mat': _save_mat,
+}
+
+_WRITERS = {
+    'edgelist': _write_edgelist,
+    'ncol': _write_ncol,
+    'lgl': _write_lgl,
+    'pajek': _write_pajek,
+    'graphml': _write_graphml,
+    'numpy': _save_matrix(_save_numpy),
+    'mat': _save_matrix(_save_mat),
+}
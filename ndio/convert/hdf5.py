@@ -20,15 +20,42 @@ def load(hdf5_filename):
     try:
         f = h5py.File(hdf5_filename, "r")
         # neurodata stores data inside the 'cutout' h5 dataset
-        data_layers = f.get('image').get('CUTOUT')
+        data_layers = _get_cutout(f)
     except Exception as e:
-        raise ValueError("Could not load file {0} for conversion. {}".format(
+        raise ValueError("Could not load file {0} for conversion. {1}".format(
                          hdf5_filename, e))
         raise
 
     return numpy.array(data_layers)
 
 
+def load_blocks(hdf5_filename, block_depth=16):
+    """
+    Import a HDF5 file a few layers at a time, without reading the whole
+    dataset into memory.
+
+    Arguments:
+        hdf5_filename (str): A string filename of a HDF5 datafile
+        block_depth (int : 16): The number of layers (along the first axis)
+            to read at a time
+
+    Returns:
+        generator: numpy arrays of at most `block_depth` layers each
+    """
+    hdf5_filename = os.path.expanduser(hdf5_filename)
+
+    try:
+        f = h5py.File(hdf5_filename, "r")
+        data_layers = _get_cutout(f)
+    except Exception as e:
+        raise ValueError("Could not load file {0} for conversion. {1}".format(
+                         hdf5_filename, e))
+
+    with f:
+        for i in range(0, data_layers.shape[0], block_depth):
+            yield data_layers[i:i + block_depth]
+
+
 def save(hdf5_filename, array):
     """
     Export a numpy array to a HDF5 file.
@@ -51,3 +78,56 @@ def save(hdf5_filename, array):
         raise ValueError("Could not save HDF5 file {0}.".format(hdf5_filename))
 
     return hdf5_filename
+
+
+def save_blocks(hdf5_filename, blocks):
+    """
+    Export an iterable of numpy arrays to a HDF5 file, appending each one
+    along the first axis. Only one block is held in memory at a time.
+
+    Arguments:
+        hdf5_filename (str): A filename to which to save the HDF5 data
+        blocks (iterable): numpy arrays that agree in all but the first axis
+
+    Returns:
+        String. The expanded filename that now holds the HDF5 data
+
+    Raises:
+        ValueError: If there are no blocks, or the file cannot be written
+    """
+    hdf5_filename = os.path.expanduser(hdf5_filename)
+
+    dset = None
+    try:
+        with h5py.File(hdf5_filename, "w") as h:
+            for block in blocks:
+                if dset is None:
+                    dset = h.create_dataset(
+                        'CUTOUT', data=block,
+                        maxshape=(None,) + block.shape[1:],
+                        chunks=True
+                    )
+                    continue
+                start = dset.shape[0]
+                dset.resize(start + block.shape[0], axis=0)
+                dset[start:] = block
+    except Exception as e:
+        raise ValueError("Could not save HDF5 file {0}.".format(hdf5_filename))
+
+    if dset is None:
+        os.remove(hdf5_filename)
+        raise ValueError("No blocks to save to {0}.".format(hdf5_filename))
+    return hdf5_filename
+
+
+def _get_cutout(f):
+    """
+    Find the CUTOUT dataset in a file, either at the top level (as written by
+    `save`) or inside a channel group (as served by ndstore).
+    """
+    if 'CUTOUT' in f:
+        return f['CUTOUT']
+    for name in f:
+        if isinstance(f[name], h5py.Group) and 'CUTOUT' in f[name]:
+            return f[name]['CUTOUT']
+    raise ValueError("No CUTOUT dataset found.")
@@ -0,0 +1,251 @@
+"""
+Read the size and type of PNG and TIFF images from their headers alone,
+without decoding (or, over HTTP, downloading) their pixels.
+"""
+from __future__ import absolute_import
+import os
+import struct
+from collections import namedtuple
+import requests
+
+# Bytes read at a time. Reads are cached, so a header that spans several
+# small fields costs one read (one ranged GET, over HTTP).
+BLOCK_SIZE = 64 * 1024
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+ImageInfo = namedtuple('ImageInfo', ['format', 'width', 'height', 'dtype',
+                                     'samples', 'pages'])
+ImageInfo.__doc__ = """
+The shape and type of an image, as read from its header.
+
+Attributes:
+    format (str): 'png' or 'tiff'
+    width (int): Pixels in x
+    height (int): Pixels in y
+    dtype (str): The numpy type of one sample, e.g. 'uint16'
+    samples (int): Samples (channels) per pixel, e.g. 3 for RGB
+    pages (int): Pages of a TIFF stack, or None if they were not counted
+"""
+
+# PNG color type: samples per pixel
+_PNG_SAMPLES = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# TIFF field type: (struct code, size)
+_TIFF_TYPES = {1: ('B', 1), 3: ('H', 2), 4: ('I', 4), 16: ('Q', 8)}
+
+# TIFF SampleFormat: numpy kind
+_TIFF_KINDS = {1: 'uint', 2: 'int', 3: 'float'}
+
+_WIDTH, _HEIGHT, _BITS, _SAMPLES, _FORMAT = 256, 257, 258, 277, 339
+
+
+def probe(source, count_pages=True):
+    """
+    Read the shape and type of a PNG or TIFF image file from its header.
+
+    Arguments:
+        source (str or file): A filename, or a binary file opened for reading
+        count_pages (bool : True): Whether to walk a TIFF's directories to
+            count its pages. Pages are usually spread through the file, so
+            this costs one read per page.
+
+    Returns:
+        ImageInfo
+
+    Raises:
+        ValueError: If the file is not a PNG or TIFF
+    """
+    if hasattr(source, 'read'):
+        return _probe(_cached(_file_reader(source)), count_pages)
+    with open(os.path.expanduser(source), 'rb') as f:
+        return _probe(_cached(_file_reader(f)), count_pages)
+
+
+def probe_bytes(data, count_pages=True):
+    """
+    Read the shape and type of a PNG or TIFF image from its leading bytes.
+
+    Arguments:
+        data (bytes): The start of the image (or all of it)
+        count_pages (bool : True): Whether to walk a TIFF's directories to
+            count its pages
+
+    Returns:
+        ImageInfo
+
+    Raises:
+        ValueError: If the bytes are not a PNG or TIFF, or stop before the
+            end of its header
+    """
+    return _probe(_cached(_bytes_reader(data)), count_pages)
+
+
+def probe_url(url, session=None, count_pages=True, headers=None):
+    """
+    Read the shape and type of a PNG or TIFF image over HTTP, with ranged
+    GETs of only the blocks that hold its header.
+
+    Arguments:
+        url (str): The image's URL
+        session (requests.Session : None): The session to use, so that
+            connections are reused
+        count_pages (bool : True): Whether to walk a TIFF's directories to
+            count its pages. This costs one GET per page.
+        headers (dict : None): Headers to add to every GET. A header set to
+            None is left out, even if `session` has it.
+
+    Returns:
+        ImageInfo
+
+    Raises:
+        OSError: If the image cannot be downloaded
+        ValueError: If it is not a PNG or TIFF
+    """
+    return _probe(_cached(_http_reader(url, session or requests, headers)),
+                  count_pages)
+
+
+def _bytes_reader(data):
+    def read(offset, nbytes):
+        return data[offset:offset + nbytes]
+    return read
+
+
+def _file_reader(f):
+    def read(offset, nbytes):
+        f.seek(offset)
+        return f.read(nbytes)
+    return read
+
+
+def _http_reader(url, session, headers=None):
+    def read(offset, nbytes):
+        ranged = dict(headers or {})
+        ranged['Range'] = 'bytes={}-{}'.format(offset, offset + nbytes - 1)
+        resp = session.get(url, headers=ranged, stream=True)
+        try:
+            if resp.status_code >= 300:
+                raise OSError('Could not read {}: Error: {}'.format(
+                    url, resp.status_code))
+            data = b''
+            for chunk in resp.iter_content(BLOCK_SIZE):
+                data += chunk
+                # The server may ignore the range and send the whole file
+                if resp.status_code != 206 and len(data) >= offset + nbytes:
+                    break
+            if resp.status_code != 206:
+                data = data[offset:]
+            return data[:nbytes]
+        finally:
+            resp.close()
+    return read
+
+
+def _cached(read):
+    """
+    Wrap a read(offset, nbytes) function so that it reads whole blocks of
+    BLOCK_SIZE and remembers them.
+    """
+    blocks = {}
+
+    def cached(offset, nbytes):
+        data = b''
+        first = offset // BLOCK_SIZE
+        last = (offset + nbytes - 1) // BLOCK_SIZE
+        for b in range(first, last + 1):
+            if b not in blocks:
+                blocks[b] = read(b * BLOCK_SIZE, BLOCK_SIZE)
+            data += blocks[b]
+            if len(blocks[b]) < BLOCK_SIZE:
+                break
+        start = offset - first * BLOCK_SIZE
+        data = data[start:start + nbytes]
+        if len(data) < nbytes:
+            raise ValueError('Image header is incomplete.')
+        return data
+    return cached
+
+
+def _probe(read, count_pages):
+    head = read(0, 8)
+    if head == PNG_SIGNATURE:
+        return _probe_png(read)
+    if head[:4] in (b'II*\x00', b'MM\x00*', b'II+\x00', b'MM\x00+'):
+        return _probe_tiff(read, count_pages)
+    raise ValueError('Not a PNG or TIFF image.')
+
+
+def _probe_png(read):
+    """
+    Read a PNG's IHDR chunk, which always comes first.
+    """
+    length, name, width, height, depth, color = struct.unpack(
+        '>I4sIIBB', read(8, 18))
+    if name != b'IHDR':
+        raise ValueError('PNG has no IHDR chunk.')
+    return ImageInfo('png', width, height,
+                     'uint16' if depth == 16 else 'uint8',
+                     _PNG_SAMPLES.get(color, 1), 1)
+
+
+def _probe_tiff(read, count_pages):
+    """
+    Read a TIFF's (or BigTIFF's) first image directory, and optionally walk
+    the chain of directories to count pages.
+    """
+    endian = '<' if read(0, 2) == b'II' else '>'
+    big = struct.unpack(endian + 'H', read(2, 2))[0] == 43
+    if big:
+        # count, entry size, offset code
+        layout = ('Q', 20, 'Q')
+        ifd = struct.unpack(endian + 'Q', read(8, 8))[0]
+    else:
+        layout = ('H', 12, 'I')
+        ifd = struct.unpack(endian + 'I', read(4, 4))[0]
+    count_code, entry_size, offset_code = layout
+    count_size = struct.calcsize(count_code)
+    offset_size = struct.calcsize(offset_code)
+
+    tags = {}
+    n = struct.unpack(endian + count_code, read(ifd, count_size))[0]
+    entries = read(ifd + count_size, n * entry_size)
+    for i in range(n):
+        entry = entries[i * entry_size:(i + 1) * entry_size]
+        tag, kind = struct.unpack(endian + 'HH', entry[:4])
+        if tag not in (_WIDTH, _HEIGHT, _BITS, _SAMPLES, _FORMAT) or \
+                kind not in _TIFF_TYPES:
+            continue
+        code, size = _TIFF_TYPES[kind]
+        values = struct.unpack(endian + offset_code,
+                               entry[4:4 + offset_size])[0]
+        value = entry[4 + offset_size:]
+        if values * size > offset_size:
+            # Too big to fit in the entry; it holds an offset instead
+            value = read(struct.unpack(endian + offset_code, value)[0],
+                         values * size)
+        tags[tag] = struct.unpack(endian + code * values,
+                                  value[:values * size])
+
+    if _WIDTH not in tags or _HEIGHT not in tags:
+        raise ValueError('TIFF has no image size.')
+    bits = tags.get(_BITS, (1,))[0]
+    kind = _TIFF_KINDS.get(tags.get(_FORMAT, (1,))[0], 'uint')
+    if bits in (8, 16, 32, 64):
+        dtype = '{}{}'.format(kind, bits)
+    else:
+        dtype = 'uint8'
+
+    pages = None
+    if count_pages:
+        pages = 0
+        seen = set()
+        while ifd and ifd not in seen:
+            seen.add(ifd)
+            pages += 1
+            n = struct.unpack(endian + count_code, read(ifd, count_size))[0]
+            ifd = struct.unpack(endian + offset_code, read(
+                ifd + count_size + n * entry_size, offset_size))[0]
+
+    return ImageInfo('tiff', tags[_WIDTH][0], tags[_HEIGHT][0], dtype,
+                     tags.get(_SAMPLES, (1,))[0], pages)
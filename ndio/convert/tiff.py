@@ -49,13 +49,74 @@ def save(tiff_filename, numpy_data):
         return png_filename
 
     try:
-        img = tiff.imsave(tiff_filename, numpy_data)
+        img = _imwrite(tiff_filename, numpy_data)
     except Exception as e:
         raise ValueError("Could not save TIFF file {0}.".format(tiff_filename))
 
     return tiff_filename
 
 
+def load_blocks(tiff_filename, block_depth=16):
+    """
+    Import a multipage TIFF file a few pages at a time, without reading the
+    whole file into memory.
+
+    Arguments:
+        tiff_filename (str): A string filename of a TIFF datafile
+        block_depth (int : 16): The number of pages to read at a time
+
+    Returns:
+        generator: numpy arrays (z, y, x) of at most `block_depth` pages each
+    """
+    with MultipageTiff(tiff_filename) as stack:
+        for z in range(0, stack.shape[0], block_depth):
+            yield numpy.array(stack.read(z_start=z, z_stop=z + block_depth,
+                                         order='zyx'))
+
+
+def save_blocks(tiff_filename, blocks):
+    """
+    Export an iterable of numpy arrays to a single multipage TIFF file. Each
+    block is written page by page as it arrives, so only one block is held in
+    memory at a time.
+
+    Arguments:
+        tiff_filename (str): A filename to which to save the TIFF data
+        blocks (iterable): numpy arrays (z, y, x) with matching y and x
+
+    Returns:
+        String. The expanded filename that now holds the TIFF data
+
+    Raises:
+        ValueError: If there are no blocks, or the file cannot be written
+    """
+    tiff_filename = os.path.expanduser(tiff_filename)
+
+    pages = 0
+    try:
+        with tiff.TiffWriter(tiff_filename, bigtiff=True) as tw:
+            write = getattr(tw, 'write', None) or tw.save
+            for block in blocks:
+                if block.ndim == 2:
+                    block = block[numpy.newaxis, ...]
+                for page in block:
+                    write(page, contiguous=True)
+                    pages += 1
+    except Exception as e:
+        raise ValueError("Could not save TIFF file {0}.".format(tiff_filename))
+
+    if not pages:
+        os.remove(tiff_filename)
+        raise ValueError("No blocks to save to {0}.".format(tiff_filename))
+    return tiff_filename
+
+
+def _imwrite(tiff_filename, numpy_data):
+    # tifffile renamed imsave to imwrite (and later dropped imsave).
+    write = getattr(tiff, 'imwrite', None) or tiff.imsave
+    return write(tiff_filename, numpy_data)
+
+
 def save_collection(tiff_filename_base, numpy_data, start_layers_at=1):
     """
     Export a numpy array to a set of TIFF files, with each Z-index 2D
@@ -101,7 +162,8 @@ def load_tiff_multipage(tiff_filename, dtype='float32'):
 
     Arguments:
         tiff_filename:     Filename of source data
-        dtype:             data type to use for the returned tensor
+        dtype:             data type to use for the returned tensor. If None,
+                           the native dtype of the file is preserved.
 
     Returns:
         Array containing contents from input tiff file in xyz order
@@ -109,28 +171,173 @@ def load_tiff_multipage(tiff_filename, dtype='float32'):
     if not os.path.isfile(tiff_filename):
         raise RuntimeError('could not find file "%s"' % tiff_filename)
 
-    # load the data from multi-layer TIF files
-    data = tiff.imread(tiff_filename)
+    with MultipageTiff(tiff_filename) as stack:
+        im = stack.read(order='xyz')
+        # Copy out of the file before it is closed.
+        return numpy.array(im, dtype=dtype)
+
 
-    im = []
+def load_tiff_region(tiff_filename,
+                     x_start=None, x_stop=None,
+                     y_start=None, y_stop=None,
+                     z_start=None, z_stop=None,
+                     order='xyz'):
+    """
+    Load a subvolume of a multipage tiff without reading the rest of the file.
+    If you are going to take many samples from the same file, open it once
+    with `MultipageTiff` instead.
 
-    while True:
+    Arguments:
+        tiff_filename (str): Filename of source data
+        Q_start (int : None): The lower bound of dimension 'Q'
+        Q_stop (int : None): The upper bound of dimension 'Q'
+        order (str : 'xyz'): The axis order of the returned array
 
-        Xi = numpy.array(data, dtype=dtype)
-        if Xi.ndim == 2:
-            Xi = Xi[numpy.newaxis, ...]  # add slice dimension
-        im.append(Xi)
+    Returns:
+        numpy.ndarray: The requested region, in the file's native dtype
+    """
+    with MultipageTiff(tiff_filename) as stack:
+        return numpy.array(stack.read(x_start, x_stop,
+                                      y_start, y_stop,
+                                      z_start, z_stop,
+                                      order=order))
 
-        try:
-            data.seek(data.tell()+1)
-        except EOFError:
-            break  # this just means hit end of file (not really an error)
 
-    im = numpy.concatenate(im, axis=0)  # list of 2d -> tensor
-    im = numpy.rollaxis(im, 1)
-    im = numpy.rollaxis(im, 2)
+class MultipageTiff(object):
+    """
+    A lazy, read-only multipage TIFF stack. Uncompressed files are memory-
+    mapped, so reading a region only touches the pages (and rows) inside it;
+    compressed files are decoded one page at a time, and only for the pages
+    that are requested. Data keeps the native dtype of the file.
+
+    >>> with MultipageTiff('stack.tif') as stack:
+    ...     sample = stack.read(0, 512, 0, 512, 100, 116)
+    """
 
-    return im
+    def __init__(self, tiff_filename):
+        """
+        Open a multipage TIFF for lazy reading.
+
+        Arguments:
+            tiff_filename (str): Filename of source data
+
+        Raises:
+            RuntimeError: If the file does not exist
+            ValueError: If the pages have more than one sample per pixel
+                (e.g. RGB), which does not fit an (x, y, z) volume
+        """
+        tiff_filename = os.path.expanduser(tiff_filename)
+        if not os.path.isfile(tiff_filename):
+            raise RuntimeError('could not find file "%s"' % tiff_filename)
+
+        self.filename = tiff_filename
+        # One memory-map of the raw file, shared by page-by-page reads
+        self._raw = None
+        self._tif = tiff.TiffFile(tiff_filename)
+        self._pages = self._tif.pages
+
+        first = self._pages[0]
+        if len(first.shape) != 2:
+            self._tif.close()
+            raise ValueError('"{}" has pages of shape {}; only single-sample '
+                             '(grayscale) pages can be read as a volume.'
+                             .format(tiff_filename, first.shape))
+        # (z, y, x), as stored on disk
+        self.shape = (len(self._pages),) + tuple(first.shape[:2])
+        self.dtype = numpy.dtype(first.dtype)
+
+        # Memory-map the whole stack if the pages are stored uncompressed and
+        # contiguously. Otherwise, we fall back to page-by-page reads.
+        self._memmap = None
+        try:
+            mm = tiff.memmap(tiff_filename, mode='r')
+            if mm.ndim == 2:
+                mm = mm[numpy.newaxis, ...]
+            if mm.shape == self.shape:
+                self._memmap = mm
+        except Exception:
+            self._memmap = None
+
+    def __enter__(self):
+        """
+        Use the stack in a `with` block, closing it at the end.
+        """
+        return self
+
+    def __exit__(self, *args):
+        """
+        Close the stack.
+        """
+        self.close()
+
+    def close(self):
+        """
+        Close the underlying file. Views returned by `read` on memory-mapped
+        files remain valid.
+        """
+        self._raw = None
+        self._tif.close()
+
+    @property
+    def is_memmapped(self):
+        """
+        bool: Whether region reads are served from a memory-map.
+        """
+        return self._memmap is not None
+
+    def read(self,
+             x_start=None, x_stop=None,
+             y_start=None, y_stop=None,
+             z_start=None, z_stop=None,
+             order='xyz'):
+        """
+        Read a region of the stack. Unspecified bounds default to the extent
+        of the file.
+
+        Arguments:
+            Q_start (int : None): The lower bound of dimension 'Q'
+            Q_stop (int : None): The upper bound of dimension 'Q'
+            order (str : 'xyz'): Any permutation of 'xyz'; the axis order of
+                the returned array.
+
+        Returns:
+            numpy.ndarray: The region. For memory-mapped files this is a
+                view onto the file, so no data is read until it is used.
+
+        Raises:
+            ValueError: If `order` is not a permutation of 'xyz'
+        """
+        if sorted(order.lower()) != ['x', 'y', 'z']:
+            raise ValueError("order must be a permutation of 'xyz'.")
+
+        zs = slice(z_start, z_stop)
+        ys = slice(y_start, y_stop)
+        xs = slice(x_start, x_stop)
+
+        if self._memmap is not None:
+            region = self._memmap[zs, ys, xs]
+        else:
+            pages = range(*zs.indices(self.shape[0]))
+            rows = range(*ys.indices(self.shape[1]))
+            cols = range(*xs.indices(self.shape[2]))
+            region = numpy.empty((len(pages), len(rows), len(cols)),
+                                 dtype=self.dtype)
+            for i, z in enumerate(pages):
+                region[i] = self._read_page(z)[ys, xs]
+
+        return region.transpose(['zyx'.index(q) for q in order.lower()])
+
+    def _read_page(self, z):
+        page = self._pages[z]
+        if getattr(page, 'is_memmappable', False):
+            if self._raw is None:
+                self._raw = numpy.memmap(self.filename, dtype=numpy.uint8,
+                                         mode='r')
+            dtype = numpy.dtype(self._tif.byteorder + page.dtype.char)
+            start = page.dataoffsets[0]
+            stop = start + int(numpy.prod(page.shape)) * dtype.itemsize
+            return self._raw[start:stop].view(dtype).reshape(page.shape)
+        return page.asarray()
 
 
 def load_collection(tiff_filename_base):
@@ -2,40 +2,282 @@ from __future__ import absolute_import
 import numpy
 
 
-def to_voxels(array):
+def compact_dtype(max_value, min_value=0):
+    """
+    Get the smallest integer type that can hold coordinates (or labels) from
+    `min_value` up to `max_value`. The type is unsigned unless `min_value` is
+    negative. Voxel lists are at least 16 bits.
+
+    Arguments:
+        max_value (int): The largest value that must be representable
+        min_value (int : 0): The smallest value that must be representable
+
+    Returns:
+        numpy.dtype: uint16, uint32 or uint64, or int16, int32 or int64
+
+    Raises:
+        ValueError: If no 64-bit integer type holds the range
+    """
+    if min_value < 0:
+        candidates = [numpy.int16, numpy.int32, numpy.int64]
+    else:
+        candidates = [numpy.uint16, numpy.uint32, numpy.uint64]
+    for dtype in candidates:
+        info = numpy.iinfo(dtype)
+        if info.min <= min_value and max_value <= info.max:
+            return numpy.dtype(dtype)
+    raise ValueError("Values from {} to {} do not fit in a 64-bit integer."
+                     .format(min_value, max_value))
+
+
+def _check_labels(values):
+    """
+    Run-length encodings store labels in an integer array; refuse anything
+    that would be truncated there.
+    """
+    values = numpy.asarray(values)
+    if values.dtype.kind not in 'biu':
+        raise ValueError("Only integer or boolean labels can be run-length "
+                         "encoded, not {}.".format(values.dtype))
+    return values
+
+
+def _local_voxels(voxels, shape, offset):
+    """
+    Subtract `offset` from (N, ndim) voxels, and refuse any that then fall
+    outside of `shape` (numpy would wrap negative indices around).
+    """
+    voxels = numpy.asarray(voxels, dtype=numpy.int64).reshape(-1, len(shape))
+    local = voxels
+    if offset is not None:
+        local = voxels - numpy.asarray(offset, dtype=numpy.int64)
+    outside = (local < 0) | (local >= numpy.asarray(shape, dtype=numpy.int64))
+    if outside.any():
+        bad = voxels[numpy.flatnonzero(outside.any(axis=1))[0]]
+        raise IndexError("Voxel {} is outside of shape {} at offset {}."
+                         .format(bad.tolist(), tuple(int(s) for s in shape),
+                                 offset))
+    return local
+
+
+def to_voxels(array, offset=None, dtype=None, labels=False):
     """
     Converts an array to its voxel list.
 
     Arguments:
-        array (numpy.ndarray): A numpy nd array. This must be boolean!
+        array (numpy.ndarray): A numpy nd array. Every nonzero element is a
+            populated voxel.
+        offset (int[] : None): Added to every coordinate, e.g. the xyz_offset
+            of the cutout, to get coordinates in dataset space.
+        dtype (numpy.dtype : None): The coordinate type. Defaults to the
+            smallest type that fits (see `compact_dtype`), which is signed
+            only if `offset` has negative coordinates.
+        labels (bool : False): If True, also return the value at each voxel.
 
     Returns:
-        A list of n-tuples
+        numpy.ndarray: An (N, ndim) array of coordinates, or a tuple of
+            (coordinates, values) if `labels` is True.
     """
     if type(array) is not numpy.ndarray:
         raise ValueError("array argument must be of type numpy.ndarray")
-    return numpy.argwhere(array)
 
+    if offset is None:
+        offset = numpy.zeros(array.ndim, dtype=int)
+    offset = numpy.asarray(offset)
+    if dtype is None:
+        dtype = compact_dtype(int(numpy.max(numpy.add(array.shape, offset))),
+                              int(numpy.min(offset)) if offset.size else 0)
 
-def from_voxels(voxels):
+    index = numpy.nonzero(array)
+    voxels = numpy.empty((len(index[0]), array.ndim), dtype=dtype)
+    for d, idx in enumerate(index):
+        voxels[:, d] = idx + offset[d]
+
+    if labels:
+        return voxels, array[index]
+    return voxels
+
+
+def from_voxels(voxels, shape=None, offset=None, labels=None, dtype=None):
     """
     Converts a voxel list to an ndarray.
 
     Arguments:
         voxels (tuple[]): A list of coordinates indicating coordinates of
-            populated voxels in an ndarray.
+            populated voxels in an ndarray, or an (N, ndim) numpy array.
+        shape (int[] : None): The shape of the result. Defaults to the
+            smallest array (starting at `offset`) that holds every voxel.
+        offset (int[] : None): The coordinate of element (0, 0, ...) of the
+            result. This is subtracted from every voxel.
+        labels (numpy.ndarray : None): The value to write at each voxel. If
+            not given, populated voxels are True.
+        dtype (numpy.dtype : None): The type of the result. Defaults to the
+            type of `labels`, or bool.
 
     Returns:
         numpy.ndarray The result of the transformation.
+
+    Raises:
+        ValueError: If no shape is given for an empty voxel list
+        IndexError: If a voxel falls outside of `shape`
     """
-    dimensions = len(voxels[0])
+    voxels = numpy.asarray(voxels)
+    if voxels.size == 0:
+        if shape is None:
+            raise ValueError("Cannot infer the shape of an empty voxel list.")
+        voxels = voxels.reshape(0, len(shape))
 
-    for d in range(len(dimensions)):
-        size.append(max([i[d] for i in voxels]))
+    if shape is None:
+        shape = voxels.max(axis=0).astype(numpy.int64) + 1
+        if offset is not None:
+            shape = shape - numpy.asarray(offset, dtype=numpy.int64)
+    local = _local_voxels(voxels, shape, offset)
+    if dtype is None:
+        dtype = numpy.asarray(labels).dtype if labels is not None else bool
 
-    result = numpy.zeros(dimensions)
+    result = numpy.zeros(tuple(int(s) for s in shape), dtype=dtype)
+    if labels is None:
+        result[tuple(local.T)] = True
+    else:
+        result[tuple(local.T)] = labels
+    return result
 
-    for v in voxels:
-        result[v] = 1
 
-    return result
+def to_rle(array):
+    """
+    Run-length encode an array (in C order). Only runs of nonzero values are
+    stored, so sparse volumes stay small.
+
+    Arguments:
+        array (numpy.ndarray): An integer or boolean array
+
+    Returns:
+        numpy.ndarray: An (N, 3) array of (start, length, value) rows, where
+            `start` is the flat index of the first element of the run. Its
+            type is the smallest that fits (see `compact_dtype`), so keep
+            `array.dtype` to pass to `from_rle`.
+
+    Raises:
+        ValueError: If `array` is not an integer or boolean array
+    """
+    flat = numpy.ravel(_check_labels(array))
+    return _runs(numpy.flatnonzero(flat), flat[flat != 0], flat.size)
+
+
+def from_rle(rle, shape, dtype=None):
+    """
+    Decode a run-length encoding produced by `to_rle`.
+
+    Arguments:
+        rle (numpy.ndarray): An (N, 3) array of (start, length, value) rows
+        shape (int[]): The shape of the decoded array
+        dtype (numpy.dtype : None): The type of the result: the type of the
+            array that was encoded. Defaults to the type of `rle`, which is
+            only the smallest type that fits the runs.
+
+    Returns:
+        numpy.ndarray
+    """
+    rle = numpy.asarray(rle).reshape(-1, 3)
+    result = numpy.zeros(int(numpy.prod(shape)),
+                         dtype=dtype if dtype is not None else rle.dtype)
+    result[_expand_runs(rle)] = numpy.repeat(rle[:, 2], rle[:, 1])
+    return result.reshape(shape)
+
+
+def voxels_to_rle(voxels, shape, offset=None, labels=None):
+    """
+    Run-length encode a voxel list directly, without building the dense array.
+
+    Arguments:
+        voxels (numpy.ndarray): An (N, ndim) array of coordinates
+        shape (int[]): The shape of the (implied) dense array
+        offset (int[] : None): The coordinate of element (0, 0, ...)
+        labels (numpy.ndarray : None): The value at each voxel (default 1)
+
+    Returns:
+        numpy.ndarray: An (N, 3) array of (start, length, value) rows
+
+    Raises:
+        ValueError: If `labels` are not integers or booleans
+        IndexError: If a voxel falls outside of `shape`
+    """
+    local = _local_voxels(voxels, shape, offset)
+    if labels is None:
+        labels = numpy.ones(len(local), dtype=numpy.uint8)
+    labels = _check_labels(labels)
+
+    linear = numpy.ravel_multi_index(tuple(local.T), tuple(shape))
+    order = numpy.argsort(linear, kind='mergesort')
+    return _runs(linear[order], numpy.asarray(labels)[order],
+                 int(numpy.prod(shape)))
+
+
+def rle_to_voxels(rle, shape, offset=None, dtype=None, labels=False):
+    """
+    Expand a run-length encoding to a voxel list, without building the dense
+    array.
+
+    Arguments:
+        rle (numpy.ndarray): An (N, 3) array of (start, length, value) rows
+        shape (int[]): The shape of the encoded array
+        offset (int[] : None): Added to every coordinate
+        dtype (numpy.dtype : None): The coordinate type (see `to_voxels`)
+        labels (bool : False): If True, also return the value at each voxel.
+
+    Returns:
+        numpy.ndarray: An (N, ndim) array of coordinates, or a tuple of
+            (coordinates, values) if `labels` is True.
+    """
+    rle = numpy.asarray(rle).reshape(-1, 3)
+    if offset is None:
+        offset = numpy.zeros(len(shape), dtype=int)
+    offset = numpy.asarray(offset)
+    if dtype is None:
+        dtype = compact_dtype(int(numpy.max(numpy.add(shape, offset))),
+                              int(numpy.min(offset)))
+
+    index = numpy.unravel_index(_expand_runs(rle), tuple(shape))
+    voxels = numpy.empty((len(index[0]), len(shape)), dtype=dtype)
+    for d, idx in enumerate(index):
+        voxels[:, d] = idx + offset[d]
+
+    if labels:
+        return voxels, numpy.repeat(rle[:, 2], rle[:, 1])
+    return voxels
+
+
+def _runs(linear, values, size):
+    """
+    Collapse sorted flat indices (and their values) into (start, length,
+    value) runs.
+    """
+    linear = numpy.asarray(linear, dtype=numpy.int64)
+    values = numpy.asarray(values)
+    if len(linear) == 0:
+        return numpy.zeros((0, 3), dtype=compact_dtype(size))
+
+    # A run breaks wherever the index jumps or the value changes.
+    breaks = (numpy.diff(linear) != 1) | (values[1:] != values[:-1])
+    starts = numpy.concatenate([[0], numpy.flatnonzero(breaks) + 1])
+    lengths = numpy.diff(numpy.concatenate([starts, [len(linear)]]))
+
+    dtype = compact_dtype(max(size, int(values.max())), int(values.min()))
+    rle = numpy.empty((len(starts), 3), dtype=dtype)
+    rle[:, 0] = linear[starts]
+    rle[:, 1] = lengths
+    rle[:, 2] = values[starts]
+    return rle
+
+
+def _expand_runs(rle):
+    """
+    Get the flat index of every element covered by a set of runs.
+    """
+    starts = rle[:, 0].astype(numpy.int64)
+    lengths = rle[:, 1].astype(numpy.int64)
+    # Position within each run, computed without a Python loop.
+    ends = numpy.cumsum(lengths)
+    within = numpy.arange(ends[-1] if len(ends) else 0) - \
+        numpy.repeat(ends - lengths, lengths)
+    return numpy.repeat(starts, lengths) + within
@@ -6,8 +6,14 @@ from .errors import *
 class RAMONBase(object):
     """
     RAMONBase Object for storing neuroscience data
+
+    RAMON classes use `__slots__` rather than a per-instance `__dict__`, so
+    that very many of them stay small. Subclasses list only the attributes
+    they add.
     """
 
+    __slots__ = ('id', 'confidence', 'kvpairs', 'status', 'author')
+
     def __init__(self, id=DEFAULT_ID,
                  confidence=DEFAULT_CONFIDENCE,
                  kvpairs=DEFAULT_DYNAMIC_METADATA,
@@ -40,3 +46,41 @@ class RAMONBase(object):
         String representation of a RAMON object for convenience.
         """
         return "{} object. id={}".format(type(self), self.id)
+
+    @classmethod
+    def _slot_names(cls):
+        """
+        Get the names of every slot of this class and its parents.
+        """
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name in getattr(klass, '__slots__', ()):
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def _attributes(self):
+        """
+        Get the public attributes of this object as a dictionary. This is what
+        `vars` returned before RAMON classes used `__slots__`.
+
+        Returns:
+            dict: {name: value} for each public attribute
+        """
+        return dict((name, getattr(self, name))
+                    for name in self._slot_names()
+                    if not name.startswith('_') and hasattr(self, name))
+
+    def __getstate__(self):
+        """
+        Get the state for pickling (slotted classes need this on Python 2).
+        """
+        return dict((name, getattr(self, name))
+                    for name in self._slot_names() if hasattr(self, name))
+
+    def __setstate__(self, state):
+        """
+        Restore the state saved by `__getstate__`.
+        """
+        for name, value in state.items():
+            setattr(self, name, value)
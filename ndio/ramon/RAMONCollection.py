@@ -0,0 +1,344 @@
+from __future__ import absolute_import
+from .enums import *
+from .errors import *
+import numpy
+
+
+class RAMONCollection(object):
+    """
+    A compact, columnar table of many RAMON objects.
+
+    Scalar fields live in one numpy struct array (`records`), sorted by ID, so
+    that a million objects cost tens of bytes each rather than a Python object
+    and dict apiece. Authors are stored once, in `authors`, and referenced by
+    index. The `segments`, `synapses` and `organelles` lists are stored as CSR
+    (indptr, indices) pairs. Only non-empty `kvpairs` are kept, by ID.
+
+    Optional fields and relations that are None are flagged in the `unset`
+    bit mask (bit k for the kth of `_optional_fields + relations`), so that
+    they come back as None rather than 0 or [].
+    """
+
+    dtype = numpy.dtype([
+        ('id', numpy.uint64),
+        ('type', numpy.uint8),
+        ('confidence', numpy.float64),
+        ('status', numpy.int16),
+        ('author', numpy.uint32),
+        ('resolution', numpy.uint8),
+        ('neuron', numpy.uint64),
+        ('segmentclass', numpy.uint32),
+        ('synapse_type', numpy.uint32),
+        ('weight', numpy.float64),
+        ('organelle_class', numpy.uint32),
+        ('unset', numpy.uint16),
+    ])
+
+    # Per-type scalar attributes, set on a RAMON only if it has them.
+    _optional_fields = ['resolution', 'neuron', 'segmentclass',
+                        'synapse_type', 'weight', 'organelle_class']
+
+    relations = ['segments', 'synapses', 'organelles']
+
+    def __init__(self, records=None, authors=None, relations=None,
+                 kvpairs=None):
+        """
+        Initialize a new RAMONCollection. Most of the time you will want
+        `RAMONCollection.from_ramons` instead.
+
+        Arguments:
+            records (numpy.ndarray : None): A struct array of `self.dtype`
+            authors (str[] : None): The author names indexed by `author`
+            relations (dict : None): {name: (indptr, indices)} for each of
+                `RAMONCollection.relations`
+            kvpairs (dict : None): {id: {key: value}} for objects that have
+                any key-value pairs
+        """
+        if records is None:
+            records = numpy.zeros(0, dtype=self.dtype)
+        order = numpy.argsort(records['id'], kind='mergesort')
+        sorted_already = numpy.all(order == numpy.arange(len(records)))
+
+        self.records = records if sorted_already else records[order]
+        self.authors = list(authors or [])
+        self.kvpairs = dict(kvpairs or {})
+
+        self._relations = {}
+        for name in self.relations:
+            if relations is not None and name in relations:
+                indptr, indices = relations[name]
+                if not sorted_already:
+                    indptr, indices = _csr_take(indptr, indices, order)
+            else:
+                indptr = numpy.zeros(len(records) + 1, dtype=numpy.uint64)
+                indices = numpy.zeros(0, dtype=numpy.uint64)
+            self._relations[name] = (numpy.asarray(indptr),
+                                     numpy.asarray(indices))
+
+    @classmethod
+    def from_ramons(cls, ramons):
+        """
+        Build a collection from individual RAMON objects.
+
+        Arguments:
+            ramons (RAMON[]): The objects to collect
+
+        Returns:
+            RAMONCollection
+        """
+        from ndio.ramon import AnnotationType
+
+        records = numpy.zeros(len(ramons), dtype=cls.dtype)
+        authors = []
+        author_index = {}
+        kvpairs = {}
+        related = dict((name, []) for name in cls.relations)
+
+        for i, r in enumerate(ramons):
+            row = records[i]
+            row['id'] = int(r.id)
+            row['type'] = AnnotationType.get_int(type(r))
+            row['confidence'] = r.confidence
+            row['status'] = r.status
+
+            if r.author not in author_index:
+                author_index[r.author] = len(authors)
+                authors.append(r.author)
+            row['author'] = author_index[r.author]
+
+            unset = 0
+            for bit, field in enumerate(cls._optional_fields):
+                if hasattr(r, field) and getattr(r, field) is not None:
+                    row[field] = getattr(r, field)
+                else:
+                    unset |= 1 << bit
+
+            for bit, name in enumerate(cls.relations,
+                                       len(cls._optional_fields)):
+                value = getattr(r, name, None)
+                if value is None:
+                    unset |= 1 << bit
+                related[name].append(numpy.ravel(value)
+                                     if value is not None else [])
+            row['unset'] = unset
+
+            if r.kvpairs:
+                kvpairs[int(r.id)] = dict(r.kvpairs)
+
+        relations = {}
+        for name in cls.relations:
+            lengths = [len(v) for v in related[name]]
+            indptr = numpy.zeros(len(ramons) + 1, dtype=numpy.uint64)
+            numpy.cumsum(lengths, out=indptr[1:])
+            indices = numpy.zeros(int(indptr[-1]), dtype=numpy.uint64)
+            for i, v in enumerate(related[name]):
+                if len(v):
+                    indices[indptr[i]:indptr[i + 1]] = v
+            relations[name] = (indptr, indices)
+
+        return cls(records, authors, relations, kvpairs)
+
+    def __len__(self):
+        """
+        Get the number of objects in the collection.
+        """
+        return len(self.records)
+
+    def __contains__(self, rid):
+        """
+        Check whether an ID is in the collection.
+        """
+        return bool(self._find(numpy.asarray([int(rid)],
+                                             dtype=numpy.uint64))[1][0])
+
+    def __iter__(self):
+        """
+        Build each RAMON object in turn, in order of ID.
+        """
+        for i in range(len(self)):
+            yield self._to_ramon(i)
+
+    def __getitem__(self, rid):
+        """
+        Get a single RAMON object by ID.
+        """
+        return self._to_ramon(self.index([rid])[0])
+
+    def __repr__(self):
+        """
+        Describe the collection without building its objects.
+        """
+        return "<RAMONCollection of {} objects>".format(len(self))
+
+    @property
+    def ids(self):
+        """
+        numpy.ndarray: The IDs in the collection, sorted.
+        """
+        return self.records['id']
+
+    @property
+    def nbytes(self):
+        """
+        int: The number of bytes held by the numpy columns.
+        """
+        return self.records.nbytes + sum(
+            p.nbytes + i.nbytes for (p, i) in self._relations.values())
+
+    def _find(self, ids):
+        if not len(self):
+            return (numpy.zeros(len(ids), dtype=numpy.int64),
+                    numpy.zeros(len(ids), dtype=bool))
+        pos = numpy.searchsorted(self.records['id'], ids)
+        pos = numpy.minimum(pos, len(self) - 1)
+        return pos, self.records['id'][pos] == ids
+
+    def index(self, ids):
+        """
+        Get the row positions of many IDs at once.
+
+        Arguments:
+            ids (int[]): The IDs to look up
+
+        Returns:
+            numpy.ndarray: The row of each ID
+
+        Raises:
+            KeyError: If any ID is not in the collection
+        """
+        ids = numpy.asarray(ids).astype(numpy.uint64)
+        pos, found = self._find(ids)
+        if not numpy.all(found):
+            raise KeyError("IDs not in collection: {}".format(
+                ids[~found].tolist()))
+        return pos
+
+    def related(self, name, rid):
+        """
+        Get one relationship list (e.g. the `segments` of a neuron) by ID.
+
+        Arguments:
+            name (str): One of `RAMONCollection.relations`
+            rid (int): The ID of the object
+
+        Returns:
+            numpy.ndarray: The related IDs
+        """
+        indptr, indices = self._relations[name]
+        i = self.index([rid])[0]
+        return indices[indptr[i]:indptr[i + 1]]
+
+    def take(self, rows):
+        """
+        Get a new collection holding only some rows of this one.
+
+        Arguments:
+            rows (numpy.ndarray): A boolean mask or an array of row positions
+
+        Returns:
+            RAMONCollection
+        """
+        rows = numpy.asarray(rows)
+        if rows.dtype == bool:
+            rows = numpy.flatnonzero(rows)
+
+        relations = dict((name, _csr_take(p, i, rows))
+                         for name, (p, i) in self._relations.items())
+        records = self.records[rows]
+        kept = set(records['id'].tolist())
+        kvpairs = dict((k, v) for k, v in self.kvpairs.items() if k in kept)
+        return RAMONCollection(records, self.authors, relations, kvpairs)
+
+    def filter(self, ramon_type=None, status=None, author=None,
+               min_confidence=None, max_confidence=None, ids=None):
+        """
+        Select objects by their fields, without building any RAMON objects.
+        Every argument that is given must match.
+
+        Arguments:
+            ramon_type (int or type or str : None): An AnnotationType, a RAMON
+                class, or a type name such as 'synapse'
+            status (int : None): Only objects with this status
+            author (str : None): Only objects by this author
+            min_confidence (float : None): Only objects at least this confident
+            max_confidence (float : None): Only objects at most this confident
+            ids (int[] : None): Only objects with one of these IDs
+
+        Returns:
+            RAMONCollection
+        """
+        from ndio.ramon import AnnotationType
+
+        mask = numpy.ones(len(self), dtype=bool)
+        if ramon_type is not None:
+            if isinstance(ramon_type, type):
+                ramon_type = AnnotationType.get_int(ramon_type)
+            elif not isinstance(ramon_type, (int, numpy.integer)):
+                ramon_type = AnnotationType.get_int(
+                    AnnotationType.RAMON(ramon_type))
+            mask &= self.records['type'] == ramon_type
+        if status is not None:
+            mask &= self.records['status'] == status
+        if author is not None:
+            if author not in self.authors:
+                mask[:] = False
+            else:
+                mask &= self.records['author'] == self.authors.index(author)
+        if min_confidence is not None:
+            mask &= self.records['confidence'] >= min_confidence
+        if max_confidence is not None:
+            mask &= self.records['confidence'] <= max_confidence
+        if ids is not None:
+            mask &= numpy.isin(self.records['id'], numpy.asarray(ids))
+        return self.take(mask)
+
+    def to_ramons(self):
+        """
+        Convert the whole collection to individual RAMON objects.
+
+        Returns:
+            RAMON[]
+        """
+        return list(self)
+
+    def _to_ramon(self, i):
+        from ndio.ramon import AnnotationType
+
+        row = self.records[i]
+        rid = int(row['id'])
+        r = AnnotationType.get_class(int(row['type']))(
+            id=rid,
+            confidence=float(row['confidence']),
+            status=int(row['status']),
+            author=self.authors[row['author']] if self.authors else '',
+            kvpairs=dict(self.kvpairs.get(rid, {}))
+        )
+        unset = int(row['unset'])
+        for bit, field in enumerate(self._optional_fields):
+            if hasattr(r, field):
+                setattr(r, field, None if unset & (1 << bit)
+                        else row[field].item())
+        for bit, name in enumerate(self.relations,
+                                   len(self._optional_fields)):
+            if hasattr(r, name):
+                indptr, indices = self._relations[name]
+                setattr(r, name, None if unset & (1 << bit) else
+                        indices[indptr[i]:indptr[i + 1]].tolist())
+        return r
+
+
+def _csr_take(indptr, indices, rows):
+    """
+    Select rows of a CSR (indptr, indices) pair, without a Python loop.
+    """
+    indptr = numpy.asarray(indptr, dtype=numpy.int64)
+    rows = numpy.asarray(rows, dtype=numpy.int64)
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+
+    new_indptr = numpy.zeros(len(rows) + 1, dtype=numpy.uint64)
+    numpy.cumsum(lengths, out=new_indptr[1:])
+    within = numpy.arange(int(new_indptr[-1])) - \
+        numpy.repeat(new_indptr[:-1].astype(numpy.int64), lengths)
+    return new_indptr, numpy.asarray(indices)[numpy.repeat(starts, lengths) +
+                                              within]
@@ -11,6 +11,8 @@ class RAMONGeneric(RAMONVolume):
     RAMONGeneric Object for storing neuroscience data with a voxel volume
     """
 
+    __slots__ = ()
+
     def __init__(self,
                  xyz_offset=(0, 0, 0),
                  resolution=0,
@@ -11,6 +11,8 @@ class RAMONNeuron(RAMONBase):
     RAMONNeuron Object for storing neuroscience data with a voxel volume
     """
 
+    __slots__ = ('segments',)
+
     def __init__(self,
                  segments=None,
 
@@ -11,6 +11,8 @@ class RAMONOrganelle(RAMONVolume):
     RAMONOrganelle Object for storing neuroscience data with a voxel volume
     """
 
+    __slots__ = ('organelle_class',)
+
     def __init__(self,
                  organelle_class=0,
 
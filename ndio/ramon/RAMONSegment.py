@@ -11,6 +11,9 @@ class RAMONSegment(RAMONVolume):
     RAMONSegment Object for storing neuroscience data with a voxel volume
     """
 
+    __slots__ = ('segmentclass', 'neuron', 'synapses', 'organelles',
+                 'parent_seed')
+
     def __init__(self,
                  segmentclass=0,
                  neuron=0,
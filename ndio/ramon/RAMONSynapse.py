@@ -11,6 +11,8 @@ class RAMONSynapse(RAMONVolume):
     RAMONSynapse Object for storing neuroscience data with a voxel volume
     """
 
+    __slots__ = ('synapse_type', 'weight', 'segments')
+
     def __init__(self,
                  synapse_type=0,
                  weight=0,
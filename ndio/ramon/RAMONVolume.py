@@ -2,6 +2,7 @@ from __future__ import absolute_import
 from .enums import *
 from .errors import *
 import numpy
+import ndio.convert.volume as ndvol
 
 from .RAMONBase import RAMONBase
 
@@ -11,6 +12,9 @@ class RAMONVolume(RAMONBase):
     RAMONVolume Object for storing neuroscience data with a voxel volume
     """
 
+    __slots__ = ('_xyz_offset', 'resolution',
+                 '_cutout', '_voxels', '_rle', '_shape', '_dtype')
+
     def __init__(self,
                  xyz_offset=(0, 0, 0),
                  resolution=0,
@@ -30,33 +34,288 @@ class RAMONVolume(RAMONBase):
             xyz_offset (int[3] : (0, 0, 0)): x,y,z coordinates of the minimum
                 corner of the cube (if data is a cutout), otherwise empty
             resolution (int : 0): level in the database resolution hierarchy
-            cutout (numpy.ndarray): dense matrix of data
-            voxels: Unused for now
+            cutout (numpy.ndarray): dense matrix of data, indexed (x, y, z)
+                from `xyz_offset`
+            voxels (numpy.ndarray): sparse (N, 3) list of the x,y,z
+                coordinates of populated voxels, in dataset space
+
+        The volume can be held as a dense `cutout`, a sparse `voxels` list or
+        a run-length encoded `rle`. Whichever one is set is the source; the
+        others are only computed when they are first read, and then cached.
+        Use `compact` to drop the cached forms again.
         """
-        self.xyz_offset = xyz_offset
+        self._xyz_offset = xyz_offset
         self.resolution = resolution
-        self.cutout = cutout
-        self.voxels = voxels
+        self._cutout = None
+        self._voxels = None
+        self._rle = None
+        self._shape = None
+        self._dtype = None
+        if cutout is not None:
+            self.cutout = cutout
+        elif voxels is not None:
+            self.voxels = voxels
 
         RAMONBase.__init__(self, id=id, confidence=confidence,
                            kvpairs=kvpairs,
                            status=status, author=author)
 
+    @property
+    def xyz_offset(self):
+        """
+        int[3]: The x,y,z coordinates of element (0, 0, 0) of the cutout.
+            Setting it moves the volume: the cutout stays the same, and the
+            voxels (which are in dataset space) move with it.
+        """
+        return self._xyz_offset
+
+    @xyz_offset.setter
+    def xyz_offset(self, value):
+        old = numpy.asarray(self._xyz_offset, dtype=numpy.int64)
+        new = numpy.asarray(value, dtype=numpy.int64)
+        self._xyz_offset = value
+        if self._voxels is None or numpy.array_equal(old, new):
+            return
+        if self._cutout is not None or self._rle is not None:
+            # Recomputed from the cutout when next read
+            self._voxels = None
+        elif len(self._voxels):
+            voxels = self._voxels.astype(numpy.int64) + (new - old)
+            self._voxels = voxels.astype(ndvol.compact_dtype(
+                int(voxels.max()), int(voxels.min())))
+
+    @property
+    def cutout(self):
+        """
+        numpy.ndarray: The dense volume (see `data`), or None if empty.
+        """
+        return self.data()
+
+    @cutout.setter
+    def cutout(self, value):
+        self._set_source(cutout=value)
+        if value is not None:
+            self._shape = value.shape
+            self._dtype = value.dtype
+
+    @property
+    def voxels(self):
+        """
+        numpy.ndarray: An (N, 3) array of populated x,y,z coordinates, in
+            dataset space (i.e. including `xyz_offset`), or None if empty.
+        """
+        if self._voxels is None:
+            if self._rle is not None:
+                self._voxels = ndvol.rle_to_voxels(self._rle, self._shape,
+                                                   offset=self.xyz_offset)
+            elif self._cutout is not None:
+                self._voxels = ndvol.to_voxels(self._cutout,
+                                               offset=self.xyz_offset)
+        return self._voxels
+
+    @voxels.setter
+    def voxels(self, value):
+        if value is not None:
+            value = numpy.asarray(value)
+        self._set_source(voxels=value)
+        self._dtype = numpy.dtype(bool)
+
+    @property
+    def rle(self):
+        """
+        numpy.ndarray: An (N, 3) run-length encoding of the dense volume, as
+            (start, length, value) rows (see `ndio.convert.volume.to_rle`).
+            Set `shape` (and `dtype`, if it is not that of the encoding)
+            after setting it.
+        """
+        if self._rle is None:
+            if self._cutout is not None:
+                self._rle = ndvol.to_rle(self._cutout)
+            elif self._voxels is not None:
+                self._rle = ndvol.voxels_to_rle(self._voxels, self.shape,
+                                                offset=self.xyz_offset)
+        return self._rle
+
+    @rle.setter
+    def rle(self, value):
+        self._set_source(rle=value)
+        self._dtype = None
+
+    @property
+    def dtype(self):
+        """
+        numpy.dtype: The type of the dense volume, kept across `compact`.
+            Volumes built from a voxel list are boolean masks.
+        """
+        if self._dtype is None and self._rle is not None:
+            return self._rle.dtype
+        return self._dtype
+
+    @dtype.setter
+    def dtype(self, value):
+        self._dtype = numpy.dtype(value) if value is not None else None
+
+    @property
+    def sparse(self):
+        """
+        bool: Whether the volume is held only as a voxel list, so that reading
+            `cutout` would densify it.
+        """
+        return self._cutout is None and self._voxels is not None
+
+    @property
+    def shape(self):
+        """
+        int[3]: The shape of the dense volume, starting at `xyz_offset`.
+        """
+        if self._shape is None and self._voxels is not None:
+            if len(self._voxels) == 0:
+                return (0, 0, 0)
+            extent = self._voxels.max(axis=0).astype(numpy.int64) + 1
+            self._shape = tuple(int(i) for i in
+                                extent - numpy.asarray(self.xyz_offset))
+        return self._shape
+
+    @shape.setter
+    def shape(self, value):
+        self._shape = tuple(value) if value is not None else None
+
+    def _set_source(self, cutout=None, voxels=None, rle=None):
+        # Whatever was cached before is now stale.
+        self._cutout = cutout
+        self._voxels = voxels
+        self._rle = rle
+        if rle is None:
+            self._shape = None
+
     def data(self):
         """
         Gets the data from the volume and pumps it into a numpy.ndarray format,
-        regardless of whether it's stored in `cutout` or `voxels`. Returns it
-        as though it were stored in `cutout`.
+        regardless of whether it's stored in `cutout`, `voxels` or `rle`.
+        Returns it as though it were stored in `cutout`, and caches it.
 
         This is useful for cases where you need to operate on a 3D matrix.
+        Volumes built from a voxel list are boolean masks.
 
         Arguments:
             None
 
         Returns:
-            numpy.ndarray
+            numpy.ndarray, or None if the volume holds no data
+        """
+        if self._cutout is None:
+            if self._rle is not None:
+                self._cutout = ndvol.from_rle(self._rle, self._shape,
+                                              dtype=self.dtype)
+            elif self._voxels is not None:
+                self._cutout = ndvol.from_voxels(self._voxels,
+                                                 shape=self.shape,
+                                                 offset=self.xyz_offset)
+        return self._cutout
+
+    def bounding_box(self):
         """
-        if self.cutout:
-            return self.cutout
+        Get the tight bounding box of the populated voxels, in dataset space.
+        Sparse volumes are not densified to compute it.
+
+        Arguments:
+            None
+
+        Returns:
+            (x_start, x_stop, y_start, y_stop, z_start, z_stop): ints, or
+                None if the volume is empty.
+        """
+        if self._cutout is not None and self._voxels is None:
+            nz = [numpy.flatnonzero(self._cutout.any(axis=tuple(
+                  a for a in range(3) if a != d))) for d in range(3)]
+            if any(len(i) == 0 for i in nz):
+                return None
+            lo = [int(i[0]) + int(o) for i, o in zip(nz, self.xyz_offset)]
+            hi = [int(i[-1]) + int(o) + 1
+                  for i, o in zip(nz, self.xyz_offset)]
+        else:
+            voxels = self.voxels
+            if voxels is None or len(voxels) == 0:
+                return None
+            lo = [int(i) for i in voxels.min(axis=0)]
+            hi = [int(i) + 1 for i in voxels.max(axis=0)]
+        return (lo[0], hi[0], lo[1], hi[1], lo[2], hi[2])
+
+    def crop(self):
+        """
+        Shrink the volume to its bounding box, moving `xyz_offset` to the
+        minimum corner. Sparse volumes stay sparse.
+
+        Arguments:
+            None
+
+        Returns:
+            RAMONVolume: self
+        """
+        bbox = self.bounding_box()
+        if bbox is None:
+            return self
+        new_offset = (bbox[0], bbox[2], bbox[4])
+        new_shape = (bbox[1] - bbox[0], bbox[3] - bbox[2], bbox[5] - bbox[4])
+
+        if self._cutout is not None:
+            lo = [n - o for n, o in zip(new_offset, self.xyz_offset)]
+            cutout = self._cutout[lo[0]:lo[0] + new_shape[0],
+                                  lo[1]:lo[1] + new_shape[1],
+                                  lo[2]:lo[2] + new_shape[2]].copy()
+            self._xyz_offset = new_offset
+            self.cutout = cutout
         else:
-            raise NotImplementedError("Cannot convert from voxel list yet.")
+            # The voxels are in dataset space, so they do not move.
+            voxels = self.voxels
+            self._xyz_offset = new_offset
+            self.voxels = voxels
+            self._shape = new_shape
+        return self
+
+    def compact(self, form='voxels'):
+        """
+        Keep only one representation of the volume, dropping the others.
+
+        Arguments:
+            form (str : 'voxels'): One of 'cutout', 'voxels' or 'rle'
+
+        Returns:
+            RAMONVolume: self
+
+        Raises:
+            ValueError: If `form` is not a known representation
+        """
+        if form not in ['cutout', 'voxels', 'rle']:
+            raise ValueError("form must be 'cutout', 'voxels' or 'rle'.")
+        if self._cutout is None and self._voxels is None and self._rle is None:
+            return self
+
+        shape = self.shape
+        value = getattr(self, form)
+        self._cutout = self._voxels = self._rle = None
+        setattr(self, '_' + form, value)
+        self._shape = shape
+        if form == 'voxels':
+            # A voxel list keeps no labels.
+            self._dtype = numpy.dtype(bool)
+        return self
+
+    @property
+    def nbytes(self):
+        """
+        int: The number of bytes held by the materialized representations.
+        """
+        return sum(a.nbytes for a in [self._cutout, self._voxels, self._rle]
+                   if a is not None)
+
+    def _attributes(self):
+        """
+        Get the public attributes of this object as a dictionary. The volume
+        is reported as stored: `cutout` and `voxels` are not computed here.
+        """
+        attributes = RAMONBase._attributes(self)
+        attributes['xyz_offset'] = self.xyz_offset
+        attributes['cutout'] = self._cutout
+        attributes['voxels'] = self._voxels
+        return attributes
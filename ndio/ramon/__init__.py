@@ -35,8 +35,27 @@ try:
     from cStringIO import StringIO
 except:
     from io import StringIO
-import copy
 import six
+import numpy
+
+# Use the fastest JSON library available for streamed RAMON I/O. `_dumps`
+# always returns text.
+try:
+    import orjson as _fastjson
+
+    def _dumps(obj):
+        # Accept the non-str keys (e.g. in kvpairs) that `json` does
+        return _fastjson.dumps(
+            obj, option=_fastjson.OPT_NON_STR_KEYS).decode('utf-8')
+    _loads = _fastjson.loads
+except ImportError:
+    try:
+        import ujson as _fastjson
+        _dumps = _fastjson.dumps
+        _loads = _fastjson.loads
+    except ImportError:
+        _dumps = jsonlib.dumps
+        _loads = jsonlib.loads
 
 from ndio.ramon.RAMONBase import *
 from ndio.ramon.RAMONGeneric import *
@@ -45,6 +64,7 @@ from ndio.ramon.RAMONOrganelle import *
 from ndio.ramon.RAMONSegment import *
 from ndio.ramon.RAMONSynapse import *
 from ndio.ramon.RAMONVolume import *
+from ndio.ramon.RAMONCollection import *
 
 from .errors import *
 
@@ -149,7 +169,7 @@ class AnnotationType:
             return _ramon_types[_types[typ]]
 
 
-def to_dict(ramons, flatten=False):
+def to_dict(ramons, flatten=False, volumes=True):
     """
     Converts a RAMON object list to a JSON-style dictionary. Useful for going
     from an array of RAMONs to a dictionary, indexed by ID.
@@ -157,6 +177,8 @@ def to_dict(ramons, flatten=False):
     Arguments:
         ramons (RAMON[]): A list of RAMON objects
         flatten (boolean: False): Not implemented
+        volumes (bool : True): Whether to include volume data (`cutout` and
+            `voxels`). Pass False to leave it out, as `to_json` does.
 
     Returns:
         dict: A python dictionary of RAMON objects.
@@ -166,10 +188,14 @@ def to_dict(ramons, flatten=False):
 
     out_ramons = {}
     for r in ramons:
+        metadata = r._attributes()
+        if not volumes:
+            metadata.pop('cutout', None)
+            metadata.pop('voxels', None)
         out_ramons[r.id] = {
             "id": r.id,
             "type": _reverse_ramon_types[type(r)],
-            "metadata": vars(r)
+            "metadata": metadata
         }
     return out_ramons
 
@@ -185,6 +211,10 @@ def to_json(ramons, flatten=False):
 
     ...even if `type(ramon)` is a RAMON, not a list.
 
+    Volume data (`cutout` and `voxels`) is not included. To write very many
+    objects without building the whole document in memory, use `dump_json`
+    or `to_json_lines`.
+
     Arguments:
         ramons (RAMON or list): The RAMON object(s) to convert to JSON.
         flatten (bool : False): If ID should be used as a key. If not, then
@@ -211,14 +241,10 @@ def to_json(ramons, flatten=False):
 
     out_ramons = {}
     for r in ramons:
-        out_ramons[r.id] = {
-            "id": r.id,
-            "type": _reverse_ramon_types[type(r)],
-            "metadata": vars(r)
-        }
+        out_ramons[r.id] = _to_json_record(r)
 
     if flatten:
-        return jsonlib.dumps(out_ramons.values()[0])
+        return jsonlib.dumps(list(out_ramons.values())[0])
 
     return jsonlib.dumps(out_ramons)
 
@@ -241,6 +267,9 @@ def from_json(json, cutout=None):
     NOTE: If more than one item is in the dictionary, then a Python list of
     RAMON objects is returned instead of a single RAMON.
 
+    The whole document is parsed at once. To read a large file written by
+    `dump_json` one object at a time, use `iter_json`.
+
     Arguments:
         json (str or dict): The JSON to import to RAMON objects
         cutout: Currently not supported.
@@ -248,42 +277,296 @@ def from_json(json, cutout=None):
     Returns:
         [RAMON]
     """
-    if type(json) is str:
-        json = jsonlib.loads(json)
-
-    out_ramons = []
-    for (rid, rdata) in six.iteritems(json):
-        _md = rdata['metadata']
-        r = AnnotationType.RAMON(rdata['type'])(
-            id=rid,
-            author=_md['author'],
-            status=_md['status'],
-            confidence=_md['confidence'],
-            kvpairs=copy.deepcopy(_md['kvpairs'])
-        )
-
-        if rdata['type'] == 'segment':
-            r.segmentclass = _md.get('segmentclass')
-            r.neuron = _md.get('neuron')
-            if 'synapses' in _md:
-                r.synapses = _md['synapses'][:]
-            if 'organelles' in _md:
-                r.organelles = _md['organelles'][:]
-
-        elif rdata['type'] in ['neuron', 'synapse']:
-            if 'segments' in _md:
-                r.segments = _md['segments'][:]
-
-        elif rdata['type'] == 'organelle':
-            r.organelle_class = _md['organelleclass'][:]
-
-        elif rdata['type'] == 'synapse':
-            r.synapse_type = _md.get('synapse_type')
-            r.weight = _md.get('weight')
-
-        out_ramons.append(r)
+    if isinstance(json, (six.string_types, bytes)):
+        json = _loads(json)
+
+    return [_from_json_record(rid, rdata)
+            for (rid, rdata) in six.iteritems(json)]
+
+
+def dump_json(ramons, f, cutout_ref=None):
+    """
+    Write RAMON objects to a JSON document in the schema of `to_json`, one
+    object at a time, so that the whole document is never held in memory.
+
+    Arguments:
+        ramons (iterable): The RAMON objects to write. May be a generator.
+        f (str or file): A filename, or a file object open for writing text
+        cutout_ref (function : None): If given, called with each RAMON that
+            has a volume. Its (JSON-serializable) result is stored in the
+            metadata as `cutout_ref`, e.g. the name of a file that holds the
+            cutout. Volume data is never written inline.
+
+    Returns:
+        int: The number of objects written. Read them back one at a time
+            with `iter_json`.
+    """
+    count = 0
+    with _open_text(f, 'w') as fp:
+        fp.write('{')
+        for r in ramons:
+            if count:
+                fp.write(', ')
+            fp.write(jsonlib.dumps(str(r.id)) + ': ')
+            fp.write(_dumps(_to_json_record(r, cutout_ref)))
+            count += 1
+        fp.write('}')
+    return count
+
+
+def iter_json(f, cutout_loader=None, chunk_size=65536):
+    """
+    Lazily read RAMON objects from a JSON document in the schema of
+    `to_json`, such as one written by `dump_json`. The file is read
+    `chunk_size` characters at a time, and only one object is parsed (and
+    held in memory) at a time.
+
+    Arguments:
+        f (str or file): A filename, or a file object open for reading
+        cutout_loader (function : None): See `iter_json_lines`.
+        chunk_size (int : 65536): Characters to read at a time
+
+    Returns:
+        generator: Yields one RAMON object per ID
+
+    Raises:
+        ValueError: If the document is not an object of ID: record pairs
+    """
+    decoder = jsonlib.JSONDecoder()
+    with _open_text(f, 'r') as fp:
+        reader = _json_reader(fp, decoder, chunk_size)
+        if reader.token() != '{':
+            raise ValueError("Expected a JSON object of RAMON records.")
+        if reader.peek() == '}':
+            return
+        while True:
+            rid = reader.value()
+            if reader.token() != ':':
+                raise ValueError("Expected ':' after ID {}.".format(rid))
+            rdata = reader.value()
+            r = _from_json_record(rid, rdata)
+            ref = rdata['metadata'].get('cutout_ref')
+            if cutout_loader is not None and ref is not None:
+                r.cutout = cutout_loader(ref)
+            yield r
+
+            separator = reader.token()
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError("Expected ',' or '}' after ID {}."
+                                 .format(rid))
+
+
+class _json_reader(object):
+    """
+    Read a JSON document from a file a token or a value at a time, keeping
+    only the unparsed remainder of the last chunk in memory.
+    """
+
+    def __init__(self, fp, decoder, chunk_size):
+        """
+        Read from `fp`, `chunk_size` characters at a time, with `decoder`.
+        """
+        self.fp = fp
+        self.decoder = decoder
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.fp.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON document.")
+
+    def token(self):
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number may go on into the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def to_json_lines(ramons, f, cutout_ref=None):
+    """
+    Write RAMON objects as JSON lines: one `{"id", "type", "metadata"}`
+    document per line. Objects are written as they are read from `ramons`,
+    so memory use does not grow with the number of objects.
+
+    Arguments:
+        ramons (iterable): The RAMON objects to write. May be a generator.
+        f (str or file): A filename, or a file object open for writing text
+        cutout_ref (function : None): See `dump_json`.
+
+    Returns:
+        int: The number of objects written
+    """
+    count = 0
+    with _open_text(f, 'w') as fp:
+        for r in ramons:
+            fp.write(_dumps(_to_json_record(r, cutout_ref)))
+            fp.write('\n')
+            count += 1
+    return count
+
+
+def iter_json_lines(f, cutout_loader=None):
+    """
+    Lazily read RAMON objects written by `to_json_lines`. Only one line is
+    parsed at a time.
+
+    Arguments:
+        f (str or file): A filename, or a file object open for reading
+        cutout_loader (function : None): If given, called with the
+            `cutout_ref` of each object that has one. The result is set as
+            the object's `cutout`.
+
+    Returns:
+        generator: Yields one RAMON object per line
+    """
+    with _open_text(f, 'r') as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            rdata = _loads(line)
+            r = _from_json_record(rdata['id'], rdata)
+            ref = rdata['metadata'].get('cutout_ref')
+            if cutout_loader is not None and ref is not None:
+                r.cutout = cutout_loader(ref)
+            yield r
+
+
+def from_json_lines(f, cutout_loader=None):
+    """
+    Read every RAMON object written by `to_json_lines`. See `iter_json_lines`
+    to read them one at a time instead.
+
+    Returns:
+        RAMON[]
+    """
+    return list(iter_json_lines(f, cutout_loader))
+
+
+class _open_text(object):
+    """
+    Open a filename for the duration of a `with` block, or use (and leave
+    open) a file object that is already open.
+    """
+
+    def __init__(self, f, mode):
+        """
+        Use `f`, a filename or an open file, with the `mode` for a filename.
+        """
+        self.f = f
+        self.mode = mode
+        self.opened = isinstance(f, six.string_types)
+
+    def __enter__(self):
+        """
+        Open the file if it was given by name, and return it.
+        """
+        if self.opened:
+            self.f = open(self.f, self.mode)
+        return self.f
+
+    def __exit__(self, *args):
+        """
+        Close the file if it was opened by `__enter__`.
+        """
+        if self.opened:
+            self.f.close()
 
-    return out_ramons
+
+def _jsonable(value):
+    """
+    Convert numpy values to their plain python equivalents.
+    """
+    if isinstance(value, numpy.ndarray):
+        return value.tolist()
+    if isinstance(value, numpy.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def _to_json_record(r, cutout_ref=None):
+    """
+    Get the JSON-ready {"id", "type", "metadata"} dictionary of one RAMON,
+    without its volume data.
+    """
+    metadata = r._attributes()
+    metadata.pop('cutout', None)
+    metadata.pop('voxels', None)
+    for name, value in metadata.items():
+        metadata[name] = _jsonable(value)
+
+    if cutout_ref is not None and isinstance(r, RAMONVolume) and \
+            r.shape is not None:
+        metadata['cutout_ref'] = cutout_ref(r)
+
+    return {
+        "id": _jsonable(r.id),
+        "type": _reverse_ramon_types[type(r)],
+        "metadata": metadata
+    }
+
+
+# Attributes restored by `_from_json_record`, and older names for them.
+_json_attributes = ['segmentclass', 'neuron', 'synapses', 'organelles',
+                    'segments', 'synapse_type', 'weight', 'organelle_class',
+                    'xyz_offset', 'resolution']
+_json_aliases = {'organelle_class': 'organelleclass'}
+
+
+def _from_json_record(rid, rdata):
+    """
+    Build one RAMON object from its JSON record.
+    """
+    _md = rdata['metadata']
+    r = AnnotationType.RAMON(rdata['type'])(
+        id=rid,
+        author=_md['author'],
+        status=_md['status'],
+        confidence=_md['confidence'],
+        kvpairs=dict(_md['kvpairs'])
+    )
+
+    for name in _json_attributes:
+        if not hasattr(r, name):
+            continue
+        value = _md.get(name, _md.get(_json_aliases.get(name)))
+        if value is None:
+            continue
+        if isinstance(value, list):
+            value = list(value)
+        setattr(r, name, value)
+
+    return r
 
 
 def from_hdf5(hdf5, anno_id=None):
@@ -291,10 +574,8 @@ def from_hdf5(hdf5, anno_id=None):
     Converts an HDF5 file to a RAMON object. Returns an object that is a child-
     -class of RAMON (though it's determined at run-time what type is returned).
 
-    Accessing multiple IDs from the same file is not supported, because it's
-    not dramatically faster to access each item in the hdf5 file at the same
-    time It's semantically and computationally easier to run this function
-    several times on the same file.
+    To read many objects from the same file, use `from_hdf5_many`, which
+    walks the file once rather than once per ID.
 
     Arguments:
         hdf5 (h5py.File): A h5py File object that holds RAMON data
@@ -310,15 +591,63 @@ def from_hdf5(hdf5, anno_id=None):
 
     # First, get the actual object we're going to download.
     anno_id = str(anno_id)
-    if anno_id not in list(hdf5.keys()):
+    if anno_id not in hdf5:
         raise ValueError("ID {} is not in this file. Options are: {}".format(
             anno_id,
             ", ".join(list(hdf5.keys()))
         ))
 
-    anno = hdf5[anno_id]
-    # anno now holds just the RAMON of interest
+    return _from_hdf5_group(hdf5[anno_id], anno_id)
+
+
+def from_hdf5_many(hdf5, anno_ids=None):
+    """
+    Converts many RAMON objects from one HDF5 file, in a single pass over the
+    file.
+
+    Arguments:
+        hdf5 (h5py.File or str): A h5py File object (or the name of a file)
+            that holds RAMON data
+        anno_ids (int[] : None): The IDs of the RAMON objs to extract. This
+            defaults to every object in the file.
+
+    Returns:
+        ndio.RAMON[]: In the order of `anno_ids` (or of the file)
+
+    Raises:
+        ValueError: If any of the requested IDs are not in the file
+    """
+    import h5py
+
+    if isinstance(hdf5, six.string_types):
+        with h5py.File(hdf5, "r") as f:
+            return from_hdf5_many(f, anno_ids)
+
+    keys = set(hdf5.keys())
+    if anno_ids is None:
+        anno_ids = sorted(keys)
+    anno_ids = [str(i) for i in anno_ids]
+
+    missing = [i for i in anno_ids if i not in keys]
+    if missing:
+        raise ValueError("IDs {} are not in this file.".format(
+            ", ".join(missing)
+        ))
 
+    return [_from_hdf5_group(hdf5[i], i) for i in anno_ids]
+
+
+def _decode(value):
+    # h5py >= 3 reads variable-length strings back as bytes.
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+def _from_hdf5_group(anno, anno_id):
+    """
+    Converts one RAMON group of an HDF5 file to a RAMON object.
+    """
     # This is the most complicated line in here: It creates an object whose
     # type is conditional on the ANNOTATION_TYPE of the hdf5 object.
     try:
@@ -328,7 +657,7 @@ def from_hdf5(hdf5, anno_id=None):
 
     # All RAMON types definitely have these attributes:
     metadata = anno['METADATA']
-    r.author = metadata['AUTHOR'][0]
+    r.author = _decode(metadata['AUTHOR'][0])
     r.confidence = metadata['CONFIDENCE'][0]
     r.status = metadata['STATUS'][0]
     r.id = anno_id
@@ -338,23 +667,22 @@ def from_hdf5(hdf5, anno_id=None):
     if type(r) in [RAMONNeuron, RAMONSynapse]:
         r.segments = metadata['SEGMENTS'][()]
 
+    r.kvpairs = {}
     if 'KVPAIRS' in metadata:
-        kvs = metadata['KVPAIRS'][()][0].split()
-        if len(kvs) != 0:
-
-            for i in kvs:
-                k, v = str(i).split(',')
-                r.kvpairs[str(k)] = str(v)
-        else:
-            r.kvpairs = {}
+        kvs = _decode(metadata['KVPAIRS'][()][0]).split()
+        for i in kvs:
+            k, v = str(i).split(',')
+            r.kvpairs[str(k)] = str(v)
 
     if issubclass(type(r), RAMONVolume):
-        if 'CUTOUT' in anno:
-            r.cutout = anno['CUTOUT'][()]
         if 'XYZOFFSET' in anno:
-            r.cutout = anno['XYZOFFSET'][()]
+            r.xyz_offset = anno['XYZOFFSET'][()]
         if 'RESOLUTION' in anno:
-            r.cutout = anno['RESOLUTION'][()]
+            r.resolution = anno['RESOLUTION'][0]
+        if 'CUTOUT' in anno:
+            r.cutout = anno['CUTOUT'][()]
+        elif 'VOXELS' in anno:
+            r.voxels = anno['VOXELS'][()]
 
     if type(r) is RAMONSynapse:
         r.synapse_type = metadata['SYNAPSE_TYPE'][0]
@@ -378,13 +706,14 @@ def from_hdf5(hdf5, anno_id=None):
     return r
 
 
-def to_hdf5(ramon, hdf5=None):
+def to_hdf5(ramon, hdf5=None, compression='gzip'):
     """
     Exports a RAMON object to an HDF5 file object.
 
     Arguments:
         ramon (RAMON): A subclass of RAMONBase
         hdf5 (str): Export filename
+        compression (str : 'gzip'): HDF5 filter for the cutout, or None
 
     Returns:
         hdf5.File
@@ -392,11 +721,34 @@ def to_hdf5(ramon, hdf5=None):
     Raises:
         InvalidRAMONError: if you pass a non-RAMON object
     """
-    if issubclass(type(ramon), RAMONBase) is False:
-        raise InvalidRAMONError("Invalid RAMON supplied to ramon.to_hdf5.")
+    return to_hdf5_many([ramon], hdf5, compression)
+
+
+def to_hdf5_many(ramons, hdf5=None, compression='gzip', voxels=True):
+    """
+    Exports many RAMON objects to one HDF5 file, opening it only once. Cutouts
+    are stored as chunked (and, by default, compressed) datasets.
+
+    Arguments:
+        ramons (RAMON[]): Subclasses of RAMONBase
+        hdf5 (file : None): A file object (with a `name`) to export to. If
+            None, a new temporary file is created.
+        compression (str : 'gzip'): HDF5 filter for the cutouts, or None
+        voxels (bool : True): Whether to export the volumes that are only
+            held as a voxel list (see `RAMONVolume.sparse`). If False, they
+            are left out, for the caller to upload some other way.
 
+    Returns:
+        file: The file object, rewound to the start
+
+    Raises:
+        InvalidRAMONError: if you pass a non-RAMON object
+    """
     import h5py
-    import numpy
+
+    for ramon in ramons:
+        if issubclass(type(ramon), RAMONBase) is False:
+            raise InvalidRAMONError("Invalid RAMON supplied to ramon.to_hdf5.")
 
     if hdf5 is None:
         tmpfile = tempfile.NamedTemporaryFile(delete=False)
@@ -404,81 +756,105 @@ def to_hdf5(ramon, hdf5=None):
         tmpfile = hdf5
 
     with h5py.File(tmpfile.name, "a") as hdf5:
-
-        # First we'll export things that all RAMON objects have in
-        # common, starting with the Group that encompasses each ID:
-        grp = hdf5.create_group(str(ramon.id))
-
-        grp.create_dataset("ANNOTATION_TYPE", (1,),
-                           numpy.uint32,
-                           data=AnnotationType.get_int(type(ramon)))
-
-        if hasattr(ramon, 'cutout'):
-            if ramon.cutout is not None:
-                grp.create_dataset('CUTOUT', ramon.cutout.shape,
-                                   ramon.cutout.dtype, data=ramon.cutout)
-                grp.create_dataset('RESOLUTION', (1,),
-                                   numpy.uint32, data=ramon.resolution)
-                grp.create_dataset('XYZOFFSET', (3,),
-                                   numpy.uint32, data=ramon.xyz_offset)
-
-        # Next, add general metadata.
-        metadata = grp.create_group('METADATA')
-
-        metadata.create_dataset('AUTHOR', (1,),
-                                dtype=h5py.special_dtype(vlen=str),
-                                data=ramon.author)
-
-        fstring = StringIO()
-        csvw = csv.writer(fstring, delimiter=',')
-        csvw.writerows([r for r in six.iteritems(ramon.kvpairs)])
-
-        metadata.create_dataset('KVPAIRS', (1,),
-                                dtype=h5py.special_dtype(vlen=str),
-                                data=fstring.getvalue())
-        metadata.create_dataset('CONFIDENCE', (1,), numpy.float,
-                                data=ramon.confidence)
-        metadata.create_dataset('STATUS', (1,), numpy.uint32,
-                                data=ramon.status)
-
-        # Finally, add type-specific metadata:
-
-        if hasattr(ramon, 'segments'):
-            metadata.create_dataset('SEGMENTS',
-                                    data=numpy.asarray(ramon.segments,
-                                                       dtype=numpy.uint32))
-
-        if hasattr(ramon, 'synapse_type'):
-            metadata.create_dataset('SYNAPSE_TYPE', (1,), numpy.uint32,
-                                    data=ramon.synapse_type)
-
-        if hasattr(ramon, 'weight'):
-            metadata.create_dataset('WEIGHT', (1,),
-                                    numpy.float, data=ramon.weight)
-
-        if hasattr(ramon, 'neuron'):
-            metadata.create_dataset('NEURON', (1,),
-                                    numpy.uint32, data=ramon.neuron)
-
-        if hasattr(ramon, 'segmentclass'):
-            metadata.create_dataset('SEGMENTCLASS', (1,), numpy.uint32,
-                                    data=ramon.segmentclass)
-
-        if hasattr(ramon, 'synapses'):
-            metadata.create_dataset('SYNAPSES', (len(ramon.synapses),),
-                                    numpy.uint32, data=ramon.synapses)
-
-        if hasattr(ramon, 'organelles'):
-            metadata.create_dataset('ORGANELLES',
-                                    (len(ramon.organelles),),
-                                    numpy.uint32,
-                                    data=ramon.organelles)
-
-        if hasattr(ramon, 'organelle_class'):
-            metadata.create_dataset('ORGANELLECLASS', (1,),
-                                    numpy.uint32,
-                                    data=ramon.organelle_class)
+        for ramon in ramons:
+            _to_hdf5_group(hdf5, ramon, compression, voxels)
         hdf5.flush()
-        tmpfile.seek(0)
-        return tmpfile
-    return False
+    tmpfile.seek(0)
+    return tmpfile
+
+
+def _to_hdf5_group(hdf5, ramon, compression=None, voxels=True):
+    """
+    Exports a RAMON object to a new group of an open h5py File.
+    """
+    import h5py
+    import numpy
+
+    # First we'll export things that all RAMON objects have in
+    # common, starting with the Group that encompasses each ID:
+    grp = hdf5.create_group(str(ramon.id))
+
+    grp.create_dataset("ANNOTATION_TYPE", (1,),
+                       numpy.uint32,
+                       data=AnnotationType.get_int(type(ramon)))
+
+    if isinstance(ramon, RAMONVolume):
+        # Don't densify volumes that are only held as a voxel list.
+        written = False
+        if ramon.sparse:
+            if voxels:
+                data = ramon.voxels
+                grp.create_dataset('VOXELS', data=data,
+                                   chunks=True if len(data) else None,
+                                   compression=compression if len(data)
+                                   else None)
+                written = True
+        elif ramon.cutout is not None:
+            grp.create_dataset('CUTOUT', data=ramon.cutout,
+                               chunks=True, compression=compression)
+            written = True
+        if written:
+            grp.create_dataset('RESOLUTION', (1,),
+                               numpy.uint32, data=ramon.resolution)
+            # Signed, as offsets may be negative
+            grp.create_dataset('XYZOFFSET', (3,),
+                               numpy.int64, data=ramon.xyz_offset)
+
+    # Next, add general metadata.
+    metadata = grp.create_group('METADATA')
+
+    metadata.create_dataset('AUTHOR', (1,),
+                            dtype=h5py.special_dtype(vlen=str),
+                            data=ramon.author)
+
+    fstring = StringIO()
+    csvw = csv.writer(fstring, delimiter=',')
+    csvw.writerows([r for r in six.iteritems(ramon.kvpairs)])
+
+    metadata.create_dataset('KVPAIRS', (1,),
+                            dtype=h5py.special_dtype(vlen=str),
+                            data=fstring.getvalue())
+    metadata.create_dataset('CONFIDENCE', (1,), numpy.float64,
+                            data=ramon.confidence)
+    metadata.create_dataset('STATUS', (1,), numpy.uint32,
+                            data=ramon.status)
+
+    # Finally, add type-specific metadata:
+
+    if hasattr(ramon, 'segments'):
+        segments = ramon.segments if ramon.segments is not None else []
+        metadata.create_dataset('SEGMENTS',
+                                data=numpy.asarray(segments,
+                                                   dtype=numpy.uint32))
+
+    if hasattr(ramon, 'synapse_type'):
+        metadata.create_dataset('SYNAPSE_TYPE', (1,), numpy.uint32,
+                                data=ramon.synapse_type)
+
+    if hasattr(ramon, 'weight'):
+        metadata.create_dataset('WEIGHT', (1,),
+                                numpy.float64, data=ramon.weight)
+
+    if hasattr(ramon, 'neuron'):
+        metadata.create_dataset('NEURON', (1,),
+                                numpy.uint32, data=ramon.neuron)
+
+    if hasattr(ramon, 'segmentclass'):
+        metadata.create_dataset('SEGMENTCLASS', (1,), numpy.uint32,
+                                data=ramon.segmentclass)
+
+    if hasattr(ramon, 'synapses'):
+        metadata.create_dataset('SYNAPSES', (len(ramon.synapses),),
+                                numpy.uint32, data=ramon.synapses)
+
+    if hasattr(ramon, 'organelles'):
+        metadata.create_dataset('ORGANELLES',
+                                (len(ramon.organelles),),
+                                numpy.uint32,
+                                data=ramon.organelles)
+
+    if hasattr(ramon, 'organelle_class'):
+        metadata.create_dataset('ORGANELLECLASS', (1,),
+                                numpy.uint32,
+                                data=ramon.organelle_class)
+    return grp
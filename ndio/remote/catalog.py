@@ -0,0 +1,423 @@
+"""
+A local, persistent catalog of public projects, their channels and their
+image bounds, so that finding a token by dataset, channel type, datatype,
+resolution or bounding box does not mean crawling the metadata server.
+"""
+from __future__ import absolute_import
+import os
+import json
+import time
+import sqlite3
+
+from ndio.utils.parallel import DEFAULT_WORKERS, imap_unordered
+
+DEFAULT_CATALOG = os.path.join('~', '.ndio', 'catalog.sqlite')
+
+# Bumped whenever the tables change; older catalogs are rebuilt.
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE tokens (
+    token TEXT PRIMARY KEY,
+    dataset TEXT,
+    project TEXT,
+    public INTEGER NOT NULL,
+    synced REAL NOT NULL,
+    info TEXT NOT NULL
+);
+CREATE INDEX tokens_dataset ON tokens (dataset);
+
+CREATE TABLE channels (
+    token TEXT NOT NULL REFERENCES tokens (token) ON DELETE CASCADE,
+    channel TEXT NOT NULL,
+    channel_type TEXT,
+    datatype TEXT,
+    PRIMARY KEY (token, channel)
+);
+CREATE INDEX channels_type ON channels (channel_type, datatype);
+CREATE INDEX channels_datatype ON channels (datatype);
+
+CREATE TABLE resolutions (
+    token TEXT NOT NULL REFERENCES tokens (token) ON DELETE CASCADE,
+    resolution INTEGER NOT NULL,
+    x_start INTEGER, x_stop INTEGER,
+    y_start INTEGER, y_stop INTEGER,
+    z_start INTEGER, z_stop INTEGER,
+    PRIMARY KEY (token, resolution)
+);
+CREATE INDEX resolutions_bounds ON resolutions (resolution, x_start, x_stop);
+
+CREATE TABLE datasets (
+    dataset TEXT PRIMARY KEY,
+    description TEXT,
+    public INTEGER,
+    info TEXT NOT NULL
+);
+"""
+
+
+class catalog(object):
+    """
+    A catalog of projects, kept in a SQLite database. `sync` fills it from
+    the metadata server; every other method answers from the database alone.
+    """
+
+    def __init__(self, remote=None, resources=None,
+                 filename=DEFAULT_CATALOG):
+        """
+        Initializer for the catalog class.
+
+        Arguments:
+            remote (ndio.remote.data : None): The remote to sync from. A
+                `neurodata` remote may be given for both this and `resources`.
+                Not needed to query a catalog that is already synced.
+            resources (ndio.remote.resources : None): If given, `sync` also
+                records the public datasets it lists
+            filename (str : DEFAULT_CATALOG): The database file, created if
+                needed. ':memory:' keeps the catalog for this session only.
+        """
+        if resources is None:
+            resources = getattr(remote, 'resources', None)
+        self.remote = getattr(remote, 'data', remote)
+        self.resources = resources
+
+        if filename != ':memory:':
+            filename = os.path.expanduser(filename)
+            folder = os.path.dirname(filename)
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder)
+        self.filename = filename
+        # {token: error} for the tokens that the last `sync` could not save
+        self.errors = {}
+        self.db = sqlite3.connect(filename)
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self._create()
+
+    def _create(self):
+        version = self.db.execute('PRAGMA user_version').fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        with self.db:
+            for table in ('resolutions', 'channels', 'tokens', 'datasets'):
+                self.db.execute('DROP TABLE IF EXISTS {}'.format(table))
+        self.db.executescript(_SCHEMA)
+        self.db.execute('PRAGMA user_version = {}'.format(SCHEMA_VERSION))
+        self.db.commit()
+
+    def close(self):
+        """
+        Close the database.
+
+        Returns:
+            None
+        """
+        self.db.close()
+
+    def __enter__(self):
+        """
+        Use the catalog in a `with` block, closing it at the end.
+        """
+        return self
+
+    def __exit__(self, *exc):
+        """
+        Close the catalog.
+        """
+        self.close()
+
+    # SECTION:
+    # Sync
+
+    def sync(self, refresh=False, max_workers=DEFAULT_WORKERS):
+        """
+        Bring the catalog up to date with the public tokens of the remote.
+        Only tokens that are not yet in the catalog are looked up, several at
+        once; tokens that are no longer public are removed.
+
+        Each token is saved as soon as it is looked up, so an interrupted
+        sync keeps its progress. A token that cannot be looked up is skipped
+        (and tried again by the next sync), and its error kept in `errors`.
+
+        Arguments:
+            refresh (bool : False): Look up every public token again, e.g.
+                to pick up changed channels or bounds
+            max_workers (int : DEFAULT_WORKERS): Tokens to look up at once
+
+        Returns:
+            str[]: The tokens that were looked up and saved, sorted
+
+        Raises:
+            ValueError: If the catalog has no remote
+        """
+        if self.remote is None:
+            raise ValueError("A remote is needed to sync the catalog.")
+
+        tokens = set(self.remote.get_public_tokens())
+        known = set(t for t, in self.db.execute(
+            'SELECT token FROM tokens WHERE public = 1'))
+        if refresh:
+            fetch = tokens
+            get_info = self.remote.get_proj_info
+        else:
+            fetch = tokens - known
+            # The remote may already hold some of them in memory
+            get_info = self.remote.get_cached_proj_info
+
+        def lookup(token):
+            try:
+                info = get_info(token)
+                if 'dataset' not in info:
+                    raise ValueError("Project info has no dataset.")
+            except Exception as e:
+                # A bad token must not stop the others
+                return token, None, e
+            return token, info, None
+
+        with self.db:
+            for token in known - tokens:
+                self.db.execute('DELETE FROM tokens WHERE token = ?',
+                                (token,))
+
+        self.errors = {}
+        saved = []
+        # Results arrive on this thread, which owns the connection
+        for token, info, error in imap_unordered(lookup, sorted(fetch),
+                                                 max_workers=max_workers):
+            if error is not None:
+                self.errors[token] = str(error)
+                continue
+            with self.db:
+                self._insert(token, info, public=True)
+            saved.append(token)
+
+        if self.resources is not None:
+            with self.db:
+                self._insert_datasets(self.resources.list_datasets(True))
+        return sorted(saved)
+
+    def add(self, token, info=None):
+        """
+        Record a token that is not public, such as one of your own.
+
+        Arguments:
+            token (str): The token to record
+            info (dict : None): Its project info. Defaults to looking it up
+                with the remote.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If no info is given and the catalog has no remote
+        """
+        if info is None:
+            if self.remote is None:
+                raise ValueError("A remote is needed to look up " + token)
+            info = self.remote.get_proj_info(token)
+        with self.db:
+            self._insert(token, info, public=False)
+
+    def remove(self, token):
+        """
+        Forget a token.
+
+        Arguments:
+            token (str): The token to forget
+
+        Returns:
+            bool: Whether the token was in the catalog
+        """
+        with self.db:
+            cur = self.db.execute('DELETE FROM tokens WHERE token = ?',
+                                  (token,))
+        return cur.rowcount > 0
+
+    def _insert(self, token, info, public):
+        dataset = info.get('dataset', {})
+        project = info.get('project', {})
+        self.db.execute('DELETE FROM tokens WHERE token = ?', (token,))
+        self.db.execute(
+            'INSERT INTO tokens VALUES (?, ?, ?, ?, ?, ?)',
+            (token, dataset.get('description'), project.get('name'),
+             int(public), time.time(), json.dumps(info)))
+
+        self.db.executemany(
+            'INSERT INTO channels VALUES (?, ?, ?, ?)',
+            [(token, name, c.get('channel_type'), c.get('datatype'))
+             for name, c in info.get('channels', {}).items()])
+
+        offsets = dataset.get('offset', {})
+        rows = []
+        for res, size in dataset.get('imagesize', {}).items():
+            off = offsets.get(res, [0, 0, 0])
+            rows.append((token, int(res),
+                         off[0], off[0] + size[0],
+                         off[1], off[1] + size[1],
+                         off[2], off[2] + size[2]))
+        self.db.executemany(
+            'INSERT INTO resolutions VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def _insert_datasets(self, datasets):
+        self.db.execute('DELETE FROM datasets')
+        self.db.executemany(
+            'INSERT INTO datasets VALUES (?, ?, ?, ?)',
+            [(d.get('dataset_name'), d.get('dataset_description'),
+              d.get('public'), json.dumps(d)) for d in datasets])
+
+    # SECTION:
+    # Queries
+
+    def find(self, dataset=None, channel=None, channel_type=None,
+             datatype=None, resolution=None, bbox=None, public=None):
+        """
+        Find the tokens that match every criterion given.
+
+        Arguments:
+            dataset (str : None): The dataset the project is built on
+            channel (str : None): The name of one of its channels
+            channel_type (str : None): The type of one of its channels (e.g.
+                `neurodata.IMAGE`)
+            datatype (str : None): The datatype of one of its channels (e.g.
+                'uint8'). Matched together with `channel` and `channel_type`,
+                so all three describe the same channel.
+            resolution (int : None): A resolution the project has. If `bbox`
+                is also given, the resolution it is at; otherwise any.
+            bbox (int[6] : None): (x_start, x_stop, y_start, y_stop, z_start,
+                z_stop), a box that lies entirely within the project's bounds
+            public (bool : None): Only public (True) or only added (False)
+                tokens
+
+        Returns:
+            str[]: The tokens, sorted
+        """
+        tables = ['tokens t']
+        where = []
+        args = []
+
+        if dataset is not None:
+            where.append('t.dataset = ?')
+            args.append(dataset)
+        if public is not None:
+            where.append('t.public = ?')
+            args.append(int(public))
+
+        channel_terms = [('c.channel', channel),
+                         ('c.channel_type', channel_type),
+                         ('c.datatype', datatype)]
+        if any(value is not None for _, value in channel_terms):
+            tables.append('JOIN channels c ON c.token = t.token')
+            for column, value in channel_terms:
+                if value is not None:
+                    where.append(column + ' = ?')
+                    args.append(value)
+
+        if resolution is not None or bbox is not None:
+            tables.append('JOIN resolutions r ON r.token = t.token')
+            if resolution is not None:
+                where.append('r.resolution = ?')
+                args.append(int(resolution))
+            if bbox is not None:
+                if len(bbox) != 6:
+                    raise ValueError("bbox must be (x_start, x_stop, y_start, "
+                                     "y_stop, z_start, z_stop).")
+                for i, axis in enumerate('xyz'):
+                    where.append('r.{0}_start <= ? AND r.{0}_stop >= ?'
+                                 .format(axis))
+                    args.extend([int(bbox[2 * i]), int(bbox[2 * i + 1])])
+
+        sql = 'SELECT DISTINCT t.token FROM ' + ' '.join(tables)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY t.token'
+        return [t for t, in self.db.execute(sql, args)]
+
+    def tokens(self):
+        """
+        Get every token in the catalog.
+
+        Returns:
+            str[]: The tokens, sorted
+        """
+        return self.find()
+
+    def datasets_and_tokens(self):
+        """
+        The catalog's answer to `get_public_datasets_and_tokens`: which public
+        tokens rely on each dataset.
+
+        Returns:
+            dict: relating key:dataset to value:[tokens]
+        """
+        datasets = {}
+        for dataset, token in self.db.execute(
+                'SELECT dataset, token FROM tokens WHERE public = 1 '
+                'ORDER BY token'):
+            datasets.setdefault(dataset, []).append(token)
+        return datasets
+
+    def datasets(self):
+        """
+        Get the public datasets recorded from `resources`.
+
+        Returns:
+            dict: relating key:dataset name to value:dataset info
+        """
+        return dict((name, json.loads(info)) for name, info in
+                    self.db.execute('SELECT dataset, info FROM datasets'))
+
+    def channels(self, token):
+        """
+        Get the channels of a token.
+
+        Arguments:
+            token (str): The token to inspect
+
+        Returns:
+            dict: relating key:channel to value:(channel_type, datatype)
+        """
+        return dict((name, (kind, datatype)) for name, kind, datatype in
+                    self.db.execute(
+                        'SELECT channel, channel_type, datatype FROM channels '
+                        'WHERE token = ?', (token,)))
+
+    def bounds(self, token, resolution=0):
+        """
+        Get the bounds of a token's volume.
+
+        Arguments:
+            token (str): The token to inspect
+            resolution (int : 0): The resolution of the bounds
+
+        Returns:
+            (x_start, x_stop, y_start, y_stop, z_start, z_stop): ints
+
+        Raises:
+            KeyError: If the token or resolution is not in the catalog
+        """
+        row = self.db.execute(
+            'SELECT x_start, x_stop, y_start, y_stop, z_start, z_stop '
+            'FROM resolutions WHERE token = ? AND resolution = ?',
+            (token, int(resolution))).fetchone()
+        if row is None:
+            raise KeyError("{} at resolution {} is not in the catalog."
+                           .format(token, resolution))
+        return row
+
+    def info(self, token):
+        """
+        Get the project info of a token, as last synced.
+
+        Arguments:
+            token (str): The token to inspect
+
+        Returns:
+            dict: The project info, as from `get_proj_info`
+
+        Raises:
+            KeyError: If the token is not in the catalog
+        """
+        row = self.db.execute('SELECT info FROM tokens WHERE token = ?',
+                              (token,)).fetchone()
+        if row is None:
+            raise KeyError("{} is not in the catalog.".format(token))
+        return json.loads(row[0])
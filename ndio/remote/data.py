@@ -30,6 +30,9 @@ from .neuroRemote import DEFAULT_PROTOCOL
 from .neuroRemote import DEFAULT_BLOCK_SIZE
 
 from .metadata import metadata
+from ndio.utils.parallel import aligned_blocks, nonempty_blocks
+from ndio.utils.parallel import imap_unordered, DEFAULT_WORKERS
+from ndio.utils.delta import BlockHashStore, hash_block
 
 
 class data(neuroRemote, metadata):
@@ -358,7 +361,12 @@ class data(neuroRemote, metadata):
                     y_start,
                     z_start,
                     data,
-                    resolution=0):
+                    resolution=0,
+                    skip_empty=False,
+                    block_size=None,
+                    sparse_threshold=None,
+                    delta=None,
+                    max_workers=DEFAULT_WORKERS):
         """
         Post a cutout to the server.
 
@@ -370,6 +378,24 @@ class data(neuroRemote, metadata):
             z_start (int)
             data (numpy.ndarray): A numpy array of data. Pass in (x, y, z)
             resolution (int : 0): Resolution at which to insert the data
+            skip_empty (bool : False): Upload the data one cube-aligned block
+                at a time, and skip blocks that are entirely 0. Zeros are
+                therefore not written to those blocks, so only use this where
+                the server holds no data or zeros should not overwrite it
+                (e.g. sparse annotation channels).
+            block_size (int[3] : None): The block size for `skip_empty`.
+                Defaults to the cube size of the dataset.
+            sparse_threshold (float : None): With `skip_empty`, blocks where
+                fewer than this fraction of voxels are nonzero are cropped to
+                the bounding box of their nonzero voxels before upload.
+            delta (str or BlockHashStore : None): Upload the data one
+                cube-aligned block at a time, and skip blocks that have not
+                changed. Pass the filename of a `BlockHashStore` (or the store
+                itself) to compare against the hashes saved by the last delta
+                upload, or 'server' to compare against the data downloaded
+                from the server.
+            max_workers (int : DEFAULT_WORKERS): With `skip_empty` or `delta`,
+                the number of blocks to upload at once
 
         Returns:
             bool: True on success
@@ -381,14 +407,22 @@ class data(neuroRemote, metadata):
         if data.dtype.name != datatype:
             data = data.astype(datatype)
 
-        data = numpy.rollaxis(data, 1)
-        data = numpy.rollaxis(data, 2)
-
         if six.PY3 or data.nbytes > 1.5e9:
             ul_func = self._post_cutout_no_chunking_npz
         else:
             ul_func = self._post_cutout_no_chunking_blosc
 
+        if skip_empty or delta is not None:
+            return self._post_cutout_blocks(token, channel,
+                                            x_start, y_start, z_start,
+                                            data, resolution, ul_func,
+                                            block_size, skip_empty,
+                                            sparse_threshold, delta,
+                                            max_workers)
+
+        data = numpy.rollaxis(data, 1)
+        data = numpy.rollaxis(data, 2)
+
         if data.size < self._chunk_threshold:
             return ul_func(token, channel, x_start,
                            y_start, z_start, data,
@@ -418,6 +452,86 @@ class data(neuroRemote, metadata):
                     resolution)
         return True
 
+    def _post_cutout_blocks(self, token, channel,
+                            x_start, y_start, z_start,
+                            data, resolution, ul_func,
+                            block_size, skip_empty, sparse_threshold,
+                            delta, max_workers):
+        """
+        Accepts data in xyz. Posts one cube-aligned block at a time, leaving
+        out the empty blocks (if `skip_empty`) and the unchanged blocks (if
+        `delta`).
+        """
+        if block_size is None:
+            block_size = self.get_block_size(token, resolution)
+        origin = self.get_image_offset(token, resolution)
+        offset = (x_start, y_start, z_start)
+
+        if skip_empty:
+            blocks = nonempty_blocks(data, offset, block_size, origin)
+        else:
+            blocks = aligned_blocks(x_start, x_start + data.shape[0],
+                                    y_start, y_start + data.shape[1],
+                                    z_start, z_start + data.shape[2],
+                                    block_size, origin)
+
+        store = None
+        if isinstance(delta, six.string_types) and delta != 'server':
+            store = BlockHashStore(delta)
+        elif isinstance(delta, BlockHashStore):
+            store = delta
+
+        def post(b):
+            lo = [b[d][0] - offset[d] for d in range(3)]
+            hi = [b[d][1] - offset[d] for d in range(3)]
+            subvol = data[lo[0]:hi[0], lo[1]:hi[1], lo[2]:hi[2]]
+
+            digest = None
+            if delta is not None:
+                digest = hash_block(subvol)
+                if store is not None:
+                    previous = store.get(token, channel, resolution, b)
+                else:
+                    previous = hash_block(self.get_cutout(
+                        token, channel,
+                        b[0][0], b[0][1], b[1][0], b[1][1], b[2][0], b[2][1],
+                        resolution=resolution).astype(data.dtype))
+                if previous == digest:
+                    return b, digest
+
+            # Cropping leaves the zeros around the nonzero voxels unsent,
+            # which is only safe where zeros are not written anyway.
+            if skip_empty and sparse_threshold is not None:
+                filled = numpy.count_nonzero(subvol)
+                if filled < sparse_threshold * subvol.size:
+                    # Crop to the bounding box of the nonzero voxels.
+                    nz = numpy.nonzero(subvol)
+                    first = [int(i.min()) for i in nz]
+                    last = [int(i.max()) + 1 for i in nz]
+                    subvol = subvol[first[0]:last[0],
+                                    first[1]:last[1],
+                                    first[2]:last[2]]
+                    lo = [i + j for i, j in zip(lo, first)]
+
+            ul_func(token, channel,
+                    lo[0] + offset[0],
+                    lo[1] + offset[1],
+                    lo[2] + offset[2],
+                    numpy.ascontiguousarray(subvol.transpose(2, 1, 0)),
+                    resolution)
+            return b, digest
+
+        try:
+            for b, digest in imap_unordered(post, blocks,
+                                            max_workers=max_workers):
+                if store is not None:
+                    store.set(token, channel, resolution, b, digest)
+        finally:
+            # Keep the hashes of whatever was uploaded, even after a failure.
+            if store is not None:
+                store.save()
+        return True
+
     def _post_cutout_no_chunking_npz(self, token, channel,
                                      x_start, y_start, z_start,
                                      data, resolution):
@@ -1,16 +1,14 @@
 from __future__ import absolute_import
 
-try:
-    # For Python 3:
-    import urllib.request as urllib2
-except ImportError:
-    import urllib2
-
+import requests
+from requests.adapters import HTTPAdapter
 import zipfile
 import tempfile
 import inspect
 import threading
+import time
 import os
+from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED
 
 from .Remote import Remote
 from .errors import *
@@ -21,6 +19,12 @@ DEFAULT_PROTOCOL = "http"
 DEFAULT_EMAIL = ""
 DEFAULT_FIBER_FILE = "fiber.dat"
 
+# The default number of graph jobs to run at once.
+DEFAULT_JOBS = 4
+
+# Seconds to wait before retrying a failed upload. Doubles with each retry.
+RETRY_BACKOFF = 1.0
+
 
 class Invariants:
     """
@@ -70,6 +74,134 @@ class GraphFormats:
     ]
 
 
+class _TransientUploadError(RemoteDataUploadError):
+    """
+    An upload that failed in a way worth retrying: the connection broke or
+    the server answered with a 5xx error.
+    """
+
+
+class JobManager(object):
+    """
+    Runs graph jobs in a bounded pool of threads. Each job is returned as a
+    `concurrent.futures.Future`, so its result (or exception) is never lost,
+    and all of them can be waited on or cancelled together.
+    """
+
+    def __init__(self, max_workers=DEFAULT_JOBS, retries=2):
+        """
+        Initialize a new JobManager.
+
+        Arguments:
+            max_workers (int : DEFAULT_JOBS): The most jobs to run at once
+            retries (int : 2): The times to retry a job whose upload failed
+                for lack of a connection or with a server (5xx) error, with
+                exponential backoff. Other failures are never retried.
+        """
+        self.retries = retries
+        self.jobs = []
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        """
+        Use the manager in a `with` block, shutting it down at the end.
+        """
+        return self
+
+    def __exit__(self, *args):
+        """
+        Wait for the jobs to finish, then shut down the pool.
+        """
+        self.shutdown()
+
+    def submit(self, name, function, *args):
+        """
+        Run a job in the background.
+
+        Arguments:
+            name (str): A name for the job, to tell it apart in `failures`
+            function (function): The job
+            *args: The arguments of `function`
+
+        Returns:
+            concurrent.futures.Future: The job's result. Its `name` attribute
+                holds `name`.
+        """
+        future = self._pool.submit(self._run, function, args)
+        future.name = name
+        with self._lock:
+            self.jobs.append(future)
+        return future
+
+    def _run(self, function, args):
+        for attempt in range(self.retries + 1):
+            try:
+                return function(*args)
+            except _TransientUploadError:
+                if attempt == self.retries:
+                    raise
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    def wait(self, timeout=None):
+        """
+        Wait for every job submitted so far to finish.
+
+        Arguments:
+            timeout (float : None): The most seconds to wait
+
+        Returns:
+            bool: True if every job finished
+        """
+        with self._lock:
+            jobs = list(self.jobs)
+        done, pending = wait(jobs, timeout=timeout, return_when=ALL_COMPLETED)
+        return len(pending) == 0
+
+    def results(self):
+        """
+        Get the result of every job that finished successfully.
+
+        Returns:
+            [(str, object)]: (name, result) for each, in submission order
+        """
+        return [(f.name, f.result()) for f in self._finished()
+                if f.exception() is None]
+
+    def failures(self):
+        """
+        Get the exception of every job that failed.
+
+        Returns:
+            [(str, Exception)]: (name, exception) for each, in submission order
+        """
+        return [(f.name, f.exception()) for f in self._finished()
+                if f.exception() is not None]
+
+    def _finished(self):
+        with self._lock:
+            return [f for f in self.jobs if f.done() and not f.cancelled()]
+
+    def cancel(self):
+        """
+        Cancel every job that has not started yet.
+
+        Returns:
+            int: The number of jobs cancelled
+        """
+        with self._lock:
+            return sum(1 for f in self.jobs if f.cancel())
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting jobs, and free the threads once the jobs finish.
+
+        Arguments:
+            wait (bool : True): Whether to wait for the running jobs
+        """
+        self._pool.shutdown(wait=wait)
+
+
 class grute(Remote):
     """
     The grute remote, for interfacing with ndgrutedb (NeuroData.io)
@@ -81,7 +213,10 @@ class grute(Remote):
     def __init__(self,
                  hostname=DEFAULT_HOSTNAME,
                  protocol=DEFAULT_PROTOCOL,
-                 email=DEFAULT_EMAIL):
+                 email=DEFAULT_EMAIL,
+                 max_jobs=DEFAULT_JOBS,
+                 retries=2,
+                 compress=False):
         """
         Initialize a new grute remote.
 
@@ -91,9 +226,23 @@ class grute(Remote):
             email (str: ""): The email to which completion notifications should
                 be sent (unless overridden in individual calls). Note that the
                 completion URLs are also accessible via this Python API.
+            max_jobs (int: DEFAULT_JOBS): The most calls with
+                `use_threads=True` to run at once. The rest wait their turn.
+            retries (int: 2): The times to retry a threaded call whose upload
+                fails for lack of a connection or with a server (5xx) error
+            compress (bool: False): Whether to deflate files as they are
+                zipped for upload. Worth it for text formats (e.g. graphml);
+                binary fiber files barely shrink.
         """
         super(grute, self).__init__(hostname, protocol)
         self.email = email
+        self.compress = compress
+        self.jobs = JobManager(max_jobs, retries)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_jobs,
+                              pool_maxsize=max_jobs)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def __repr__(self):
         """
@@ -171,16 +320,18 @@ class grute(Remote):
                 MRI Studio .dat file
             atlas_file (str: None)*: A local atlas file, in NIFTI .nii format.
                 If none is specified, the Desikan atlas is used by default.
-            use_threads (bool: False)*: Whether to run the download in a Python
-                thread. If set to True, the call to `build_graph` will end
-                quickly, and the `callback` will be called with the returned
-                status-code of the restful call as its only argument.
+            use_threads (bool: False)*: Whether to run the download in the
+                background, with `self.jobs`. If set to True, the call to
+                `build_graph` will end quickly, and the `callback` will be
+                called with the response body of the restful call as its
+                only argument.
             callback (function: None)*: The function to run upon completion of
                 the call, if using threads. (Will not be called if use_threads
                 is set to False.)
 
         Returns:
-            HTTP Response if use_threads is False. Otherwise, None
+            HTTP Response if use_threads is False. Otherwise, a Future of the
+                job (see JobManager)
 
         Raises:
             ValueError: When the supplied values are invalid (contain invalid
@@ -195,10 +346,7 @@ class grute(Remote):
             raise ValueError("Invariants must be a subset of Invariants.ALL.")
 
         if use_threads and callback is not None:
-            if not hasattr(callback, '__call__'):
-                raise ValueError("callback must be a function.")
-            if len(inspect.getargspec(callback).args) != 1:
-                raise ValueError("callback must take exactly 1 argument.")
+            _check_callback(callback)
 
         # Once we get here, we know the callback is
         if size not in [self.BIG, self.SMALL]:
@@ -220,44 +368,21 @@ class grute(Remote):
 
         if use_threads:
             # Run in the background.
-            download_thread = threading.Thread(
-                target=self._run_build_graph,
-                args=[url, fiber_file, atlas_file, callback]
-            )
-            download_thread.start()
+            return self.jobs.submit(url, self._run_build_graph,
+                                    url, fiber_file, atlas_file, callback)
         else:
             # Run in the foreground.
             return self._run_build_graph(url, fiber_file, atlas_file)
-        return
 
     def _run_build_graph(self, url,
                          fiber_file, atlas_file=None, callback=None):
-
-        try:
-            tmpfile = tempfile.NamedTemporaryFile()
-            zfile = zipfile.ZipFile(tmpfile.name, "w", allowZip64=True)
-            zfile.write(file_file)
-            if atlas_file:
-                zfile.write(atlas_file)
-                zfile.close()
-                tmpfile.flush()
-                tmpfile.seek(0)
-        except:
-            raise ValueError("Invalid atlas or fiber file. I don't have " +
-                             "any more information than that, sorry!")
-
-        try:
-            req = urllib2.Request(self.url(url), tmpfile.read())
-            response = urllib2.urlopen(req)
-
-            if callback is not None:
-                callback(response)
-            else:
-                # TODO: Download from the response.read() URL instead of
-                #       returning the http uri itself
-                return response.read()
-        except:
-            raise RemoteDataUploadError("Failed to upload data at " + url)
+        files = [fiber_file]
+        if atlas_file:
+            files.append(atlas_file)
+        return self._upload(url, files, callback,
+                            "Invalid atlas or fiber file. I don't have " +
+                            "any more information than that, sorry!",
+                            "Failed to upload data at " + url)
 
     def compute_invariants(self, graph_file, input_format,
                            invariants=Invariants.ALL, email=None,
@@ -272,15 +397,16 @@ class grute(Remote):
             invariants (str[]: Invariants.ALL)*: An array of grute.Invariants
                 to compute on the graph
             email (str: self.email)*: The email to notify upon completion
-            use_threads (bool: False)*: Whether to use Python threads to run
-                computation in the background when waiting for the server to
+            use_threads (bool: False)*: Whether to run the upload in the
+                background, with `self.jobs`, when waiting for the server to
                 return the invariants
             callback (function: None)*: The function to run upon completion of
                 the call, if using threads. (Will not be called if use_threads
                 is set to False.)
 
         Returns:
-            HTTP Response if use_threads is False. Otherwise, None
+            HTTP Response if use_threads is False. Otherwise, a Future of the
+                job (see JobManager)
 
         Raises:
             ValueError: If the graph file does not exist, or if there are
@@ -298,10 +424,7 @@ class grute(Remote):
             raise ValueError("Invariants must be a subset of Invariants.ALL.")
 
         if use_threads and callback is not None:
-            if not hasattr(callback, '__call__'):
-                raise ValueError("callback must be a function.")
-            if len(inspect.getargspec(callback).args) != 1:
-                raise ValueError("callback must take exactly 1 argument.")
+            _check_callback(callback)
 
         url = "graphupload/{}/{}/{}/".format(
             email,
@@ -317,41 +440,17 @@ class grute(Remote):
 
         if use_threads:
             # Run in the background.
-            upload_thread = threading.Thread(
-                target=self._run_compute_invariants,
-                args=[url, graph_file, callback]
-            )
-            upload_thread.start()
-
+            return self.jobs.submit(graph_file, self._run_compute_invariants,
+                                    url, graph_file, callback)
         else:
             # Run in the foreground.
             return self._run_compute_invariants(url, graph_file)
-        return
 
     def _run_compute_invariants(self, url, graph_file, callback=None):
-        try:
-            tmpfile = tempfile.NamedTemporaryFile()
-            zfile = zipfile.ZipFile(tmpfile.name, "w", allowZip64=True)
-            zfile.write(graph_file)
-            zfile.close()
-            tmpfile.flush()
-            tmpfile.seek(0)
-        except:
-            raise ValueError("Unable to zip graph file for upload.")
-
-        try:
-            req = urllib2.Request(self.url(url), tmpfile.read())
-            response = urllib2.urlopen(req)
-
-            if callback is not None:
-                callback(response.read())
-            else:
-                # TODO: Download from the response.read() URL instead of
-                #       returning the http uri itself
-                return response.read()
-        except:
-            raise RemoteDataUploadError("Failed to upload graph file. Try " +
-                                        "troubleshooting with a ping()?")
+        return self._upload(url, [graph_file], callback,
+                            "Unable to zip graph file for upload.",
+                            "Failed to upload graph file. Try " +
+                            "troubleshooting with a ping()?")
 
     def convert_graph(self, graph_file, input_format, output_formats,
                       email=None, use_threads=False, callback=None):
@@ -363,14 +462,15 @@ class grute(Remote):
             input_format (str): A grute.GraphFormats
             output_formats (str[]): A grute.GraphFormats
             email (str: self.email)*: The email to notify
-            use_threads (bool: False)*: Whether to use Python threads to run
-                computation in the background when waiting for the server
+            use_threads (bool: False)*: Whether to run the upload in the
+                background, with `self.jobs`, when waiting for the server
             callback (function: None)*: The function to run upon completion of
                 the call, if using threads. (Will not be called if use_threads
                 is set to False.)
 
         Returns:
-            HTTP Response if use_threads=False. Else, no return value.
+            HTTP Response if use_threads=False. Otherwise, a Future of the
+                job (see JobManager)
 
         Raises:
             RemoteDataUploadError: If there's an issue uploading the data
@@ -387,10 +487,7 @@ class grute(Remote):
             raise ValueError("Output formats must be a GraphFormats.")
 
         if use_threads and callback is not None:
-            if not hasattr(callback, '__call__'):
-                raise ValueError("callback must be a function.")
-            if len(inspect.getargspec(callback).args) != 1:
-                raise ValueError("callback must take exactly 1 argument.")
+            _check_callback(callback)
 
         if not (os.path.exists(graph_file)):
             raise ValueError("No such file, {}!".format(graph_file))
@@ -406,38 +503,83 @@ class grute(Remote):
 
         if use_threads:
             # Run in the background.
-            convert_thread = threading.Thread(
-                target=self._run_convert_graph,
-                args=[url, graph_file, callback]
-            )
-            convert_thread.start()
+            return self.jobs.submit(graph_file, self._run_convert_graph,
+                                    url, graph_file, callback)
         else:
             # Run in the foreground.
             return self._run_convert_graph(url, graph_file)
-        return
 
     def _run_convert_graph(self, url, graph_file, callback=None):
+        return self._upload(url, [graph_file], callback,
+                            "Unable to zip graph file for upload.",
+                            "Failed to upload graph file. Try " +
+                            "troubleshooting with a ping()?")
+
+    def _upload(self, url, files, callback, zip_error, upload_error):
+        """
+        Zip files into a temporary file on disk, and stream it to a graph
+        services endpoint. Neither the files nor the archive are ever held
+        in memory whole, whatever their size. The archive is posted as a
+        file, so the request carries a Content-Length rather than being
+        chunked, which many WSGI servers refuse.
+
+        Arguments:
+            url (str): The endpoint, relative to `self.url()`
+            files (str[]): The files to upload
+            callback (function): Called with the response body, if not None
+            zip_error (str): The message if the files cannot be zipped
+            upload_error (str): The message if the upload fails
 
-        try:
-            tmpfile = tempfile.NamedTemporaryFile()
-            zfile = zipfile.ZipFile(tmpfile.name, "w", allowZip64=True)
-            zfile.write(graph_file)
-            zfile.close()
-            tmpfile.flush()
-            tmpfile.seek(0)
-        except:
-            raise ValueError("Unable to zip graph file for upload.")
-
-        try:
-            req = urllib2.Request(self.url(url), tmpfile.read())
-            response = urllib2.urlopen(req)
-
-            if callback is not None:
-                callback(response.read())
-            else:
-                # TODO: Download from the response.read() URL instead of
-                #       returning the http uri itself
-                return response.read()
-        except:
-            raise RemoteDataUploadError("Failed to upload graph file. Try " +
-                                        "troubleshooting with a ping()?")
+        Returns:
+            str: The response body
+
+        Raises:
+            ValueError: If the files cannot be zipped
+            RemoteDataUploadError: If the upload fails
+        """
+        with tempfile.TemporaryFile() as tmpfile:
+            try:
+                compression = zipfile.ZIP_STORED
+                if self.compress:
+                    compression = zipfile.ZIP_DEFLATED
+                zfile = zipfile.ZipFile(tmpfile, "w", compression,
+                                        allowZip64=True)
+                for f in files:
+                    zfile.write(f)
+                zfile.close()
+                tmpfile.flush()
+                tmpfile.seek(0)
+            except (IOError, OSError, zipfile.BadZipfile):
+                raise ValueError(zip_error)
+
+            try:
+                response = self.session.post(
+                    self.url(url), data=tmpfile)
+            except requests.exceptions.RequestException:
+                raise _TransientUploadError(upload_error)
+            if response.status_code >= 500:
+                raise _TransientUploadError("{} (Error {})".format(
+                    upload_error, response.status_code))
+            if response.status_code >= 300:
+                raise RemoteDataUploadError("{} (Error {})".format(
+                    upload_error, response.status_code))
+
+        if callback is not None:
+            callback(response.content)
+        return response.content
+
+
+def _check_callback(callback):
+    """
+    Raise ValueError unless `callback` is a function of one argument.
+    """
+    if not hasattr(callback, '__call__'):
+        raise ValueError("callback must be a function.")
+    if hasattr(inspect, 'getfullargspec'):
+        args = inspect.getfullargspec(callback).args
+    else:
+        args = inspect.getargspec(callback).args
+    if inspect.ismethod(callback):
+        args = args[1:]
+    if len(args) != 1:
+        raise ValueError("callback must take exactly 1 argument.")
@@ -17,6 +17,9 @@ from six.moves import range
 import six
 
 from functools import wraps
+import threading
+
+from ndio.utils.parallel import DEFAULT_WORKERS, imap_unordered
 
 try:
     import urllib.request as urllib2
@@ -29,6 +32,9 @@ class metadata():
     Metadata helper class.
     """
 
+    # Guards the creation of the proj_info cache, which is shared by threads
+    _cache_lock = threading.Lock()
+
     def __init__(self,
                  user_token):
         """
@@ -54,35 +60,54 @@ class metadata():
         r = self.remote_utils.get_url(self.url() + "public_tokens/")
         return r.json()
 
-    def get_public_datasets(self):
+    def get_public_datasets(self, max_workers=DEFAULT_WORKERS, refresh=False):
         """
-        NOTE: VERY SLOW!
+        NOTE: SLOW the first time; see get_public_datasets_and_tokens.
         Get a list of public datasets. Different than public tokens!
 
         Arguments:
-            None
+            max_workers (int : DEFAULT_WORKERS): Tokens to look up at once
+            refresh (bool : False): Look up every token again, instead of
+                only those not seen before
 
         Returns:
             str[]: list of public datasets
         """
-        return list(self.get_public_datasets_and_tokens().keys())
+        return list(self.get_public_datasets_and_tokens(max_workers,
+                                                        refresh).keys())
 
-    def get_public_datasets_and_tokens(self):
+    def get_public_datasets_and_tokens(self, max_workers=DEFAULT_WORKERS,
+                                       refresh=False):
         """
-        NOTE: VERY SLOW!
+        NOTE: SLOW the first time!
         Get a dictionary relating key:dataset to value:[tokens] that rely
         on that dataset.
 
+        The project info of every public token is fetched concurrently, and
+        kept in the proj_info cache. Later calls only fetch the tokens that
+        have become public since, unless `refresh` is set.
+
         Arguments:
-            None
+            max_workers (int : DEFAULT_WORKERS): Tokens to look up at once
+            refresh (bool : False): Look up every token again, instead of
+                only those not seen before
 
         Returns:
             dict: relating key:dataset to value:[tokens]
         """
-        datasets = {}
         tokens = self.get_public_tokens()
+        cache = self._get_proj_info_cache()
+        if refresh:
+            missing = tokens
+        else:
+            missing = [t for t in tokens if t not in cache]
+        for _ in imap_unordered(self.get_proj_info, missing,
+                                max_workers=max_workers):
+            pass
+
+        datasets = {}
         for t in tokens:
-            dataset = self.get_token_dataset(t)
+            dataset = cache[t]['dataset']['description']
             if dataset in datasets:
                 datasets[dataset].append(t)
             else:
@@ -103,7 +128,8 @@ class metadata():
 
     def get_proj_info(self, token):
         """
-        Return the project info for a given token.
+        Return the project info for a given token. The result is also kept in
+        the proj_info cache (see `get_cached_proj_info`).
 
         Arguments:
             token (str): Token to return information for
@@ -112,7 +138,42 @@ class metadata():
             JSON: representation of proj_info
         """
         r = self.remote_utils.get_url(self.url() + "{}/info/".format(token))
-        return r.json()
+        info = r.json()
+        self._get_proj_info_cache()[token] = info
+        return info
+
+    def get_cached_proj_info(self, token):
+        """
+        Return the project info for a given token, fetching it only if it has
+        not been fetched before by this remote.
+
+        Arguments:
+            token (str): Token to return information for
+
+        Returns:
+            JSON: representation of proj_info
+        """
+        info = self._get_proj_info_cache().get(token)
+        if info is None:
+            info = self.get_proj_info(token)
+        return info
+
+    def clear_proj_info_cache(self):
+        """
+        Forget every cached project info.
+
+        Returns:
+            None
+        """
+        self._get_proj_info_cache().clear()
+
+    def _get_proj_info_cache(self):
+        # metadata.__init__ does not run when it is mixed into `data`, so the
+        # cache is created on first use.
+        with self._cache_lock:
+            if not hasattr(self, '_proj_info_cache'):
+                self._proj_info_cache = {}
+            return self._proj_info_cache
 
     def get_metadata(self, token):
         """
@@ -4,15 +4,28 @@ import os
 import requests
 from jsonspec.validators import load
 import re
-import shutil
+import glob
+import hashlib
+import threading
+import six
 from .neurodata import neurodata as nd
+from ndio.utils.parallel import DEFAULT_WORKERS, imap_unordered, block_edges
+from ndio.utils.delta import BlockHashStore
+from ndio.convert.probe import probe, probe_url
 import ndio.convert.tiff as ndtiff
 import ndio.convert.png as ndpng
 import numpy as np
+from io import BytesIO
+from PIL import Image
+import tifffile
 
 VERIFY_BY_FOLDER = 'Folder'
 VERIFY_BY_SLICE = 'Slice'
 
+# Slices are fetched from the data host, not from neurodata: keep the
+# shared session from sending it the user's token.
+_NO_AUTH = {'Authorization': None}
+
 # schema base
 SCHEMA_BASE = "https://" + "/".join([
     "raw.githubusercontent.com",
@@ -45,6 +58,9 @@ class NDIngest:
         else:
             self.oo = nd()
 
+        # Reuse the remote's pooled connections to check slices
+        self.session = self.oo.remote_utils.session
+
         rd = requests.get('{}/dataset_schema.json'.format(SCHEMA_BASE))
         if (rd.status_code < 300):
             self.DATASET_SCHEMA = load(eval(str(rd.text)))
@@ -278,137 +294,237 @@ class NDIngest:
 
     def identify_imagesize(self, image_type, image_path='/tmp/img.'):
         """
-        Identify the image size using the data location and other parameters
+        Identify the image size of a local slice from its header, without
+        decoding it.
+
+        Arguments:
+            image_type (str): 'png', 'tif' or 'tiff'
+            image_path (str : '/tmp/img.'): The filename, without the
+                extension
+
+        Returns:
+            tuple: (width, height), or (width, height, pages) for a TIFF stack
+
+        Raises:
+            OSError: If the file cannot be read as a slice of that type
         """
-        dims = ()
         try:
-            if (image_type.lower() == 'png'):
-                dims = np.shape(ndpng.load('{}{}'.format(
-                    image_path, image_type
-                )))
-            elif (image_type.lower() == 'tif' or image_type.lower() == 'tiff'):
-                dims = np.shape(ndtiff.load('{}{}'.format(
-                    image_path, image_type
-                )))
-            else:
+            if image_type.lower() not in ('png', 'tif', 'tiff'):
                 raise ValueError("Unsupported image type.")
-        except:
+            info = probe('{}{}'.format(image_path, image_type))
+        except (IOError, OSError, ValueError):
             raise OSError('The file was not accessible at {}{}'.format(
                 image_path,
                 image_type
             ))
-        return dims[::-1]
+        if info.pages > 1:
+            return (info.width, info.height, info.pages)
+        return (info.width, info.height)
 
-    def verify_path(self, data, verifytype):
+    def verify_path(self, data, verifytype, max_workers=DEFAULT_WORKERS):
         """
-        Verify the path supplied.
+        Verify that the data of every channel (and every timepoint of a
+        timeseries) is http accessible, and, when verifying by slice, that the
+        first slice is the size given in the dataset. All paths are checked
+        concurrently, and only the header of each slice is downloaded.
+
+        Arguments:
+            data (dict): The ingest JSON, as made by `nd_json`
+            verifytype (enum): VERIFY_BY_FOLDER or VERIFY_BY_SLICE. Channels
+                stored on s3 are always verified by slice.
+            max_workers (int : DEFAULT_WORKERS): Paths to check at once
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If a path is not accessible
+            ValueError: If a slice is not the size given in the dataset
+            TypeError: If `verifytype` is not a verify method
+        """
+        tasks = self._verify_tasks(data, verifytype)
+        for _ in imap_unordered(self._verify_one, tasks,
+                                max_workers=max_workers):
+            pass
+
+    def _channel_folders(self, data):
+        """
+        Get the folder of every channel and timepoint of an ingest.
+
+        Returns:
+            [(channel_name, channel, [folder, ...]), ...]
         """
-        # Insert try and catch blocks
         try:
             token_name = data["project"]["token_name"]
-        except:
+        except KeyError:
             token_name = data["project"]["project_name"]
 
-        channel_names = list(data["channels"].copy().keys())
-        imgsz = data['dataset']['imagesize']
-
-        for i in range(0, len(channel_names)):
-            channel_type = data["channels"][
-                channel_names[i]]["channel_type"]
-            path = data["channels"][channel_names[i]]["data_url"]
-            aws_pattern = re.compile("^(http:\/\/)(.+)(\.s3\.amazonaws\.com)")
-            file_type = data["channels"][channel_names[i]]["file_type"]
-            if "offset" in data["dataset"]:
-                offset = data["dataset"]["offset"][0]
-            else:
-                offset = 0
-
-            if (aws_pattern.match(path)):
-                verifytype = VERIFY_BY_SLICE
-
-            if (channel_type == "timeseries"):
+        channels = []
+        for channel_name, channel in sorted(data["channels"].items()):
+            path = channel["data_url"]
+            if (channel["channel_type"] == "timeseries"):
                 timerange = data["dataset"]["timerange"]
-                try:
-                    assert(timerange[0] != timerange[1])
-                except AssertionError:
+                if timerange[0] == timerange[1]:
                     raise ValueError('Timeseries values are the same, did you\
-specify the time steps?')
-                for j in range(timerange[0], timerange[1] + 1):
-                    # Test for tifs or such? Currently test for just not
-                    # empty
-                    if (verifytype == VERIFY_BY_FOLDER):
-                        work_path = "{}/{}/{}/time{}/".format(
-                            path, token_name, channel_names[i], ("%04d" % j))
-                    elif (verifytype == VERIFY_BY_SLICE):
-                        work_path = "{}/{}/{}/time{}/{}.{}".format(
-                            path, token_name, channel_names[i], ("%04d" % j),
-                            ("%04d" % offset), file_type)
-                    else:
-                        raise TypeError('Incorrect verify method')
-                    # Check for accessibility
-                    try:
-                        if (verifytype == VERIFY_BY_FOLDER):
-                            resp = requests.head(work_path)
-                            assert(resp.status_code == 200)
-                        elif (verifytype == VERIFY_BY_SLICE):
-                            resp = requests.get(
-                                work_path, stream=True, verify=False)
-                            with open('/tmp/img.{}'.format(file_type),
-                                      'wb') as out_file:
-                                shutil.copyfileobj(resp.raw, out_file)
-                            out_file.close()
-                            assert(resp.status_code == 200)
-                            resp.close()
-                    except AssertionError:
-                        raise OSError('Files are not http accessible: \
-                            Error: {}, Path: {}'.format(resp.status_code,
-                                                        work_path))
-                    # Attempt to Verify imagesize here
-
-                    try:
-                        if (verifytype == VERIFY_BY_SLICE):
-                            assert(list(self.identify_imagesize(file_type)) ==
-                                   imgsz[0:2])
-                    except:
-                        raise ValueError('File image size does not match\
-provided image size.')
-
+ specify the time steps?')
+                folders = ["{}/{}/{}/time{}/".format(
+                    path, token_name, channel_name, ("%04d" % j))
+                    for j in range(timerange[0], timerange[1] + 1)]
             else:
-                # Test for tifs or such? Currently test for just not empty
-                if (verifytype == VERIFY_BY_FOLDER):
-                    work_path = "{}/{}/{}/".format(
-                        path, token_name, channel_names[i])
-                elif (verifytype == VERIFY_BY_SLICE):
-                    work_path = "{}/{}/{}/{}.{}".format(
-                        path, token_name, channel_names[i],
-                        ("%04d" % offset), file_type)
+                folders = ["{}/{}/{}/".format(path, token_name, channel_name)]
+            channels.append((channel_name, channel, folders))
+        return channels
+
+    def _verify_tasks(self, data, verifytype):
+        """
+        Get a (work_path, verifytype, file_type, imagesize) tuple for every
+        path `verify_path` checks.
+        """
+        imgsz = data['dataset']['imagesize']
+        offset = _z_offset(data)
+        aws_pattern = re.compile(r"^(http://)(.+)(\.s3\.amazonaws\.com)")
+
+        tasks = []
+        for channel_name, channel, folders in self._channel_folders(data):
+            file_type = channel["file_type"]
+            channel_verifytype = verifytype
+            if (aws_pattern.match(channel["data_url"])):
+                channel_verifytype = VERIFY_BY_SLICE
+
+            for folder in folders:
+                if (channel_verifytype == VERIFY_BY_FOLDER):
+                    work_path = folder
+                elif (channel_verifytype == VERIFY_BY_SLICE):
+                    work_path = "{}{}.{}".format(folder, ("%04d" % offset),
+                                                 file_type)
                 else:
                     raise TypeError('Incorrect verify method')
-                # Check for accessibility
-                if (verifytype == VERIFY_BY_FOLDER):
-                    resp = requests.head(work_path)
-                elif (verifytype == VERIFY_BY_SLICE):
-                    resp = requests.get(work_path, stream=True, verify=False)
-                    with open('/tmp/img.{}'.format(file_type),
-                              'wb') as out_file:
-                        shutil.copyfileobj(resp.raw, out_file)
-                    out_file.close()
-                    resp.close()
-                if (resp.status_code >= 300):
-                    raise OSError('Files are not http accessible: \
-                            Error: {}, Path: {}'.format(resp.status_code,
-                                                        work_path))
-                # Attempt to Verify imagesize here
-
-                try:
-                    if (verifytype == VERIFY_BY_SLICE):
-                        assert(list(self.identify_imagesize(file_type)) ==
-                               imgsz[0:2])
-                except:
-                    raise ValueError('File image size does not match\
-provided image size.')
-
-            # By Here the path should have been verified
+                tasks.append((work_path, channel_verifytype, file_type, imgsz))
+        return tasks
+
+    def _verify_one(self, task):
+        """
+        Check one path of `verify_path`. Safe to call from many threads: each
+        call reads its own header.
+        """
+        work_path, verifytype, file_type, imgsz = task
+        if (verifytype == VERIFY_BY_FOLDER):
+            resp = self.session.head(work_path, headers=_NO_AUTH)
+            resp.close()
+            if (resp.status_code >= 300):
+                raise OSError('Files are not http accessible: \
+Error: {}, Path: {}'.format(resp.status_code, work_path))
+            return
+
+        try:
+            info = probe_url(work_path, self.session, count_pages=False,
+                             headers=_NO_AUTH)
+        except (IOError, OSError) as e:
+            raise OSError('Files are not http accessible: {}'.format(e))
+        except ValueError:
+            info = None
+        if info is None or [info.width, info.height] != list(imgsz[0:2]):
+            raise ValueError('File image size does not match provided image\
+ size. Path: {}'.format(work_path))
+
+    def validate(self, data=None, max_workers=DEFAULT_WORKERS,
+                 samples=8, sample_stride=4):
+        """
+        Check every slice of every channel and timepoint before ingest: that
+        it exists, and that its header gives the dataset's image size and the
+        channel's datatype. Only headers are downloaded, except for `samples`
+        slices per channel, which are decoded to summarize their intensities.
+
+        Arguments:
+            data (dict : None): The ingest JSON. Defaults to this ingest's.
+            max_workers (int : DEFAULT_WORKERS): Slices to check at once
+            samples (int : 8): Slices per channel to decode for statistics.
+                They are spread evenly through the channel.
+            sample_stride (int : 4): Use every `sample_stride`th pixel of a
+                sampled slice in x and y. This only thins the statistics:
+                sampled slices are still downloaded and decoded whole, so
+                use fewer `samples` to download less.
+
+        Returns:
+            IngestReport
+        """
+        if data is None:
+            data = json.loads(self.nd_json(
+                self.dataset, self.project, self.channels, self.metadata))
+
+        report = IngestReport()
+        tasks = self._validate_tasks(data, samples, sample_stride, report)
+        for result in imap_unordered(self._validate_one, tasks,
+                                     max_workers=max_workers):
+            report.add(*result)
+        return report
+
+    def _validate_tasks(self, data, samples, sample_stride, report):
+        """
+        Get a task for `_validate_one` for every slice of an ingest, and
+        register the number of slices of each channel with `report`.
+        """
+        imgsz = data['dataset']['imagesize']
+        z_offset = _z_offset(data)
+
+        tasks = []
+        for channel_name, channel, folders in self._channel_folders(data):
+            paths = ["{}{}.{}".format(folder, ("%04d" % z),
+                                      channel["file_type"])
+                     for folder in folders
+                     for z in range(z_offset, z_offset + imgsz[2])]
+            report.expect(channel_name, len(paths))
+            sampled = set(np.linspace(0, len(paths) - 1,
+                                      min(samples, len(paths))).astype(int))
+            for i, path in enumerate(paths):
+                tasks.append((channel_name, path, imgsz[0:2],
+                              channel["datatype"],
+                              sample_stride if i in sampled else None))
+        return tasks
+
+    def _validate_one(self, task):
+        """
+        Check one slice of `validate`.
+
+        Returns:
+            (channel_name, path, error, sample): `error` is a message or None,
+                and `sample` the sampled pixels or None
+        """
+        channel_name, path, imgsz, datatype, stride = task
+        try:
+            info = probe_url(path, self.session, count_pages=False,
+                             headers=_NO_AUTH)
+        except (IOError, OSError) as e:
+            return channel_name, path, 'Not accessible: {}'.format(e), None
+        except ValueError as e:
+            return channel_name, path, 'Unreadable: {}'.format(e), None
+
+        if [info.width, info.height] != list(imgsz):
+            return channel_name, path, 'Image size is {}x{}, not {}x{}'.format(
+                info.width, info.height, imgsz[0], imgsz[1]), None
+        # RGBA slices of 8-bit samples fill a uint32 channel
+        rgba = datatype == 'uint32' and info.dtype == 'uint8' and \
+            info.samples in (3, 4)
+        if info.dtype != datatype and not rgba:
+            return channel_name, path, 'Datatype is {}, not {}'.format(
+                info.dtype, datatype), None
+
+        sample = None
+        if stride is not None:
+            try:
+                resp = self.session.get(path, headers=_NO_AUTH)
+            except requests.exceptions.RequestException as e:
+                return channel_name, path, 'Not accessible: {}'.format(e), None
+            if (resp.status_code >= 300):
+                return channel_name, path, 'Not accessible: Error: {}'.format(
+                    resp.status_code), None
+            try:
+                sample = _decode(resp.content, info.format)
+            except Exception as e:
+                # PIL and tifffile raise many types for corrupt images
+                return channel_name, path, 'Undecodable: {}'.format(e), None
+            sample = sample[::stride, ::stride]
+        return channel_name, path, None, sample
 
     # def verify_json(self, data):
         # """
@@ -465,7 +581,7 @@ provided image size.')
 ".format(response.status_code))
 
     def post_data(self, file_name=None, legacy=False,
-                  verifytype=VERIFY_BY_SLICE):
+                  verifytype=VERIFY_BY_SLICE, validate=False):
         """
         Arguments:
             file_name (str): The file name of the json file to post (optional).
@@ -477,9 +593,14 @@ provided image size.')
                 first slice is accessible or by checking channel folder.
                 NOTE: If verification occurs by folder there is NO image size
                 or type verification. Enum: [Folder, Slice]
+            validate (bool : False): Check every slice with `validate` first,
+                and do not post if any fails
 
         Returns:
             None
+
+        Raises:
+            ValueError: If `validate` finds a bad slice
         """
         if (file_name is None):
             complete_example = (
@@ -493,10 +614,106 @@ provided image size.')
             except:
                 raise OSError("Error opening file")
 
+        if validate:
+            report = self.validate(data)
+            if not report.ok:
+                raise ValueError('Ingest is not valid:\n{}'.format(report))
+
         # self.verify_path(data, verifytype)
         # self.verify_json(data)
         self.put_data(data)
 
+    def post_local(self, token, channel, filenames,
+                   x_start=0, y_start=0, z_start=None,
+                   resolution=0,
+                   slab_depth=None,
+                   skip_empty=True,
+                   checkpoint=None,
+                   max_workers=DEFAULT_WORKERS,
+                   max_slabs=2):
+        """
+        Ingest a local stack of TIFF or PNG slices by uploading it directly,
+        for data that cannot be served over HTTP for `post_data`. The token
+        and channel must already exist.
+
+        The stack is read and uploaded in cube-aligned z-slabs. The slices of
+        a slab are read concurrently, and its blocks are uploaded
+        concurrently with `post_cutout`. Up to `max_slabs` slabs are in
+        flight at once, so reading one overlaps uploading another.
+
+        Arguments:
+            token (str): The token to upload to
+            channel (str): The channel to upload to
+            filenames (str or str[]): The slices in z order, or a glob pattern
+                for them (sorted alphabetically, so 0-pad the numbers)
+            x_start (int : 0): The x coordinate of the slices' first pixel
+            y_start (int : 0): The y coordinate of the slices' first pixel
+            z_start (int : None): The z coordinate of the first slice.
+                Defaults to the dataset's z offset.
+            resolution (int : 0): Resolution level
+            slab_depth (int : None): The slices per slab. Defaults to the
+                dataset's cube depth; use a multiple of it.
+            skip_empty (bool : True): Do not upload blocks that are entirely
+                0, as they are already 0 in a new channel
+            checkpoint (str : None): A file to record finished slabs in. A
+                rerun with the same checkpoint skips every slab whose files
+                have not changed since it was uploaded.
+            max_workers (int : DEFAULT_WORKERS): Slices to read, and blocks
+                to upload, at once per slab
+            max_slabs (int : 2): Slabs to process at once
+
+        Returns:
+            [(int, int)]: The (z_start, z_stop) of every slab uploaded, sorted
+
+        Raises:
+            ValueError: If there are no slices, or they are not all 2D and
+                the same size
+        """
+        if isinstance(filenames, six.string_types):
+            filenames = sorted(glob.glob(os.path.expanduser(filenames)))
+        if len(filenames) == 0:
+            raise ValueError("No slices to ingest.")
+
+        origin = self.oo.get_image_offset(token, resolution)
+        if z_start is None:
+            z_start = origin[2]
+        if slab_depth is None:
+            slab_depth = self.oo.get_block_size(token, resolution)[2]
+        edges = block_edges(z_start, z_start + len(filenames), slab_depth,
+                            origin[2])
+        slabs = list(zip(edges[:-1], edges[1:]))
+
+        store = BlockHashStore(checkpoint) if checkpoint else None
+        lock = threading.Lock()
+
+        def ingest_slab(slab):
+            z0, z1 = slab
+            files = filenames[z0 - z_start:z1 - z_start]
+            digest = _fingerprint(files, (x_start, y_start))
+            if store is not None:
+                with lock:
+                    done = store.get(token, channel, resolution,
+                                     ((z0, z1),)) == digest
+                if done:
+                    return None
+
+            data = _load_slab(files, max_workers)
+            self.oo.post_cutout(token, channel, x_start, y_start, z0, data,
+                                resolution=resolution,
+                                skip_empty=skip_empty,
+                                max_workers=max_workers)
+            if store is not None:
+                with lock:
+                    store.set(token, channel, resolution, ((z0, z1),),
+                              digest)
+                    store.save()
+            return slab
+
+        uploaded = [slab for slab in imap_unordered(ingest_slab, slabs,
+                                                    max_workers=max_slabs)
+                    if slab is not None]
+        return sorted(uploaded)
+
     def output_json(self, file_name='/tmp/ND.json'):
         """
         Arguments:
@@ -515,3 +732,160 @@ provided image size.')
         f = open(file_name, 'w')
         f.write(str(data))
         f.close()
+
+
+class IngestReport(object):
+    """
+    The results of `NDIngest.validate`: every bad slice, and the intensity
+    statistics of the sampled slices, per channel.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty report. `expect` registers each channel.
+        """
+        self.expected = {}
+        self.checked = {}
+        self.errors = {}
+        self.stats = {}
+
+    def expect(self, channel_name, count):
+        """
+        Register the number of slices of a channel.
+        """
+        self.expected[channel_name] = count
+        self.checked[channel_name] = 0
+        self.errors[channel_name] = []
+        self.stats[channel_name] = None
+
+    def add(self, channel_name, path, error=None, sample=None):
+        """
+        Add the result of checking one slice.
+
+        Arguments:
+            channel_name (str): The slice's channel
+            path (str): The slice's URL
+            error (str : None): What is wrong with the slice, if anything
+            sample (numpy.ndarray : None): Pixels to add to the statistics
+        """
+        self.checked[channel_name] += 1
+        if error is not None:
+            self.errors[channel_name].append((path, error))
+        if sample is not None and sample.size:
+            sample = sample.astype(np.float64)
+            stats = {'count': sample.size, 'min': sample.min(),
+                     'max': sample.max(), 'sum': sample.sum(),
+                     'sumsq': (sample ** 2).sum()}
+            old = self.stats[channel_name]
+            if old is not None:
+                stats = {'count': old['count'] + stats['count'],
+                         'min': min(old['min'], stats['min']),
+                         'max': max(old['max'], stats['max']),
+                         'sum': old['sum'] + stats['sum'],
+                         'sumsq': old['sumsq'] + stats['sumsq']}
+            self.stats[channel_name] = stats
+
+    @property
+    def ok(self):
+        """
+        bool: Whether every slice was checked and none had errors
+        """
+        return all(self.checked[c] == self.expected[c] and
+                   not self.errors[c] for c in self.expected)
+
+    def to_dict(self):
+        """
+        Get the report as plain python values.
+
+        Returns:
+            dict: {channel_name: {'expected', 'checked', 'errors', 'min',
+                'max', 'mean', 'std'}}, where the statistics are None if no
+                slice was sampled
+        """
+        report = {}
+        for c in sorted(self.expected):
+            channel = {'expected': self.expected[c],
+                       'checked': self.checked[c],
+                       'errors': sorted(self.errors[c]),
+                       'min': None, 'max': None, 'mean': None, 'std': None}
+            stats = self.stats[c]
+            if stats is not None:
+                mean = stats['sum'] / stats['count']
+                var = max(stats['sumsq'] / stats['count'] - mean ** 2, 0)
+                channel.update({'min': stats['min'], 'max': stats['max'],
+                                'mean': mean, 'std': var ** 0.5})
+            report[c] = channel
+        return report
+
+    def __str__(self):
+        """
+        Summarize the report, one line per channel, then its bad slices.
+        """
+        lines = []
+        for c, channel in sorted(self.to_dict().items()):
+            lines.append('{}: {} of {} slices checked, {} bad'.format(
+                c, channel['checked'], channel['expected'],
+                len(channel['errors'])))
+            if channel['mean'] is not None:
+                lines.append('    intensity min {} max {} mean {:.3f} '
+                             'std {:.3f}'.format(channel['min'],
+                                                 channel['max'],
+                                                 channel['mean'],
+                                                 channel['std']))
+            for path, error in channel['errors']:
+                lines.append('    {}: {}'.format(path, error))
+        return '\n'.join(lines)
+
+
+def _z_offset(data):
+    """
+    Get the number of the first slice of an ingest: its z offset.
+    """
+    if "offset" in data["dataset"]:
+        return data["dataset"]["offset"][2]
+    return 0
+
+
+def _load_slice(filename):
+    """
+    Load one PNG or TIFF slice as a (y, x) array.
+    """
+    if filename.lower().endswith('.png'):
+        return ndpng.load(filename)
+    return ndtiff.load(filename)
+
+
+def _load_slab(filenames, max_workers):
+    """
+    Load slices concurrently into one (x, y, z) array.
+    """
+    slices = [None] * len(filenames)
+
+    def load(i):
+        return i, _load_slice(filenames[i])
+
+    for i, img in imap_unordered(load, range(len(filenames)),
+                                 max_workers=max_workers):
+        slices[i] = img
+    shape = slices[0].shape
+    if len(shape) != 2 or any(i.shape != shape for i in slices):
+        raise ValueError("Slices must all be 2D and the same size.")
+    return np.ascontiguousarray(np.array(slices).transpose(2, 1, 0))
+
+
+def _fingerprint(filenames, extra=()):
+    """
+    Hash the names, sizes and modification times of some files.
+    """
+    stats = [(f, os.path.getsize(f), os.path.getmtime(f)) for f in filenames]
+    return hashlib.sha1(json.dumps([stats, list(extra)]).encode(
+        'utf-8')).hexdigest()
+
+
+def _decode(content, image_format):
+    """
+    Decode the bytes of a PNG or TIFF slice into an array.
+    """
+    if image_format == 'tiff':
+        return tifffile.imread(BytesIO(content))
+    return np.array(Image.open(BytesIO(content)))
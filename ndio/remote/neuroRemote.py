@@ -192,8 +192,9 @@ class neuroRemote(Remote):
         quantity = str(quantity)
         url = self.url("{}/{}/reserve/{}/".format(token, channel, quantity))
         req = self.remote_utils.get_url(url)
-        if req.status_code is not 200:
-            raise RemoteDataNotFoundError('Invalid req: ' + req.status_code)
+        if req.status_code != 200:
+            raise RemoteDataNotFoundError('Invalid req: {}'.format(
+                req.status_code))
         out = req.json()
         return [out[0] + i for i in range(out[1])]
 
@@ -0,0 +1,509 @@
+from __future__ import absolute_import
+import ndio
+import requests
+import os
+import numpy
+from io import BytesIO
+import zlib
+import tempfile
+import blosc
+import h5py
+import time
+import threading
+from collections import deque
+from .remote_utils import remote_utils
+
+from .Remote import Remote
+from .errors import *
+import ndio.ramon as ndio_ramon
+from ndio.utils.parallel import imap_unordered, DEFAULT_WORKERS
+from six.moves import range
+import six
+
+from functools import wraps
+
+from .neuroRemote import neuroRemote
+from .neuroRemote import DEFAULT_HOSTNAME
+from .neuroRemote import DEFAULT_SUFFIX
+from .neuroRemote import DEFAULT_PROTOCOL
+from .neuroRemote import DEFAULT_BLOCK_SIZE
+
+from .data import data
+
+# The most RAMON objects the server will return in one request.
+MAX_RAMON_BATCH = 100
+
+# The number of IDs to reserve from the server in one request.
+DEFAULT_RESERVE_BLOCK = 10000
+
+# Seconds to wait before the first retry of a failed upload (then doubled).
+RETRY_BACKOFF = 0.5
+
+
+class ramon(data):
+    """
+    RAMON class with wrappers for downloading, uploading and deleting RAMON
+    objects.
+
+    Batches of objects are sent concurrently, over the pooled session of
+    `remote_utils`.
+    """
+
+    def __init__(self,
+                 user_token='placeholder',
+                 hostname=DEFAULT_HOSTNAME,
+                 protocol=DEFAULT_PROTOCOL,
+                 meta_root="http://lims.neurodata.io/",
+                 meta_protocol=DEFAULT_PROTOCOL, **kwargs):
+        """
+        Initializer for the ramon class. Takes the same arguments as `data`.
+        """
+        super(ramon, self).__init__(user_token,
+                                    hostname,
+                                    protocol,
+                                    meta_root,
+                                    meta_protocol, **kwargs)
+
+    def get_ramon_bounding_box(self, token, channel, r_id, resolution=0):
+        """
+        Get the bounding box for a RAMON object (specified by ID).
+
+        Arguments:
+            token (str): Project to use
+            channel (str): Channel to use
+            r_id (int): Which ID to get a bounding box
+            resolution (int : 0): The resolution at which to download
+
+        Returns:
+            (x_start, x_stop, y_start, y_stop, z_start, z_stop): ints
+        """
+        url = self.url('{}/{}/{}/boundingbox/{}/'.format(token, channel,
+                                                         r_id, resolution))
+
+        r_id = str(r_id)
+        res = self.remote_utils.get_url(url)
+
+        if res.status_code != 200:
+            rt = self.get_ramon_metadata(token, channel, r_id)[r_id]['type']
+            if rt in ['neuron']:
+                raise ValueError("ID {} is of type '{}'".format(r_id, rt))
+            raise RemoteDataNotFoundError("No such ID {}".format(r_id))
+
+        with tempfile.NamedTemporaryFile() as tmpfile:
+            tmpfile.write(res.content)
+            tmpfile.seek(0)
+            with h5py.File(tmpfile.name, "r") as h5file:
+                origin = h5file["{}/XYZOFFSET".format(r_id)][()]
+                size = h5file["{}/XYZDIMENSION".format(r_id)][()]
+            return (origin[0], origin[0] + size[0],
+                    origin[1], origin[1] + size[1],
+                    origin[2], origin[2] + size[2])
+
+    def get_ramon_ids(self, token, channel, ramon_type=None):
+        """
+        Return a list of all IDs available for download from this token and
+        channel.
+
+        Arguments:
+            token (str): Project to use
+            channel (str): Channel to use
+            ramon_type (int : None): Optional. If set, filters IDs and only
+                returns those of RAMON objects of the requested type.
+
+        Returns:
+            int[]: A list of the ids of the returned RAMON objects
+
+        Raises:
+            RemoteDataNotFoundError: If the channel or token is not found
+        """
+        url = self.url("{}/{}/query/".format(token, channel))
+        if ramon_type is not None:
+            # User is requesting a specific ramon_type.
+            if type(ramon_type) is not int:
+                ramon_type = ndio_ramon.AnnotationType.get_int(ramon_type)
+            url += "type/{}/".format(str(ramon_type))
+
+        req = self.remote_utils.get_url(url)
+
+        if req.status_code != 200:
+            raise RemoteDataNotFoundError('No query results for token {}.'
+                                          .format(token))
+
+        with tempfile.NamedTemporaryFile() as tmpfile:
+            tmpfile.write(req.content)
+            tmpfile.seek(0)
+            with h5py.File(tmpfile.name, "r") as h5file:
+                if 'ANNOIDS' not in h5file:
+                    return []
+                return numpy.asarray(h5file['ANNOIDS']).tolist()
+
+    def get_ramon(self, token, channel, ids, resolution=0,
+                  include_cutout=False, sieve=None, batch_size=100,
+                  max_workers=DEFAULT_WORKERS):
+        """
+        Download a RAMON object by ID.
+
+        Arguments:
+            token (str): Project to use
+            channel (str): The channel to use
+            ids (int, str, int[], str[]): The IDs of a RAMON object to gather.
+                Can be int (3), string ("3"), int[] ([3, 4, 5]), or string
+                (["3", "4", "5"]).
+            resolution (int : None): Resolution. Defaults to the most granular
+                resolution (0 for now)
+            include_cutout (bool : False):  If True, r.cutout is populated
+            sieve (function : None): A function that accepts a single ramon
+                and returns True or False depending on whether you want that
+                ramon object to be included in your response or not. It is
+                applied before any cutout is downloaded.
+                For example,
+                ```
+                def is_even_id(ndio_ramon):
+                    return ndio_ramon.id % 2 == 0
+                ```
+                You can then pass this to get_ramon like this:
+                ```
+                ndio.remote.neuroRemote.get_ramon( . . . , sieve=is_even_id)
+                ```
+            batch_size (int : 100): The amount of RAMON objects to download in
+                one request. The server accepts at most 100.
+            max_workers (int : DEFAULT_WORKERS): The number of batches to
+                download at once.
+
+        Returns:
+            ndio.ramon.RAMON[]: A list of returned RAMON objects, in the order
+                of `ids`. If `ids` is a single ID, the object alone, or None
+                if `sieve` rejected it.
+
+        Raises:
+            RemoteDataNotFoundError: If the requested ids cannot be found.
+        """
+        _return_first_only = False
+        if type(ids) is not list:
+            _return_first_only = True
+            ids = [ids]
+        ids = [str(i) for i in ids]
+
+        rs = list(self.iter_ramon(token, channel, ids, resolution,
+                                  include_cutout, sieve, batch_size,
+                                  max_workers))
+
+        if _return_first_only:
+            # The sieve may have rejected the only object
+            return rs[0] if rs else None
+
+        order = dict((rid, i) for i, rid in enumerate(ids))
+        return sorted(rs, key=lambda x: order[str(x.id)])
+
+    def iter_ramon(self, token, channel, ids, resolution=0,
+                   include_cutout=False, sieve=None, batch_size=100,
+                   max_workers=DEFAULT_WORKERS):
+        """
+        Download RAMON objects by ID, yielding each one as soon as its batch
+        has been decoded. Takes the same arguments as `get_ramon`.
+
+        Objects arrive in the order their batches complete, not in the order
+        of `ids`. Only a few batches are held in memory at a time, so this is
+        the way to walk a very large number of objects.
+
+        Returns:
+            generator: Yields RAMON objects
+
+        Raises:
+            RemoteDataNotFoundError: If the requested ids cannot be found.
+        """
+        b_size = max(1, min(MAX_RAMON_BATCH, batch_size))
+        if type(ids) is not list:
+            ids = [ids]
+        ids = [str(i) for i in ids]
+
+        id_batches = (ids[i:i + b_size] for i in range(0, len(ids), b_size))
+
+        def fetch(batch):
+            rs = self._get_ramon_batch(token, channel, batch, resolution)
+            rs = self._filter_ramon(rs, sieve)
+            if include_cutout:
+                rs = [self._add_ramon_cutout(token, channel, r, resolution)
+                      for r in rs]
+            return rs
+
+        for rs in imap_unordered(fetch, id_batches, max_workers=max_workers):
+            for r in rs:
+                yield r
+
+    def _filter_ramon(self, rs, sieve):
+        if sieve is not None:
+            return [r for r in rs if sieve(r)]
+        return rs
+
+    def _add_ramon_cutout(self, token, channel, ramon, resolution):
+        # Get the bounding box (cube-aligned)
+        bbox = self.get_ramon_bounding_box(token, channel,
+                                           ramon.id, resolution=resolution)
+        # Get the cutout (cube-aligned)
+        cutout = self.get_cutout(token, channel,
+                                 *bbox, resolution=resolution)
+
+        # Keep only this object's voxels, then crop to their bounding box.
+        cutout[cutout != int(ramon.id)] = 0
+        ramon.xyz_offset = (bbox[0], bbox[2], bbox[4])
+        ramon.cutout = cutout
+        ramon.crop()
+        return ramon
+
+    def _get_ramon_batch(self, token, channel, ids, resolution):
+        ids = [str(i) for i in ids]
+        url = self.url("{}/{}/{}/json/".format(token, channel, ",".join(ids)))
+        req = self.remote_utils.get_url(url)
+
+        if req.status_code != 200:
+            raise RemoteDataNotFoundError('No data for id {}.'.format(ids))
+        else:
+            return ndio_ramon.from_json(req.json())
+
+    def get_ramon_metadata(self, token, channel, anno_id,
+                           max_workers=DEFAULT_WORKERS):
+        """
+        Download a RAMON object by ID. `anno_id` can be a string `"123"`, an
+        int `123`, an array of ints `[123, 234, 345]`, an array of strings
+        `["123", "234", "345"]`, or a comma-separated string list
+        `"123,234,345"`.
+
+        Arguments:
+            token (str): Project to use
+            channel (str): The channel to use
+            anno_id: An int, a str, or a list of ids to gather
+            max_workers (int : DEFAULT_WORKERS): The number of IDs to download
+                at once, if there are many
+
+        Returns:
+            JSON. If you pass a single id in str or int, returns a single datum
+            If you pass a list of int or str or a comma-separated string, will
+            return a dict with keys from the list and the values are the JSON
+            returned from the server.
+
+        Raises:
+            RemoteDataNotFoundError: If the data cannot be found on the Remote
+        """
+        if isinstance(anno_id, (six.integer_types, numpy.integer)):
+            # there's just one ID to download
+            return self._get_single_ramon_metadata(token, channel,
+                                                   str(anno_id))
+        elif isinstance(anno_id, six.string_types):
+            # either "id" or "id,id,id":
+            if (len(anno_id.split(',')) > 1):
+                return self._get_many_ramon_metadata(
+                    token, channel, anno_id.split(','), max_workers)
+            else:
+                # "id"
+                return self._get_single_ramon_metadata(token, channel,
+                                                       anno_id.strip())
+        elif type(anno_id) is list:
+            # [id, id] or ['id', 'id']
+            return self._get_many_ramon_metadata(token, channel, anno_id,
+                                                 max_workers)
+
+    def _get_many_ramon_metadata(self, token, channel, anno_ids,
+                                 max_workers):
+        anno_ids = [str(i).strip() for i in anno_ids]
+
+        def fetch(anno_id):
+            return anno_id, self._get_single_ramon_metadata(token, channel,
+                                                            anno_id)
+
+        return dict(imap_unordered(fetch, anno_ids, max_workers=max_workers))
+
+    def _get_single_ramon_metadata(self, token, channel, anno_id):
+        req = self.remote_utils.get_url(self.url() +
+                                        "{}/{}/{}/json/".format(token,
+                                                                channel,
+                                                                anno_id))
+        if req.status_code != 200:
+            raise RemoteDataNotFoundError('No data for id {}.'.format(anno_id))
+        return req.json()
+
+    def delete_ramon(self, token, channel, anno):
+        """
+        Deletes an annotation from the server. Probably you should be careful
+        with this function, it seems dangerous.
+
+        Arguments:
+            token (str): The token to inspect
+            channel (str): The channel to inspect
+            anno (int OR list(int) OR RAMON): The annotation to delete. If a
+                RAMON object is supplied, the remote annotation will be deleted
+                by an ID lookup. If an int is supplied, the annotation will be
+                deleted for that ID. If a list of ints are provided, they will
+                all be deleted.
+
+        Returns:
+            bool: Success
+        """
+        if isinstance(anno, (six.integer_types, numpy.integer)):
+            a = int(anno)
+        elif isinstance(anno, six.string_types):
+            a = int(anno)
+        elif type(anno) is list:
+            a = ",".join(str(i) for i in anno)
+        else:
+            a = anno.id
+
+        req = self.remote_utils.delete_url(self.url("{}/{}/{}/".format(
+            token, channel, a)))
+        if req.status_code != 200:
+            raise RemoteDataNotFoundError("Could not delete id {}: {}"
+                                          .format(a, req.text))
+        else:
+            return True
+
+    def post_ramon(self, token, channel, r, batch_size=100,
+                   max_workers=DEFAULT_WORKERS, retries=3,
+                   reserve_block=DEFAULT_RESERVE_BLOCK):
+        """
+        Posts RAMON objects to the Remote.
+
+        Objects without an ID (`id` of 0 or None) are given one. IDs are
+        reserved from the server `reserve_block` at a time, rather than once
+        per batch. When `r` is a list, no more IDs are reserved than it has
+        objects without one; the length of a generator is not known, so
+        lower `reserve_block` to waste fewer IDs when posting a few.
+
+        Batches are packed into HDF5 and posted by `max_workers` threads at
+        once, and each is retried on connection errors and server (5xx)
+        errors.
+
+        Arguments:
+            token (str): Project to use
+            channel (str): The channel to use
+            r (RAMON or RAMON[]): The annotation(s) to upload. May also be a
+                generator, which is read only as fast as batches are posted.
+            batch_size (int : 100): The number of RAMONs to post in one file
+            max_workers (int : DEFAULT_WORKERS): Batches to post at once
+            retries (int : 3): How many times to retry a failed batch
+            reserve_block (int : DEFAULT_RESERVE_BLOCK): IDs to reserve from
+                the server at a time
+
+        Returns:
+            int[]: The IDs of the posted objects, in the order of `r`
+
+        Throws:
+            RemoteDataUploadError: if something goes wrong
+        """
+        if isinstance(r, ndio_ramon.RAMONBase):
+            r = [r]
+
+        needed = None
+        if hasattr(r, '__len__'):
+            needed = sum(1 for ri in r if _needs_id(ri))
+        ids = _reserved_ids(self, token, channel, reserve_block, needed)
+        batches = self._batch_ramon(r, max(1, batch_size), ids)
+
+        def post(item):
+            index, batch = item
+            return index, self._post_ramon_batch(token, channel, batch,
+                                                 retries)
+
+        posted = dict(imap_unordered(post, batches, max_workers=max_workers))
+        return [rid for i in sorted(posted) for rid in posted[i]]
+
+    def _batch_ramon(self, rs, batch_size, ids):
+        """
+        Group RAMON objects into numbered batches, giving each object that
+        has no ID one from `ids`.
+        """
+        batch = []
+        index = 0
+        for ri in rs:
+            if _needs_id(ri):
+                ri.id = ids.next()
+            batch.append(ri)
+            if len(batch) == batch_size:
+                yield index, batch
+                index += 1
+                batch = []
+        if batch:
+            yield index, batch
+
+    def _post_ramon_batch(self, token, channel, batch, retries):
+        # Voxel lists are left out of the HDF5 and posted as label cutouts
+        # instead; dense cutouts travel in the HDF5 only.
+        tmpfile = ndio_ramon.to_hdf5_many(batch, voxels=False)
+        try:
+            payload = tmpfile.read()
+        finally:
+            tmpfile.close()
+            os.remove(tmpfile.name)
+
+        url = self.url("{}/{}/overwrite/".format(token, channel))
+        for attempt in range(retries + 1):
+            try:
+                res = self.remote_utils.post_url(url, data=payload)
+            except requests.exceptions.RequestException as e:
+                if attempt == retries:
+                    raise RemoteDataUploadError(
+                        'Could not upload {} objects: {}'.format(len(batch),
+                                                                 e))
+            else:
+                if res.status_code == 200:
+                    break
+                if res.status_code < 500 or attempt == retries:
+                    raise RemoteDataUploadError(
+                        '[{}] Could not upload {} objects: {}'.format(
+                            res.status_code, len(batch), res.text))
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+        return_ids = [int(rid) for rid in res.text.split(',')]
+
+        for ri in batch:
+            if isinstance(ri, ndio_ramon.RAMONVolume) and ri.sparse and \
+                    len(ri.voxels):
+                # data() is a boolean mask; label it with the object's ID.
+                labels = ri.data().astype(numpy.uint64) * \
+                    numpy.uint64(ri.id)
+                orig = ri.xyz_offset
+                self.post_cutout(token, channel,
+                                 orig[0], orig[1], orig[2],
+                                 labels, resolution=ri.resolution)
+        return return_ids
+
+
+def _needs_id(r):
+    """
+    Whether a RAMON object has yet to be given an ID.
+    """
+    return r.id in (None, 0, '0')
+
+
+class _reserved_ids(object):
+    """
+    Hands out IDs reserved from the server, reserving `block` more each time
+    it runs out. Nothing is reserved until the first ID is needed.
+    """
+
+    def __init__(self, remote, token, channel, block, needed=None):
+        """
+        Reserve for a `channel` of `token`, `block` IDs at a time, but never
+        more than the `needed` (if known) that are still to be handed out.
+        """
+        self.remote = remote
+        self.token = token
+        self.channel = channel
+        self.block = block
+        self.needed = needed
+        self.ids = deque()
+        self.lock = threading.Lock()
+
+    def next(self):
+        """
+        Get the next reserved ID, reserving more if there are none left.
+        """
+        with self.lock:
+            if not self.ids:
+                quantity = self.block
+                if self.needed is not None:
+                    quantity = max(1, min(quantity, self.needed))
+                self.ids.extend(self.remote.reserve_ids(
+                    self.token, self.channel, quantity))
+            if self.needed is not None:
+                self.needed -= 1
+            return self.ids.popleft()
@@ -1,20 +1,39 @@
 import requests
+from requests.adapters import HTTPAdapter
+
+# The number of connections kept open per host. Concurrent requests beyond
+# this still work, but open a new connection each.
+DEFAULT_POOL_SIZE = 16
 
 
 class remote_utils:
     """
     Remote Utilities class with wrappers for request methods.
+
+    Requests go through one `requests.Session`, so connections (and their TLS
+    handshakes) are pooled and reused.
     """
 
     def __init__(self,
-                 user_token):
+                 user_token,
+                 pool_size=DEFAULT_POOL_SIZE):
         """
         Initializes for remote_utils.
 
         Arguments:
             user_token (str): Authentication token for user.
+            pool_size (int : DEFAULT_POOL_SIZE): Connections to keep per host
         """
         self._user_token = user_token
+        self.session = requests.Session()
+        self.session.verify = False
+        self.session.headers.update({
+            'Authorization': 'Token {}'.format(self._user_token)
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def get_url(self, url):
         """
@@ -28,9 +47,7 @@ class remote_utils:
             obj: The response object
         """
         try:
-            req = requests.get(url, headers={
-                'Authorization': 'Token {}'.format(self._user_token)
-            }, verify=False)
+            req = self.session.get(url)
             if req.status_code is 403:
                 raise ValueError("Access Denied")
             else:
@@ -63,19 +80,16 @@ class remote_utils:
             headers = {'Authorization': 'Token {}'.format(token)}
 
         if json:
-            return requests.post(url,
-                                 headers=headers,
-                                 json=json,
-                                 verify=False)
+            return self.session.post(url,
+                                     headers=headers,
+                                     json=json)
         if data:
-            return requests.post(url,
-                                 headers=headers,
-                                 data=data,
-                                 verify=False)
+            return self.session.post(url,
+                                     headers=headers,
+                                     data=data)
 
-        return requests.post(url,
-                             headers=headers,
-                             verify=False)
+        return self.session.post(url,
+                                 headers=headers)
 
     def delete_url(self, url, token=''):
         """
@@ -91,10 +105,10 @@ class remote_utils:
         if (token == ''):
             token = self._user_token
 
-        return requests.delete(url,
-                               headers={
-                                   'Authorization': 'Token {}'.format(token)},
-                               verify=False,)
+        return self.session.delete(url,
+                                   headers={
+                                       'Authorization': 'Token {}'.format(
+                                           token)})
 
     def ping(self, url, endpoint=''):
         """
@@ -0,0 +1,101 @@
+from __future__ import absolute_import
+import os
+import json
+import zlib
+import numpy
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+def hash_block(block):
+    """
+    Get a fast (non-cryptographic) hash of an array's contents, shape and
+    type. Uses xxhash if it is installed, and crc32 otherwise. The name of the
+    algorithm is part of the result, so hashes made with different algorithms
+    never compare equal.
+
+    Arguments:
+        block (numpy.ndarray): The array to hash
+
+    Returns:
+        str: The hash, e.g. 'crc32:1c291ca3'
+    """
+    block = numpy.ascontiguousarray(block)
+    header = '{}{}'.format(block.dtype.str, block.shape).encode('utf-8')
+    if xxhash is not None:
+        h = xxhash.xxh64()
+        h.update(header)
+        h.update(block.view(numpy.uint8))
+        return 'xxh64:' + h.hexdigest()
+    crc = zlib.crc32(block.view(numpy.uint8), zlib.crc32(header))
+    return 'crc32:{:08x}'.format(crc & 0xffffffff)
+
+
+def block_key(block):
+    """
+    Get the string that names a block in a `BlockHashStore`.
+
+    Arguments:
+        block (tuple): The bounds of the block, as
+            ((x_start, x_stop), (y_start, y_stop), (z_start, z_stop))
+
+    Returns:
+        str: e.g. '0,512,0,512,0,16'
+    """
+    return ','.join(str(int(i)) for bounds in block for i in bounds)
+
+
+class BlockHashStore(object):
+    """
+    A local JSON file of the hash of every block last uploaded, per token,
+    channel and resolution. `post_cutout` uses it to upload only the blocks
+    that changed since.
+    """
+
+    def __init__(self, filename):
+        """
+        Open a store, reading it from `filename` if it exists.
+
+        Arguments:
+            filename (str): The JSON file to read and save
+        """
+        self.filename = filename
+        self.hashes = {}
+        if os.path.exists(filename):
+            with open(filename) as f:
+                self.hashes = json.load(f)
+
+    def _table(self, token, channel, resolution):
+        return self.hashes.setdefault(
+            '{}/{}/{}'.format(token, channel, resolution), {})
+
+    def get(self, token, channel, resolution, block):
+        """
+        Get the hash of a block when it was last uploaded.
+
+        Returns:
+            str: The hash, or None if the block was never uploaded
+        """
+        return self._table(token, channel, resolution).get(block_key(block))
+
+    def set(self, token, channel, resolution, block, value):
+        """
+        Record the hash of an uploaded block. Call `save` to write it out.
+        """
+        self._table(token, channel, resolution)[block_key(block)] = value
+
+    def save(self):
+        """
+        Write the store to its file. The file is replaced in one step, so an
+        interrupted save never leaves it half-written.
+        """
+        tmp = self.filename + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.hashes, f)
+        if hasattr(os, 'replace'):
+            os.replace(tmp, self.filename)
+        else:
+            os.rename(tmp, self.filename)
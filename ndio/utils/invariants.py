@@ -0,0 +1,225 @@
+"""
+Compute the graph invariants of the grute graph services (`Invariants`)
+locally, on sparse adjacency matrices.
+"""
+from __future__ import absolute_import
+from concurrent.futures import ProcessPoolExecutor
+import numpy
+import scipy.sparse
+import scipy.sparse.linalg
+
+import ndio.convert.graph as ndgraph
+from ndio.remote.grute import Invariants
+
+# The most eigenpairs to compute, as the graph services do.
+DEFAULT_EIGENS = 100
+
+
+def adjacency(graph):
+    """
+    Get the simple undirected graph of an adjacency matrix: symmetric, with
+    every edge weight 1, and no self-loops. Invariants are defined on this.
+
+    Arguments:
+        graph (scipy.sparse matrix or numpy.ndarray): An adjacency matrix
+
+    Returns:
+        scipy.sparse.csr_matrix: The binary, symmetric adjacency matrix
+    """
+    graph = scipy.sparse.csr_matrix(graph)
+    graph = graph + graph.T
+    graph.setdiag(0)
+    graph.eliminate_zeros()
+    graph.data[:] = 1
+    return graph.astype(numpy.float64)
+
+
+def local_degree(graph):
+    """
+    Get the degree of every vertex.
+
+    Returns:
+        numpy.ndarray: The number of neighbors of each vertex
+    """
+    return numpy.diff(adjacency(graph).indptr)
+
+
+def triangle_count(graph):
+    """
+    Get the number of triangles through every vertex.
+
+    Returns:
+        numpy.ndarray: Triangles per vertex
+    """
+    a = adjacency(graph)
+    return _triangles(a)
+
+
+def _triangles(a):
+    # (A^2)[i, j] counts the paths i-k-j; keeping only edges i-j closes them.
+    return numpy.asarray(a.multiply(a.dot(a)).sum(axis=1)).ravel() / 2
+
+
+def clustering(graph):
+    """
+    Get the local clustering coefficient of every vertex: the fraction of
+    pairs of its neighbors that are themselves neighbors.
+
+    Returns:
+        numpy.ndarray: Coefficients, 0 for vertices with fewer than 2
+            neighbors
+    """
+    a = adjacency(graph)
+    return _clustering(_triangles(a), numpy.diff(a.indptr))
+
+
+def _clustering(tri, deg):
+    pairs = deg * (deg - 1) / 2.
+    cc = numpy.zeros(len(deg))
+    cc[pairs > 0] = tri[pairs > 0] / pairs[pairs > 0]
+    return cc
+
+
+def scan_statistic(graph):
+    """
+    Get the scan statistic 1 of every vertex: the number of edges in the
+    subgraph induced by the vertex and its neighbors. Its maximum is the
+    graph's scan statistic.
+
+    Returns:
+        numpy.ndarray: Edges per neighborhood
+    """
+    a = adjacency(graph)
+    return numpy.diff(a.indptr) + _triangles(a)
+
+
+def eigens(graph, k=DEFAULT_EIGENS):
+    """
+    Get the eigenvalues and eigenvectors of largest magnitude.
+
+    Arguments:
+        graph (scipy.sparse matrix or numpy.ndarray): An adjacency matrix
+        k (int : DEFAULT_EIGENS): The most eigenpairs to compute
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray): The eigenvalues, largest first, and
+            the eigenvectors as the columns of an (N, k) array
+    """
+    return _eigens(adjacency(graph), k)
+
+
+def _eigens(a, k):
+    n = a.shape[0]
+    if a.nnz == 0:
+        # Every eigenvalue is 0, and ARPACK cannot start from a zero matrix.
+        k = min(k, n)
+        return numpy.zeros(k), numpy.eye(n, k)
+    if k >= n - 1:
+        # ARPACK needs k < n - 1; small graphs are cheap to solve densely.
+        values, vectors = numpy.linalg.eigh(a.toarray())
+        order = numpy.argsort(-numpy.abs(values))[:k]
+    else:
+        values, vectors = scipy.sparse.linalg.eigsh(a, k=k, which='LM')
+        order = numpy.arange(len(values))
+    order = order[numpy.argsort(-values[order], kind='mergesort')]
+    return values[order], vectors[:, order]
+
+
+def max_avg_degree(graph):
+    """
+    Estimate the maximum average degree of any subgraph by the largest
+    eigenvalue of the adjacency matrix, as the graph services do. This is an
+    upper bound on the true value.
+
+    Returns:
+        float
+    """
+    return _max_avg_degree(adjacency(graph))
+
+
+def _max_avg_degree(a):
+    if a.nnz == 0:
+        return 0.
+    if a.shape[0] < 3:
+        return float(numpy.linalg.eigvalsh(a.toarray()).max())
+    return float(scipy.sparse.linalg.eigsh(a, k=1, which='LA',
+                                           return_eigenvectors=False)[0])
+
+
+def compute_invariants(graph, invariants=Invariants.ALL, k=DEFAULT_EIGENS):
+    """
+    Compute a set of invariants of a graph. Work common to several of them
+    (e.g. triangles, for ss1 and cc) is done once.
+
+    Arguments:
+        graph (scipy.sparse matrix or numpy.ndarray): An adjacency matrix
+        invariants (str[] : Invariants.ALL): Which to compute
+        k (int : DEFAULT_EIGENS): The most eigenpairs to compute for 'eig'
+
+    Returns:
+        dict: {invariant: value}. 'eig' is (eigenvalues, eigenvectors), 'mad'
+            a float, and the rest have one value per vertex.
+
+    Raises:
+        ValueError: If an invariant is unknown
+    """
+    if not set(invariants) <= set(Invariants.ALL):
+        raise ValueError("Invariants must be a subset of Invariants.ALL.")
+
+    a = adjacency(graph)
+    deg = numpy.diff(a.indptr)
+    tri = None
+    if set(invariants) & {Invariants.TRIANGLE_COUNT, Invariants.CLUSTERING,
+                          Invariants.SCAN_STATISTIC}:
+        tri = _triangles(a)
+
+    results = {}
+    for invariant in invariants:
+        if invariant == Invariants.LOCAL_DEGREE:
+            results[invariant] = deg
+        elif invariant == Invariants.TRIANGLE_COUNT:
+            results[invariant] = tri
+        elif invariant == Invariants.CLUSTERING:
+            results[invariant] = _clustering(tri, deg)
+        elif invariant == Invariants.SCAN_STATISTIC:
+            results[invariant] = deg + tri
+        elif invariant == Invariants.EIGENS:
+            results[invariant] = _eigens(a, k)
+        elif invariant == Invariants.MAX_AVG_DEGREE:
+            results[invariant] = _max_avg_degree(a)
+    return results
+
+
+def compute_invariants_many(filenames, fmt=None, invariants=Invariants.ALL,
+                            k=DEFAULT_EIGENS, max_workers=None):
+    """
+    Compute invariants of many graph files, in a pool of processes.
+
+    Arguments:
+        filenames (str[]): The graph files
+        fmt (str : None): The format of every file (see
+            ndio.convert.graph.GRAPH_FORMATS). Defaults to guessing each from
+            its extension.
+        invariants (str[] : Invariants.ALL): Which to compute
+        k (int : DEFAULT_EIGENS): The most eigenpairs to compute for 'eig'
+        max_workers (int : None): The number of processes. Defaults to the
+            number of CPUs; 1 computes in this process.
+
+    Returns:
+        dict: {filename: {invariant: value}}
+    """
+    if not set(invariants) <= set(Invariants.ALL):
+        raise ValueError("Invariants must be a subset of Invariants.ALL.")
+
+    tasks = [(f, fmt, list(invariants), k) for f in filenames]
+    if max_workers == 1:
+        return dict(map(_compute_file, tasks))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return dict(pool.map(_compute_file, tasks))
+
+
+def _compute_file(task):
+    filename, fmt, invariants, k = task
+    graph, names = ndgraph.load(filename, fmt)
+    return filename, compute_invariants(graph, invariants, k)
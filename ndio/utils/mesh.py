@@ -1,8 +1,169 @@
 from __future__ import absolute_import
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy
 import mcubes
 
+from ndio.utils.stats import label_stats
 
-def export_dae(filename, cutout, level=0):
+
+def marching_cubes(cutout, level=0, block_size=None):
+    """
+    Run Marching Cubes (PyMCubes) over a volume, optionally block-by-block.
+
+    With a `block_size`, only one block of `cutout` is read at a time, so
+    `cutout` can be anything that supports numpy slicing and has a `shape`:
+    an h5py dataset or a numpy memmap are never loaded in full. Neighboring
+    blocks overlap by one voxel so that their surfaces meet, and the vertices
+    they share are merged.
+
+    Arguments:
+        cutout (numpy.ndarray): The dense annotation
+        level (int): The level at which to run mcubes
+        block_size (int[3] : None): The size of each block. If None, the
+            whole volume is meshed at once.
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray): (N, 3) vertices and (M, 3) faces
+    """
+    if block_size is None:
+        return mcubes.marching_cubes(numpy.asarray(cutout), level)
+
+    shape = cutout.shape
+    starts = [range(0, shape[d], block_size[d]) for d in range(3)]
+
+    all_vs = []
+    all_fs = []
+    n_verts = 0
+    for start in itertools.product(*starts):
+        # One voxel of overlap with the next block along each axis.
+        stop = [min(start[d] + block_size[d] + 1, shape[d]) for d in range(3)]
+        if any(stop[d] - start[d] < 2 for d in range(3)):
+            # Already covered by the overlap of the previous block.
+            continue
+
+        block = numpy.asarray(cutout[start[0]:stop[0],
+                                     start[1]:stop[1],
+                                     start[2]:stop[2]])
+        inside = block > level
+        if inside.all() or not inside.any():
+            continue
+
+        vs, fs = mcubes.marching_cubes(block, level)
+        if len(fs) == 0:
+            continue
+        all_vs.append(vs + numpy.asarray(start, dtype=vs.dtype))
+        all_fs.append(fs.astype(numpy.int64) + n_verts)
+        n_verts += len(vs)
+
+    if n_verts == 0:
+        return numpy.zeros((0, 3)), numpy.zeros((0, 3), dtype=numpy.int64)
+
+    return merge_vertices(numpy.concatenate(all_vs),
+                          numpy.concatenate(all_fs))
+
+
+def merge_vertices(vs, fs, decimals=4):
+    """
+    Merge vertices that share a position (e.g. where two blocks meet), and
+    drop the faces that collapse as a result.
+
+    Arguments:
+        vs (numpy.ndarray): (N, 3) vertices
+        fs (numpy.ndarray): (M, 3) faces, indexing into `vs`
+        decimals (int : 4): Vertices that agree to this many decimal places
+            are considered the same
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray): The merged vertices and faces
+    """
+    uniq, inverse = numpy.unique(numpy.round(vs, decimals), axis=0,
+                                 return_inverse=True)
+    fs = inverse.ravel()[fs]
+    keep = (fs[:, 0] != fs[:, 1]) & (fs[:, 1] != fs[:, 2]) & \
+        (fs[:, 0] != fs[:, 2])
+    return uniq, fs[keep]
+
+
+def write_ply(filename, vs, fs, binary=True):
+    """
+    Write a mesh to a .PLY file. The vertex and face data are written from
+    numpy buffers in one call each.
+
+    Arguments:
+        filename (str): The filename to write out to
+        vs (numpy.ndarray): (N, 3) vertices
+        fs (numpy.ndarray): (M, 3) faces
+        binary (bool : True): Binary (little-endian) or ASCII PLY
+
+    Returns:
+        str: The filename
+    """
+    header = "\n".join([
+        "ply",
+        "format {} 1.0".format("binary_little_endian" if binary
+                               else "ascii"),
+        "comment generated by ndio",
+        "element vertex " + str(len(vs)),
+        "property float x",
+        "property float y",
+        "property float z",
+        "element face " + str(len(fs)),
+        "property list uchar int vertex_indices",
+        "end_header",
+        ""
+    ])
+
+    with open(filename, 'wb') as fh:
+        fh.write(header.encode('ascii'))
+        if binary:
+            numpy.asarray(vs, dtype='<f4').tofile(fh)
+            faces = numpy.empty(len(fs), dtype=[('n', 'u1'),
+                                                ('v', '<i4', (3,))])
+            faces['n'] = 3
+            faces['v'] = fs
+            faces.tofile(fh)
+        else:
+            numpy.savetxt(fh, vs, fmt='%.6f')
+            numpy.savetxt(fh, numpy.column_stack([
+                numpy.full(len(fs), 3, dtype=numpy.int64), fs
+            ]), fmt='%d')
+    return filename
+
+
+def write_stl(filename, vs, fs):
+    """
+    Write a mesh to a binary .STL file, from numpy buffers in one call.
+
+    Arguments:
+        filename (str): The filename to write out to
+        vs (numpy.ndarray): (N, 3) vertices
+        fs (numpy.ndarray): (M, 3) faces
+
+    Returns:
+        str: The filename
+    """
+    tris = numpy.asarray(vs, dtype=numpy.float32)[numpy.asarray(fs)]
+    normals = numpy.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    lengths = numpy.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    normals /= lengths[:, numpy.newaxis]
+
+    records = numpy.zeros(len(tris), dtype=[('normal', '<f4', (3,)),
+                                            ('vertices', '<f4', (3, 3)),
+                                            ('attr', '<u2')])
+    records['normal'] = normals
+    records['vertices'] = tris
+
+    with open(filename, 'wb') as fh:
+        fh.write(b'generated by ndio'.ljust(80, b' '))
+        numpy.array([len(records)], dtype='<u4').tofile(fh)
+        records.tofile(fh)
+    return filename
+
+
+def export_dae(filename, cutout, level=0, block_size=None):
     """
     Converts a dense annotation to a DAE, using Marching Cubes (PyMCubes).
 
@@ -10,6 +171,7 @@ def export_dae(filename, cutout, level=0):
         filename (str): The filename to write out to
         cutout (numpy.ndarray): The dense annotation
         level (int): The level at which to run mcubes
+        block_size (int[3] : None): Mesh block-by-block (see marching_cubes)
 
     Returns:
         boolean success
@@ -17,11 +179,11 @@ def export_dae(filename, cutout, level=0):
     if ".dae" not in filename:
         filename = filename + ".dae"
 
-    vs, fs = mcubes.marching_cubes(cutout, level)
+    vs, fs = marching_cubes(cutout, level, block_size)
     mcubes.export_mesh(vs, fs, filename, "ndioexport")
 
 
-def export_obj(filename, cutout, level=0):
+def export_obj(filename, cutout, level=0, block_size=None):
     """
     Converts a dense annotation to a obj, using Marching Cubes (PyMCubes).
 
@@ -29,6 +191,7 @@ def export_obj(filename, cutout, level=0):
         filename (str): The filename to write out to
         cutout (numpy.ndarray): The dense annotation
         level (int): The level at which to run mcubes
+        block_size (int[3] : None): Mesh block-by-block (see marching_cubes)
 
     Returns:
         boolean success
@@ -36,11 +199,11 @@ def export_obj(filename, cutout, level=0):
     if ".obj" not in filename:
         filename = filename + ".obj"
 
-    vs, fs = mcubes.marching_cubes(cutout, level)
+    vs, fs = marching_cubes(cutout, level, block_size)
     mcubes.export_obj(vs, fs, filename)
 
 
-def export_ply(filename, cutout, level=0):
+def export_ply(filename, cutout, level=0, binary=True, block_size=None):
     """
     Converts a dense annotation to a .PLY, using Marching Cubes (PyMCubes).
 
@@ -48,6 +211,8 @@ def export_ply(filename, cutout, level=0):
         filename (str): The filename to write out to
         cutout (numpy.ndarray): The dense annotation
         level (int): The level at which to run mcubes
+        binary (bool : True): Write binary rather than ASCII PLY
+        block_size (int[3] : None): Mesh block-by-block (see marching_cubes)
 
     Returns:
         boolean success
@@ -55,23 +220,128 @@ def export_ply(filename, cutout, level=0):
     if ".ply" not in filename:
         filename = filename + ".ply"
 
-    vs, fs = mcubes.marching_cubes(cutout, level)
-
-    with open(filename, 'w') as fh:
-        lines = [
-            "ply"
-            "format ascii 1.0",
-            "comment generated by ndio",
-            "element vertex " + str(len(vs)),
-            "property float32 x",
-            "property float32 y",
-            "property float32 z",
-            "element face " + str(len(fs)),
-            "property list uint8 int32 vertex_index",
-            "end_header"
-        ]
-        fh.writelines(lines)
-        for v in vs:
-            fh.write("{} {} {}".format(v[0], v[1], v[2]))
-        for f in fs:
-            fh.write("3 {} {} {}".format(f[0], f[1], f[2]))
+    vs, fs = marching_cubes(cutout, level, block_size)
+    write_ply(filename, vs, fs, binary)
+
+
+def export_stl(filename, cutout, level=0, block_size=None):
+    """
+    Converts a dense annotation to a binary .STL, using Marching Cubes.
+
+    Arguments:
+        filename (str): The filename to write out to
+        cutout (numpy.ndarray): The dense annotation
+        level (int): The level at which to run mcubes
+        block_size (int[3] : None): Mesh block-by-block (see marching_cubes)
+
+    Returns:
+        boolean success
+    """
+    if ".stl" not in filename:
+        filename = filename + ".stl"
+
+    vs, fs = marching_cubes(cutout, level, block_size)
+    write_stl(filename, vs, fs)
+
+
+def label_bounding_boxes(cutout, ids=None):
+    """
+    Get the bounding box of every label in a dense annotation, in a single
+    vectorized pass over the volume.
+
+    Arguments:
+        cutout (numpy.ndarray): The dense annotation. 0 is background.
+        ids (int[] : None): Only return boxes for these labels
+
+    Returns:
+        dict: {id: (lo, hi)}, where `lo` and `hi` are the inclusive lower and
+            exclusive upper array coordinates of the label's box
+    """
+    return label_stats(cutout, ids=ids).bounding_boxes()
+
+
+def _mesh_mask(mask, origin, level=0.5):
+    # Padded with background, so that every label's surface is closed.
+    vs, fs = mcubes.marching_cubes(numpy.pad(mask.astype(numpy.uint8), 1,
+                                             mode='constant'), level)
+    return vs + (numpy.asarray(origin) - 1), fs.astype(numpy.int64)
+
+
+_WRITERS = {
+    'ply': write_ply,
+    'stl': write_stl,
+    'obj': lambda filename, vs, fs: mcubes.export_obj(vs, fs, filename),
+}
+
+
+def export_labels(filename, cutout, ids=None, fmt='ply', combined=False,
+                  max_workers=None):
+    """
+    Mesh every label of a dense annotation. Label bounding boxes are computed
+    in one pass, and each label is then meshed only over its own box, in a
+    pool of processes.
+
+    Arguments:
+        filename (str): Where to write. Unless `combined` is set, this is a
+            template such as "my-mesh-*.ply", where * is replaced by each ID
+            (if there is no *, one is added before the extension).
+        cutout (numpy.ndarray): The dense annotation. 0 is background.
+        ids (int[] : None): The labels to mesh. Defaults to all of them.
+        fmt (str : 'ply'): One of 'ply', 'stl' or 'obj'
+        combined (bool : False): Write all labels into a single scene file
+            at `filename`, instead of one file per label
+        max_workers (int : None): The number of processes to mesh with.
+            Defaults to the number of CPUs; 1 meshes in this process.
+
+    Returns:
+        dict: {id: filename}. If `combined`, every ID maps to `filename`.
+
+    Raises:
+        ValueError: If `fmt` is not supported
+    """
+    if fmt not in _WRITERS:
+        raise ValueError("fmt must be one of {}.".format(
+            ", ".join(sorted(_WRITERS))))
+
+    if not combined and '*' not in filename:
+        base, ext = os.path.splitext(filename)
+        filename = base + '-*' + (ext or '.' + fmt)
+
+    boxes = label_bounding_boxes(cutout, ids)
+
+    def tasks():
+        for label, (lo, hi) in boxes.items():
+            box = cutout[lo[0]:hi[0], lo[1]:hi[1], lo[2]:hi[2]]
+            yield label, box == label, lo
+
+    if max_workers == 1:
+        results = ((label, _mesh_mask(mask, lo))
+                   for label, mask, lo in tasks())
+        return _write_labels(filename, fmt, combined, results)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [(label, pool.submit(_mesh_mask, mask, lo))
+                   for label, mask, lo in tasks()]
+        results = ((label, f.result()) for label, f in futures)
+        return _write_labels(filename, fmt, combined, results)
+
+
+def _write_labels(filename, fmt, combined, results):
+    written = {}
+    if not combined:
+        for label, (vs, fs) in results:
+            written[label] = filename.replace('*', str(label))
+            _WRITERS[fmt](written[label], vs, fs)
+        return written
+
+    all_vs, all_fs = [], []
+    n_verts = 0
+    for label, (vs, fs) in results:
+        all_vs.append(vs)
+        all_fs.append(fs + n_verts)
+        n_verts += len(vs)
+        written[label] = filename
+    if n_verts:
+        _WRITERS[fmt](filename, numpy.concatenate(all_vs),
+                      numpy.concatenate(all_fs))
+    return written
@@ -1,6 +1,10 @@
 from __future__ import absolute_import
 import numpy
 from six.moves import range
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# The default number of threads for concurrent HTTP requests.
+DEFAULT_WORKERS = 8
 
 
 def snap_to_cube(q_start, q_stop, chunk_depth=16, q_index=1):
@@ -109,3 +113,119 @@ def block_compute(x_start, x_stop,
             for z in z_slices:
                 chunks.append((x, y, z))
     return chunks
+
+
+def aligned_blocks(x_start, x_stop,
+                   y_start, y_stop,
+                   z_start, z_stop,
+                   block_size=(256, 256, 16),
+                   origin=(0, 0, 0)):
+    """
+    Split a bounding box into blocks that are aligned to the dataset's cubes,
+    i.e. whose boundaries fall on `origin + n * block_size`. Blocks on the
+    edge of the box are clipped to it.
+
+    Arguments:
+        Q_start (int): The lower bound of dimension 'Q'
+        Q_stop (int): The upper bound of dimension 'Q'
+        block_size (int[3] : (256, 256, 16)): The cube size of the dataset
+        origin (int[3] : (0, 0, 0)): The dataset coordinate of the first cube
+
+    Returns:
+        [((x_start, x_stop), (y_start, y_stop), (z_start, z_stop)), ... ]
+    """
+    slices = []
+    for start, stop, size, o in zip((x_start, y_start, z_start),
+                                    (x_stop, y_stop, z_stop),
+                                    block_size, origin):
+        edges = block_edges(start, stop, size, o)
+        slices.append(list(zip(edges[:-1], edges[1:])))
+
+    return [(x, y, z) for x in slices[0] for y in slices[1] for z in slices[2]]
+
+
+def block_edges(start, stop, size, origin=0):
+    """
+    Get the boundaries of the cube-aligned blocks that cover [start, stop) in
+    one dimension, including `start` and `stop` themselves.
+
+    Arguments:
+        start (int): The lower bound
+        stop (int): The upper bound
+        size (int): The cube size in this dimension
+        origin (int : 0): The coordinate of the first cube boundary
+
+    Returns:
+        int[]: The sorted boundaries
+    """
+    first = origin + ((start - origin) // size) * size
+    return [start] + list(range(first + size, stop, size)) + [stop]
+
+
+def nonempty_blocks(data, offset=(0, 0, 0), block_size=(256, 256, 16),
+                    origin=(0, 0, 0)):
+    """
+    Find the cube-aligned blocks of an array that hold any nonzero value.
+    Every block is tested at once, with one reduction per axis.
+
+    Arguments:
+        data (numpy.ndarray): The (x, y, z) array
+        offset (int[3] : (0, 0, 0)): The coordinate of element (0, 0, 0)
+        block_size (int[3] : (256, 256, 16)): The cube size of the dataset
+        origin (int[3] : (0, 0, 0)): The dataset coordinate of the first cube
+
+    Returns:
+        [((x_start, x_stop), (y_start, y_stop), (z_start, z_stop)), ... ]
+    """
+    edges = [block_edges(o, o + n, size, org) for o, n, size, org in
+             zip(offset, data.shape, block_size, origin)]
+
+    occupied = data != 0
+    for axis, e in enumerate(edges):
+        occupied = numpy.logical_or.reduceat(
+            occupied, numpy.asarray(e[:-1]) - offset[axis], axis=axis)
+
+    return [tuple((edges[d][i], edges[d][i + 1]) for d, i in enumerate(idx))
+            for idx in numpy.argwhere(occupied)]
+
+
+def imap_unordered(function, iterable, max_workers=DEFAULT_WORKERS,
+                   max_pending=None):
+    """
+    Call `function` on every item of `iterable` in a pool of threads, and
+    yield the results as they complete. Items are read from `iterable` only
+    as fast as they are processed, so a generator of work is never drained
+    into memory ahead of time.
+
+    Arguments:
+        function (function): Called with one item at a time
+        iterable (iterable): The items. May be a generator.
+        max_workers (int : DEFAULT_WORKERS): The number of threads
+        max_pending (int : None): The most items in flight (submitted but not
+            yet yielded) at once. Defaults to twice `max_workers`.
+
+    Returns:
+        generator: The results of `function`, in order of completion
+
+    Raises:
+        Exception: Whatever `function` raises. Work not yet started is
+            cancelled.
+    """
+    max_pending = max_pending or 2 * max_workers
+    pending = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            for item in iterable:
+                pending.add(pool.submit(function, item))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending,
+                                         return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,235 @@
+from __future__ import absolute_import
+import numpy
+
+from ndio.utils.parallel import aligned_blocks, imap_unordered
+
+
+class LabelStats(object):
+    """
+    Per-label voxel counts, bounding boxes and centroids of an annotation.
+
+    Statistics are computed one block at a time with `update`, so a whole
+    dataset can be summarized without ever holding it in memory. Every block
+    costs one sort of its nonzero voxels; there is no loop over labels.
+
+    All arrays are indexed like `labels`, which is sorted. Coordinates are in
+    the space of the `offset`s passed to `update` (e.g. dataset space).
+    """
+
+    def __init__(self, ndim=3):
+        """
+        Initialize an empty LabelStats.
+
+        Arguments:
+            ndim (int : 3): The number of dimensions of the annotation
+        """
+        self.labels = numpy.zeros(0, dtype=numpy.uint64)
+        self.counts = numpy.zeros(0, dtype=numpy.int64)
+        self.lo = numpy.zeros((0, ndim), dtype=numpy.int64)
+        self.hi = numpy.zeros((0, ndim), dtype=numpy.int64)
+        self._sums = numpy.zeros((0, ndim), dtype=numpy.float64)
+
+    def __len__(self):
+        """
+        The number of labels seen so far.
+        """
+        return len(self.labels)
+
+    @property
+    def centroids(self):
+        """
+        numpy.ndarray: The (N, ndim) mean coordinate of each label
+        """
+        return self._sums / self.counts[:, None]
+
+    def update(self, block, offset=None, ids=None):
+        """
+        Add the voxels of one block of an annotation.
+
+        Arguments:
+            block (numpy.ndarray): A dense annotation. 0 is background.
+            offset (int[] : None): The coordinate of element (0, 0, 0) of the
+                block. Defaults to the origin.
+            ids (int[] : None): Only count these labels
+
+        Returns:
+            LabelStats: self
+        """
+        self._merge(_block_stats(block, offset, ids))
+        return self
+
+    def merge(self, other):
+        """
+        Add the statistics of another LabelStats (e.g. from another process).
+
+        Arguments:
+            other (LabelStats): The statistics to add
+
+        Returns:
+            LabelStats: self
+        """
+        self._merge((other.labels, other.counts, other.lo, other.hi,
+                     other._sums))
+        return self
+
+    def _merge(self, stats):
+        if len(stats[0]) == 0:
+            return
+        if len(self.labels) == 0:
+            grouped = stats
+        else:
+            combined = [numpy.concatenate([a, b]) for a, b in
+                        zip((self.labels, self.counts, self.lo, self.hi,
+                             self._sums), stats)]
+            grouped = _group(*combined)
+        (self.labels, self.counts, self.lo, self.hi,
+         self._sums) = grouped
+        self.labels = self.labels.astype(numpy.uint64)
+
+    def bounding_boxes(self):
+        """
+        Get the bounding box of every label.
+
+        Returns:
+            dict: {id: (lo, hi)}, where `lo` and `hi` are the inclusive lower
+                and exclusive upper coordinates of the label's box
+        """
+        return {label.item(): (self.lo[i], self.hi[i])
+                for i, label in enumerate(self.labels)}
+
+    def to_dict(self):
+        """
+        Get every statistic of every label, as plain python values.
+
+        Returns:
+            dict: {id: {'count', 'lo', 'hi', 'centroid'}}
+        """
+        centroids = self.centroids
+        return {label.item(): {
+            'count': int(self.counts[i]),
+            'lo': self.lo[i].tolist(),
+            'hi': self.hi[i].tolist(),
+            'centroid': centroids[i].tolist()
+        } for i, label in enumerate(self.labels)}
+
+
+def label_stats(cutout, offset=None, ids=None):
+    """
+    Get the voxel count, bounding box and centroid of every label in a dense
+    annotation, in one pass.
+
+    Arguments:
+        cutout (numpy.ndarray): The dense annotation. 0 is background.
+        offset (int[] : None): The coordinate of element (0, 0, 0)
+        ids (int[] : None): Only count these labels
+
+    Returns:
+        LabelStats
+    """
+    return LabelStats(cutout.ndim).update(cutout, offset, ids)
+
+
+def remote_label_stats(remote, token, channel,
+                       x_start, x_stop,
+                       y_start, y_stop,
+                       z_start, z_stop,
+                       resolution=0,
+                       block_size=(512, 512, 16),
+                       ids=None,
+                       max_workers=4):
+    """
+    Get `label_stats` for a region of a remote annotation channel too large to
+    download at once. Cube-aligned blocks are downloaded by `max_workers`
+    threads, and each is summarized as it arrives.
+
+    Arguments:
+        remote (neurodata): The remote to download from
+        token (str): Token to identify data to download
+        channel (str): Channel
+        Q_start (int): The lower bound of dimension 'Q'
+        Q_stop (int): The upper bound of dimension 'Q'
+        resolution (int : 0): Resolution level
+        block_size (int[3] : (512, 512, 16)): The size of each download. Use
+            a multiple of the dataset's cube size.
+        ids (int[] : None): Only count these labels
+        max_workers (int : 4): The number of blocks to download at once
+
+    Returns:
+        LabelStats: with coordinates in dataset space
+    """
+    blocks = aligned_blocks(x_start, x_stop, y_start, y_stop,
+                            z_start, z_stop, block_size)
+
+    def summarize(b):
+        cutout = remote.get_cutout(token, channel,
+                                   b[0][0], b[0][1],
+                                   b[1][0], b[1][1],
+                                   b[2][0], b[2][1],
+                                   resolution=resolution)
+        return _block_stats(cutout, (b[0][0], b[1][0], b[2][0]), ids)
+
+    stats = LabelStats()
+    for block_stats in imap_unordered(summarize, blocks,
+                                      max_workers=max_workers):
+        stats._merge(block_stats)
+    return stats
+
+
+def _block_stats(block, offset=None, ids=None):
+    """
+    Get the (labels, counts, lo, hi, coordinate sums) of one block.
+    """
+    ndim = block.ndim
+    if offset is None:
+        offset = numpy.zeros(ndim, dtype=numpy.int64)
+    offset = numpy.asarray(offset, dtype=numpy.int64)
+
+    flat = numpy.ravel(block)
+    nz = numpy.flatnonzero(flat)
+    labels = flat[nz]
+    if ids is not None:
+        keep = numpy.isin(labels, numpy.asarray(ids, dtype=labels.dtype))
+        nz, labels = nz[keep], labels[keep]
+    if len(labels) == 0:
+        return (numpy.zeros(0, dtype=numpy.uint64),
+                numpy.zeros(0, dtype=numpy.int64),
+                numpy.zeros((0, ndim), dtype=numpy.int64),
+                numpy.zeros((0, ndim), dtype=numpy.int64),
+                numpy.zeros((0, ndim), dtype=numpy.float64))
+
+    order = numpy.argsort(labels, kind='mergesort')
+    labels = labels[order]
+    starts = _group_starts(labels)
+    coords = numpy.unravel_index(nz[order], block.shape)
+
+    counts = numpy.diff(numpy.append(starts, len(labels)))
+    lo = numpy.column_stack([numpy.minimum.reduceat(c, starts)
+                             for c in coords]) + offset
+    hi = numpy.column_stack([numpy.maximum.reduceat(c, starts)
+                             for c in coords]) + offset + 1
+    sums = numpy.column_stack([numpy.add.reduceat(c, starts, dtype=float)
+                               for c in coords]) + \
+        counts[:, None] * offset
+    return labels[starts], counts, lo, hi, sums
+
+
+def _group(labels, counts, lo, hi, sums):
+    """
+    Combine the rows of per-label statistics that share a label.
+    """
+    order = numpy.argsort(labels, kind='mergesort')
+    labels = labels[order]
+    starts = _group_starts(labels)
+    return (labels[starts],
+            numpy.add.reduceat(counts[order], starts),
+            numpy.minimum.reduceat(lo[order], starts, axis=0),
+            numpy.maximum.reduceat(hi[order], starts, axis=0),
+            numpy.add.reduceat(sums[order], starts, axis=0))
+
+
+def _group_starts(labels):
+    """
+    Get the index of the first element of each run of a sorted array.
+    """
+    return numpy.flatnonzero(numpy.concatenate([[True],
+                                                labels[1:] != labels[:-1]]))
@@ -61,6 +61,9 @@ manipulation.',
         "blosc==1.3.2",
         "jsonschema",
         "json-spec",
-        "tifffile"
+        "tifffile",
+        "scipy",
+        "six",
+        "futures; python_version < '3.0'"
     ]
 )
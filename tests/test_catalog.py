@@ -0,0 +1,161 @@
+import unittest
+import os
+import tempfile
+import shutil
+import threading
+from ndio.remote.catalog import catalog
+
+
+def _info(dataset, channels, imagesize, offset=None):
+    return {
+        'dataset': {'description': dataset,
+                    'imagesize': imagesize,
+                    'offset': offset or dict((r, [0, 0, 0])
+                                             for r in imagesize)},
+        'project': {'name': dataset + '_proj'},
+        'channels': dict((name, {'channel_type': kind, 'datatype': dtype})
+                         for name, kind, dtype in channels)
+    }
+
+
+class _remote(object):
+    """
+    Answers the metadata calls that the catalog makes, and records them.
+    """
+
+    def __init__(self):
+        self.infos = {
+            'kasthuri11': _info('kasthuri11', [('image', 'image', 'uint8')],
+                                {'0': [10752, 13312, 1850],
+                                 '1': [5376, 6656, 1850]},
+                                {'0': [0, 0, 1], '1': [0, 0, 1]}),
+            'kat11segments': _info('kasthuri11',
+                                   [('annotation', 'annotation', 'uint32')],
+                                   {'0': [10752, 13312, 1850]}),
+            'bock11': _info('bock11', [('image', 'image', 'uint8'),
+                                       ('mask', 'annotation', 'uint32')],
+                            {'0': [135424, 119808, 4156]}),
+        }
+        self.fetched = []
+        self.lock = threading.Lock()
+
+    def get_public_tokens(self):
+        return list(self.infos.keys())
+
+    def get_proj_info(self, token):
+        with self.lock:
+            self.fetched.append(token)
+        return self.infos[token]
+
+    get_cached_proj_info = get_proj_info
+
+
+class _resources(object):
+
+    def list_datasets(self, get_global_public):
+        return [{'dataset_name': 'kasthuri11', 'public': 1,
+                 'dataset_description': 'Kasthuri et al.'}]
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp, 'sub', 'catalog.sqlite')
+        self.remote = _remote()
+        self.catalog = catalog(self.remote, _resources(), self.filename)
+        self.catalog.sync(max_workers=2)
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.tmp)
+
+    def test_find(self):
+        c = self.catalog
+        self.assertEqual(c.tokens(),
+                         ['bock11', 'kasthuri11', 'kat11segments'])
+        self.assertEqual(c.find(dataset='kasthuri11'),
+                         ['kasthuri11', 'kat11segments'])
+        self.assertEqual(c.find(channel_type='annotation'),
+                         ['bock11', 'kat11segments'])
+        self.assertEqual(c.find(channel_type='image', datatype='uint32'), [])
+        self.assertEqual(c.find(resolution=1), ['kasthuri11'])
+        self.assertEqual(c.find(dataset='kasthuri11', datatype='uint8'),
+                         ['kasthuri11'])
+
+    def test_bbox(self):
+        c = self.catalog
+        self.assertEqual(c.find(bbox=(0, 100, 0, 100, 0, 10), resolution=0),
+                         ['bock11', 'kat11segments'])
+        self.assertEqual(c.find(bbox=(0, 100, 0, 100, 1, 10), resolution=0),
+                         ['bock11', 'kasthuri11', 'kat11segments'])
+        self.assertEqual(c.find(bbox=(0, 6000, 0, 100, 1, 10), resolution=1),
+                         [])
+        self.assertEqual(c.bounds('kasthuri11', 1),
+                         (0, 5376, 0, 6656, 1, 1851))
+        with self.assertRaises(KeyError):
+            c.bounds('bock11', 1)
+        with self.assertRaises(ValueError):
+            c.find(bbox=(0, 1))
+
+    def test_incremental_sync(self):
+        self.assertEqual(sorted(self.remote.fetched),
+                         ['bock11', 'kasthuri11', 'kat11segments'])
+        self.remote.fetched = []
+        del self.remote.infos['bock11']
+        self.remote.infos['takemura13'] = _info(
+            'takemura13', [('image', 'image', 'uint8')], {'0': [1, 1, 1]})
+        self.assertEqual(self.catalog.sync(), ['takemura13'])
+        self.assertEqual(self.remote.fetched, ['takemura13'])
+        self.assertEqual(self.catalog.find(channel_type='annotation'),
+                         ['kat11segments'])
+        self.assertEqual(self.catalog.channels('bock11'), {})
+
+        self.assertEqual(len(self.catalog.sync(refresh=True)), 3)
+
+    def test_bad_token_does_not_stop_sync(self):
+        self.remote.infos['broken'] = {'project': {'name': 'x'}}
+        self.remote.infos['missing'] = None
+        get_info = self.remote.get_proj_info
+
+        def get_proj_info(token):
+            if token == 'missing':
+                raise IOError('404')
+            return get_info(token)
+        self.remote.get_cached_proj_info = get_proj_info
+        self.remote.infos['takemura13'] = _info(
+            'takemura13', [('image', 'image', 'uint8')], {'0': [1, 1, 1]})
+
+        self.assertEqual(self.catalog.sync(), ['takemura13'])
+        self.assertEqual(sorted(self.catalog.errors), ['broken', 'missing'])
+        self.assertIn('takemura13', self.catalog.tokens())
+
+        # The bad tokens are tried again
+        self.remote.infos['broken'] = _info('b', [], {'0': [1, 1, 1]})
+        self.remote.fetched = []
+        self.assertEqual(self.catalog.sync(), ['broken'])
+        self.assertEqual(self.remote.fetched, ['broken'])
+        self.assertEqual(list(self.catalog.errors), ['missing'])
+
+    def test_persisted(self):
+        self.catalog.add('private', _info('mine', [('em', 'image', 'uint16')],
+                                          {'0': [5, 5, 5]}))
+        self.catalog.close()
+        with catalog(filename=self.filename) as c:
+            self.assertEqual(c.find(datatype='uint16'), ['private'])
+            self.assertEqual(c.find(public=False), ['private'])
+            self.assertEqual(c.datasets_and_tokens(),
+                             {'kasthuri11': ['kasthuri11', 'kat11segments'],
+                              'bock11': ['bock11']})
+            self.assertEqual(c.datasets()['kasthuri11']['public'], 1)
+            self.assertEqual(c.info('bock11'), self.remote.infos['bock11'])
+            self.assertEqual(c.channels('bock11'),
+                             {'image': ('image', 'uint8'),
+                              'mask': ('annotation', 'uint32')})
+            with self.assertRaises(ValueError):
+                c.sync()
+        self.catalog = catalog(filename=self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+import numpy
+import ndio.convert as ndconvert
+import ndio.convert.hdf5 as ndhdf5
+import ndio.convert.tiff as ndtiff
+
+
+class TestConvert(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.data = numpy.random.randint(0, 255, (40, 16, 24))\
+            .astype('uint8')
+        self.tif = os.path.join(self.dir, 'in.tif')
+        ndtiff.save(self.tif, self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_tiff_to_hdf5_streams(self):
+        out = os.path.join(self.dir, 'out.h5')
+        ndconvert.convert(self.tif, out, block_depth=7)
+        numpy.testing.assert_array_equal(ndhdf5.load(out), self.data)
+
+    def test_round_trip(self):
+        h5 = os.path.join(self.dir, 'mid.hdf5')
+        tif = os.path.join(self.dir, 'out.tiff')
+        ndconvert.convert(self.tif, h5)
+        ndconvert.convert(h5, tif)
+        numpy.testing.assert_array_equal(ndtiff.load(tif), self.data)
+
+    def test_same_format_copies(self):
+        out = os.path.join(self.dir, 'copy.tif')
+        self.assertEqual(ndconvert.convert(self.tif, out), out)
+        numpy.testing.assert_array_equal(ndtiff.load(out), self.data)
+
+    def test_register_format(self):
+        saved = {}
+
+        def save(filename, data):
+            saved[filename] = data
+            return filename
+
+        # Leave the registry as it was for the other tests
+        registry = sys.modules['ndio.convert.convert']
+        for table in (registry.FILE_FORMATS, registry._FORMAT_BACKENDS):
+            self.addCleanup(table.pop, 'fake', None)
+
+        ndconvert.register_format('fake', ['fake'], save=save)
+        out = os.path.join(self.dir, 'out.fake')
+        ndconvert.convert(self.tif, out)
+        numpy.testing.assert_array_equal(saved[out], self.data)
+
+    def test_save_no_blocks(self):
+        for module, name in ((ndhdf5, 'empty.h5'), (ndtiff, 'empty.tif')):
+            out = os.path.join(self.dir, name)
+            with self.assertRaises(ValueError):
+                module.save_blocks(out, iter([]))
+            self.assertFalse(os.path.exists(out))
+
+    def test_unsupported_pair(self):
+        with self.assertRaises(ValueError):
+            ndconvert.convert(self.tif, os.path.join(self.dir, 'out.mat'))
+
+    def test_convert_many(self):
+        jobs = [(self.tif, os.path.join(self.dir, '{}.h5'.format(i)))
+                for i in range(4)]
+        outs = ndconvert.convert_many(jobs, max_workers=2)
+        self.assertEqual(outs, [o for (_, o) in jobs])
+        for o in outs:
+            numpy.testing.assert_array_equal(ndhdf5.load(o), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
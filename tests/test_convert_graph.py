@@ -0,0 +1,228 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy
+import scipy.io
+import scipy.sparse
+import ndio.convert.graph as ndgraph
+
+
+class TestGraphRead(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        # 0-1 (weight 2), 1-2, 2-0, 2-3 (weight 5)
+        self.expected = numpy.zeros((4, 4))
+        self.expected[0, 1] = 2
+        self.expected[1, 2] = 1
+        self.expected[2, 0] = 1
+        self.expected[2, 3] = 5
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, name, text):
+        filename = os.path.join(self.tmp, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def check(self, filename, fmt=None, weighted=True):
+        graph, names = ndgraph.load(filename, fmt)
+        expected = self.expected if weighted else self.expected > 0
+        order = [names.index(n) for n in sorted(names, key=str)]
+        numpy.testing.assert_array_equal(
+            graph.toarray()[numpy.ix_(order, order)], expected)
+        return names
+
+    def test_edgelist(self):
+        names = self.check(self.write('g.edgelist', '0 1\n1 2\n2 0\n2 3\n'),
+                           weighted=False)
+        self.assertEqual(names, [0, 1, 2, 3])
+
+    def test_ncol(self):
+        names = self.check(self.write('g.ncol',
+                                      'a b 2\nb c\nc a\nc d 5\n'))
+        self.assertEqual(sorted(names), ['a', 'b', 'c', 'd'])
+
+    def test_lgl(self):
+        self.check(self.write('g.lgl', '# a\nb 2\n# b\nc\n# c\na\nd 5\n'))
+
+    def test_pajek(self):
+        self.check(self.write('g.net', '*Vertices 4\n1 "a"\n2 "b"\n3 "c"\n'
+                              '4 "d"\n*Arcs\n1 2 2\n2 3\n3 1\n3 4 5\n'))
+
+    def test_graphml(self):
+        self.check(self.write('g.graphml', '''<?xml version="1.0"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+  <key id="w" for="edge" attr.name="weight" attr.type="double"/>
+  <graph edgedefault="directed">
+    <node id="a"/><node id="b"/><node id="c"/><node id="d"/>
+    <edge source="a" target="b"><data key="w">2</data></edge>
+    <edge source="b" target="c"/>
+    <edge source="c" target="a"/>
+    <edge source="c" target="d"><data key="w">5.0</data></edge>
+  </graph>
+</graphml>'''))
+
+    def test_graphml_undirected(self):
+        graphml = self.write('g.graphml', '''<?xml version="1.0"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+  <graph edgedefault="undirected">
+    <edge source="a" target="b"/>
+    <edge source="b" target="b"/>
+    <edge source="b" target="c" directed="true"/>
+  </graph>
+</graphml>''')
+        graph, names = ndgraph.load(graphml)
+        self.assertEqual(names, ['a', 'b', 'c'])
+        numpy.testing.assert_array_equal(
+            graph.toarray(), [[0, 1, 0], [1, 1, 1], [0, 0, 0]])
+
+    def test_pajek_unlabelled(self):
+        # Unlabelled vertex 2 must not be named 1, which is vertex 3's label,
+        # so it is numbered after the largest label
+        edges = list(ndgraph.iter_edges(self.write(
+            'g.net', '*Vertices 3\n1 "a"\n2\n3 "1"\n*Arcs\n1 2\n2 3\n')))
+        self.assertEqual(edges, [('a', 3, None), (3, 1, None)])
+
+    def test_matrices(self):
+        filename = os.path.join(self.tmp, 'g.npy')
+        numpy.save(filename, self.expected)
+        self.check(filename)
+
+        filename = os.path.join(self.tmp, 'g.mat')
+        scipy.io.savemat(filename,
+                         {'graph': scipy.sparse.csc_matrix(self.expected)})
+        self.check(filename)
+        self.assertEqual(sorted(ndgraph.iter_edges(filename)),
+                         [(0, 1, 2), (1, 2, 1), (2, 0, 1), (2, 3, 5)])
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            ndgraph.load(self.write('g.xyz', ''))
+        with self.assertRaises(ValueError):
+            ndgraph.load(self.write('g.db', ''), 'graphdb')
+
+
+class TestGraphConvert(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.ncol = os.path.join(self.tmp, 'g.ncol')
+        with open(self.ncol, 'w') as f:
+            f.write('a b 2\nb c\nc a\nc d 5\na e&<\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def canonical(self, filename):
+        # Order vertices by name, numerically where they are numbers, since
+        # matrix formats number the vertices of named graphs
+        graph, names = ndgraph.load(filename)
+        order = sorted(range(len(names)), key=lambda i: (
+            int(names[i]) if str(names[i]).isdigit() else names[i]))
+        return graph.toarray()[numpy.ix_(order, order)]
+
+    def test_round_trip(self):
+        expected = self.canonical(self.ncol)
+        for fmt in ['ncol', 'lgl', 'pajek', 'graphml', 'numpy', 'mat']:
+            out = os.path.join(self.tmp,
+                               "out." + ndgraph.GRAPH_FORMATS[fmt][0])
+            self.assertEqual(ndgraph.convert(self.ncol, out), out)
+            back = os.path.join(self.tmp, 'back.ncol')
+            ndgraph.convert(out, back)
+            numpy.testing.assert_array_equal(self.canonical(back), expected,
+                                             err_msg=fmt)
+
+    def test_pajek_labels(self):
+        net = os.path.join(self.tmp, 'g.net')
+        back = os.path.join(self.tmp, 'back.ncol')
+        ndgraph.convert(self.ncol, net)
+        ndgraph.convert(net, back)
+        with open(back) as f:
+            self.assertEqual(f.readline(), 'a b 2\n')
+
+    def test_isolated_vertices(self):
+        graph = numpy.zeros((4, 4))
+        graph[1, 2] = 1
+        npy = os.path.join(self.tmp, 'g.npy')
+        numpy.save(npy, graph)
+        for fmt in ['lgl', 'pajek', 'graphml', 'mat']:
+            out = os.path.join(self.tmp,
+                               "out." + ndgraph.GRAPH_FORMATS[fmt][0])
+            back = os.path.join(self.tmp, 'back.npy')
+            ndgraph.convert(npy, out)
+            ndgraph.convert(out, back)
+            numpy.testing.assert_array_equal(numpy.load(back), graph,
+                                             err_msg=fmt)
+        self.assertEqual(list(ndgraph.iter_graph(npy))[:2],
+                         [(0, None, None), (1, None, None)])
+        self.assertEqual(list(ndgraph.iter_edges(npy)), [(1, 2, 1)])
+
+    def test_graphml_tree_is_freed(self):
+        import xml.etree.ElementTree as ET
+        graphml = os.path.join(self.tmp, 'g.graphml')
+        ndgraph.convert(self.ncol, graphml)
+        roots = []
+        iterparse = ET.iterparse
+
+        def spy(*args, **kwargs):
+            for event, elem in iterparse(*args, **kwargs):
+                if not roots:
+                    roots.append(elem)
+                yield event, elem
+        ndgraph.ET.iterparse = spy
+        try:
+            self.assertEqual(len(list(ndgraph.iter_edges(graphml))), 5)
+        finally:
+            ndgraph.ET.iterparse = iterparse
+        graph = roots[0].find('{http://graphml.graphdrawing.org/xmlns}graph')
+        self.assertEqual(len(graph), 0)
+
+    def test_edgelist(self):
+        out = os.path.join(self.tmp, 'g.edgelist')
+        ndgraph.convert(self.ncol, out)
+        with open(out) as f:
+            self.assertEqual(f.read(), '0 1\n1 2\n2 0\n2 3\n0 4\n')
+
+    def test_edgelist_mixed_names(self):
+        out = ndgraph.save_edges(os.path.join(self.tmp, 'g.edgelist'),
+                                 [(5, 'a', None), ('b', 0, None)])
+        with open(out) as f:
+            self.assertEqual(f.read(), '5 6\n7 0\n')
+
+    def test_streaming(self):
+        def edges():
+            for i in range(1000):
+                yield i, i + 1, None
+        out = ndgraph.save_edges(os.path.join(self.tmp, 'chain.net'), edges())
+        graph, names = ndgraph.load(out)
+        self.assertEqual(graph.shape, (1001, 1001))
+        self.assertEqual(graph.nnz, 1000)
+        self.assertEqual(graph[999, 1000], 1)
+
+    def test_convert_dir(self):
+        in_dir = os.path.join(self.tmp, 'in')
+        os.makedirs(in_dir)
+        for i in range(3):
+            numpy.save(os.path.join(in_dir, 'g{}.npy'.format(i)),
+                       numpy.eye(5, k=i + 1))
+        with open(os.path.join(in_dir, 'notes.md'), 'w') as f:
+            f.write('not a graph')
+
+        out_dir = os.path.join(self.tmp, 'out')
+        for workers in (1, 2):
+            converted = ndgraph.convert_dir(in_dir, out_dir, 'graphml',
+                                            max_workers=workers)
+            self.assertEqual(sorted(os.path.basename(o) for o in
+                                    converted.values()),
+                             ['g0.graphml', 'g1.graphml', 'g2.graphml'])
+            for i, o in converted.items():
+                self.assertEqual(ndgraph.load(o)[0].nnz,
+                                 ndgraph.load(i)[0].nnz)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import os
+import tempfile
+import shutil
+from io import BytesIO
+import numpy
+import tifffile
+from PIL import Image
+from ndio.convert import probe as ndprobe
+
+
+class _response(object):
+
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class _session(object):
+
+    def __init__(self, content):
+        self.content = content
+        self.ranges = []
+
+    def get(self, url, headers=None, stream=False):
+        lo, hi = [int(i) for i in headers['Range'][6:].split('-')]
+        self.ranges.append((lo, hi))
+        return _response(206, self.content[lo:hi + 1])
+
+
+class TestProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def tiff(self, data, **kwargs):
+        filename = os.path.join(self.tmp, 'img.tiff')
+        tifffile.imwrite(filename, data, **kwargs)
+        return filename
+
+    def png(self, img):
+        buf = BytesIO()
+        img.save(buf, 'PNG')
+        return buf.getvalue()
+
+    def test_png(self):
+        info = ndprobe.probe_bytes(self.png(Image.fromarray(
+            numpy.zeros((30, 40), dtype=numpy.uint8))))
+        self.assertEqual(info, ('png', 40, 30, 'uint8', 1, 1))
+
+        info = ndprobe.probe_bytes(self.png(Image.fromarray(
+            numpy.zeros((30, 40, 3), dtype=numpy.uint8))))
+        self.assertEqual((info.width, info.height, info.samples),
+                         (40, 30, 3))
+
+        info = ndprobe.probe_bytes(self.png(Image.fromarray(
+            numpy.zeros((30, 40), dtype=numpy.uint16))))
+        self.assertEqual(info.dtype, 'uint16')
+
+    def test_tiff(self):
+        info = ndprobe.probe(self.tiff(
+            numpy.zeros((30, 40), dtype=numpy.uint16)))
+        self.assertEqual(info, ('tiff', 40, 30, 'uint16', 1, 1))
+
+    def test_tiff_stack(self):
+        filename = self.tiff(numpy.zeros((7, 30, 40), dtype=numpy.float32),
+                             photometric='minisblack', contiguous=False)
+        info = ndprobe.probe(filename)
+        self.assertEqual(info, ('tiff', 40, 30, 'float32', 1, 7))
+        self.assertEqual(ndprobe.probe(filename, count_pages=False).pages,
+                         None)
+
+    def test_tiff_variants(self):
+        data = numpy.zeros((3, 30, 40), dtype=numpy.int16)
+        for kwargs in ({'byteorder': '>'}, {'bigtiff': True}):
+            filename = self.tiff(data, photometric='minisblack',
+                                 contiguous=False, **kwargs)
+            with open(filename, 'rb') as f:
+                info = ndprobe.probe(f)
+            self.assertEqual(info, ('tiff', 40, 30, 'int16', 1, 3))
+
+        filename = self.tiff(numpy.zeros((30, 40, 3), dtype=numpy.uint8),
+                             photometric='rgb')
+        self.assertEqual(ndprobe.probe(filename).samples, 3)
+
+    def test_url(self):
+        # Large enough that the pixels span many blocks
+        filename = self.tiff(numpy.zeros((600, 600), dtype=numpy.uint8))
+        with open(filename, 'rb') as f:
+            session = _session(f.read())
+        info = ndprobe.probe_url('http://h/img.tiff', session)
+        self.assertEqual((info.width, info.height), (600, 600))
+        self.assertLessEqual(len(session.ranges), 2)
+        for lo, hi in session.ranges:
+            self.assertEqual(hi - lo + 1, ndprobe.BLOCK_SIZE)
+
+    def test_not_an_image(self):
+        with self.assertRaises(ValueError):
+            ndprobe.probe_bytes(b'GIF89a' + b'\x00' * 100)
+        with self.assertRaises(ValueError):
+            ndprobe.probe_bytes(ndprobe.PNG_SIGNATURE + b'\x00\x00')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import tempfile
+import shutil
+import numpy
+import tifffile
+import ndio.convert.tiff as ndtiff
+
+
+class TestMultipageTiff(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.data = numpy.arange(6 * 20 * 30, dtype='uint16')\
+            .reshape(6, 20, 30)
+        self.raw = os.path.join(self.dir, 'raw.tif')
+        self.zipped = os.path.join(self.dir, 'zipped.tif')
+        tifffile.imwrite(self.raw, self.data)
+        tifffile.imwrite(self.zipped, self.data, compression='zlib')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_uncompressed_is_memmapped(self):
+        with ndtiff.MultipageTiff(self.raw) as stack:
+            self.assertTrue(stack.is_memmapped)
+            self.assertEqual(stack.shape, (6, 20, 30))
+
+    def test_region_read(self):
+        expected = self.data[1:4, 5:15, 10:12].transpose(2, 1, 0)
+        for f in [self.raw, self.zipped]:
+            with ndtiff.MultipageTiff(f) as stack:
+                region = stack.read(10, 12, 5, 15, 1, 4)
+                self.assertEqual(region.dtype, numpy.uint16)
+                numpy.testing.assert_array_equal(region, expected)
+
+    def test_region_read_zyx(self):
+        region = ndtiff.load_tiff_region(self.zipped, z_start=2, z_stop=3,
+                                         order='zyx')
+        numpy.testing.assert_array_equal(region, self.data[2:3])
+
+    def test_load_tiff_multipage(self):
+        im = ndtiff.load_tiff_multipage(self.raw, dtype=None)
+        self.assertEqual(im.dtype, numpy.uint16)
+        numpy.testing.assert_array_equal(im, self.data.transpose(2, 1, 0))
+
+    def test_pages_share_one_memmap(self):
+        # Pages written separately are not one contiguous stack
+        pages = os.path.join(self.dir, 'pages.tif')
+        with tifffile.TiffWriter(pages) as tw:
+            for page in self.data:
+                tw.write(page, contiguous=False, metadata=None)
+        with ndtiff.MultipageTiff(pages) as stack:
+            self.assertFalse(stack.is_memmapped)
+            region = stack.read(10, 12, 5, 15, 1, 4)
+            raw = stack._raw
+            numpy.testing.assert_array_equal(
+                region, self.data[1:4, 5:15, 10:12].transpose(2, 1, 0))
+            stack.read(z_start=4)
+            self.assertIs(stack._raw, raw)
+        self.assertIsNone(stack._raw)
+
+    def test_rgb_rejected(self):
+        rgb = os.path.join(self.dir, 'rgb.tif')
+        tifffile.imwrite(rgb, numpy.zeros((3, 20, 30, 3), dtype='uint8'),
+                         photometric='rgb')
+        with self.assertRaises(ValueError):
+            ndtiff.MultipageTiff(rgb)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import numpy
+import ndio.convert.volume as ndvol
+
+
+class TestVolume(unittest.TestCase):
+
+    def setUp(self):
+        self.labels = numpy.zeros((20, 30, 10), dtype='uint32')
+        self.labels[2:5, 3:9, 1:4] = 7
+        self.labels[10:12, 20:29, 5:9] = 70000
+
+    def test_voxel_round_trip(self):
+        voxels, values = ndvol.to_voxels(self.labels, labels=True)
+        self.assertEqual(voxels.dtype, numpy.uint16)
+        self.assertEqual(len(voxels), numpy.count_nonzero(self.labels))
+        dense = ndvol.from_voxels(voxels, shape=self.labels.shape,
+                                  labels=values)
+        numpy.testing.assert_array_equal(dense, self.labels)
+
+    def test_voxels_with_offset(self):
+        voxels = ndvol.to_voxels(self.labels, offset=(100, 200, 300))
+        self.assertEqual(tuple(voxels.min(axis=0)), (102, 203, 301))
+        dense = ndvol.from_voxels(voxels, offset=(102, 203, 301))
+        self.assertEqual(dense.shape, (10, 26, 8))
+        self.assertEqual(dense.dtype, bool)
+        self.assertEqual(dense.sum(), numpy.count_nonzero(self.labels))
+
+    def test_rle_round_trip(self):
+        rle = ndvol.to_rle(self.labels)
+        self.assertEqual(rle.shape[1], 3)
+        numpy.testing.assert_array_equal(
+            ndvol.from_rle(rle, self.labels.shape, dtype='uint32'),
+            self.labels)
+
+    def test_sparse_rle(self):
+        voxels, values = ndvol.to_voxels(self.labels, labels=True)
+        rle = ndvol.voxels_to_rle(voxels, self.labels.shape, labels=values)
+        numpy.testing.assert_array_equal(rle, ndvol.to_rle(self.labels))
+        back, back_values = ndvol.rle_to_voxels(rle, self.labels.shape,
+                                                labels=True)
+        numpy.testing.assert_array_equal(back, voxels)
+        numpy.testing.assert_array_equal(back_values, values)
+
+    def test_negative_and_float(self):
+        voxels = ndvol.to_voxels(self.labels, offset=(-100, 0, 0))
+        self.assertEqual(voxels.dtype, numpy.int16)
+        self.assertEqual(int(voxels[:, 0].min()), -98)
+        back = ndvol.rle_to_voxels(ndvol.to_rle(self.labels),
+                                   self.labels.shape, offset=(-100, 0, 0))
+        numpy.testing.assert_array_equal(back, voxels)
+
+        signed = self.labels.astype('int32')
+        signed[0, 0, 0] = -5
+        rle = ndvol.to_rle(signed)
+        decoded = ndvol.from_rle(rle, signed.shape, dtype=signed.dtype)
+        self.assertEqual(decoded.dtype, numpy.int32)
+        numpy.testing.assert_array_equal(decoded, signed)
+
+        with self.assertRaises(ValueError):
+            ndvol.to_rle(self.labels.astype(float))
+        with self.assertRaises(ValueError):
+            ndvol.voxels_to_rle([[0, 0, 0]], (2, 2, 2), labels=[0.5])
+        with self.assertRaises(ValueError):
+            ndvol.compact_dtype(2 ** 64, -1)
+
+    def test_outside_shape(self):
+        below = [[0, 0, 0], [1, 1, 1]]
+        with self.assertRaises(IndexError):
+            ndvol.from_voxels(below, shape=(2, 2, 2), offset=(1, 1, 1))
+        with self.assertRaises(IndexError):
+            ndvol.from_voxels(below, offset=(1, 1, 1))
+        with self.assertRaises(IndexError):
+            ndvol.voxels_to_rle(below, (2, 2, 2), offset=(1, 1, 1))
+        with self.assertRaises(IndexError):
+            ndvol.from_voxels([[2, 0, 0]], shape=(2, 2, 2))
+
+    def test_empty(self):
+        empty = numpy.zeros((4, 4, 4), dtype='uint8')
+        self.assertEqual(len(ndvol.to_voxels(empty)), 0)
+        self.assertEqual(len(ndvol.to_rle(empty)), 0)
+        numpy.testing.assert_array_equal(
+            ndvol.from_rle(ndvol.to_rle(empty), (4, 4, 4)), empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import zipfile
+from io import BytesIO
+from requests.utils import super_len
+from ndio.remote.grute import grute, JobManager
+from ndio.remote.errors import RemoteDataUploadError
+
+# ndio.remote.grute is shadowed by the grute class
+grute_module = sys.modules['ndio.remote.grute']
+
+
+class TestJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.backoff = grute_module.RETRY_BACKOFF
+        grute_module.RETRY_BACKOFF = 0
+
+    def tearDown(self):
+        grute_module.RETRY_BACKOFF = self.backoff
+
+    def test_results_and_failures(self):
+        def job(i):
+            if i % 3 == 0:
+                raise ValueError(i)
+            return i * 2
+
+        with JobManager(max_workers=3) as jobs:
+            futures = [jobs.submit('job{}'.format(i), job, i)
+                       for i in range(10)]
+            self.assertTrue(jobs.wait())
+
+        self.assertEqual(futures[1].result(), 2)
+        self.assertEqual(futures[1].name, 'job1')
+        self.assertEqual(jobs.results(),
+                         [('job{}'.format(i), i * 2) for i in range(10)
+                          if i % 3])
+        self.assertEqual([name for name, e in jobs.failures()],
+                         ['job0', 'job3', 'job6', 'job9'])
+        self.assertTrue(all(isinstance(e, ValueError)
+                            for name, e in jobs.failures()))
+
+    def test_bounded(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def job(i):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            threading.Event().wait(0.01)
+            with lock:
+                running[0] -= 1
+
+        with JobManager(max_workers=2) as jobs:
+            for i in range(8):
+                jobs.submit(i, job, i)
+            jobs.wait()
+        self.assertEqual(running[1], 2)
+
+    def test_retries(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise grute_module._TransientUploadError('try again')
+            return 'ok'
+
+        with JobManager(retries=2) as jobs:
+            self.assertEqual(jobs.submit('f', flaky).result(), 'ok')
+        self.assertEqual(len(calls), 3)
+
+        del calls[:]
+        with JobManager(retries=1) as jobs:
+            future = jobs.submit('f', flaky)
+            with self.assertRaises(RemoteDataUploadError):
+                future.result()
+        self.assertEqual(len(calls), 2)
+
+    def test_retries_only_transient(self):
+        for status, posts in ((500, 3), (400, 1)):
+            g = grute(email='a@b.c', retries=2)
+            g.session = _session(status)
+            future = g.jobs.submit('f', g._upload, 'u/', [__file__], None,
+                                   'zip', 'upload')
+            with self.assertRaises(RemoteDataUploadError):
+                future.result()
+            self.assertEqual(len(g.session.posts), posts)
+            g.jobs.shutdown()
+
+    def test_cancel(self):
+        gate = threading.Event()
+        jobs = JobManager(max_workers=1)
+        first = jobs.submit('first', gate.wait)
+        rest = [jobs.submit(i, gate.wait) for i in range(5)]
+        self.assertEqual(jobs.cancel(), 5)
+        gate.set()
+        jobs.shutdown()
+        self.assertTrue(first.result())
+        self.assertTrue(all(f.cancelled() for f in rest))
+
+
+class TestGruteThreads(unittest.TestCase):
+
+    def test_build_graph_future(self):
+        g = grute(email='a@b.c', max_jobs=2)
+        responses = []
+        g._run_build_graph = lambda url, fiber, atlas, callback: \
+            callback(url) or url
+        future = g.build_graph('p', 's', 'sub', 'ses', 'scan', grute.SMALL,
+                               use_threads=True,
+                               callback=lambda r: responses.append(r))
+        self.assertTrue(future.result().startswith('buildgraph/p/s/'))
+        self.assertEqual(responses, [future.result()])
+        g.jobs.shutdown()
+
+    def test_bad_callback(self):
+        g = grute(email='a@b.c')
+        with self.assertRaises(ValueError):
+            g.build_graph('p', 's', 'sub', 'ses', 'scan', grute.SMALL,
+                          use_threads=True, callback=lambda a, b: None)
+        g.jobs.shutdown()
+
+
+class _response(object):
+
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+
+
+class _session(object):
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.posts = []
+
+    def post(self, url, data=None):
+        # What requests would send as the Content-Length
+        length = super_len(data)
+        self.posts.append((url, data.read(), length))
+        return _response(self.status_code, b'http://results')
+
+
+class TestGruteUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.graph = os.path.join(self.tmp, 'graph.graphml')
+        with open(self.graph, 'w') as f:
+            f.write('<graphml>' + '<node/>' * 100000 + '</graphml>')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def upload(self, g):
+        g.session = _session()
+        self.assertEqual(g.convert_graph(self.graph, 'graphml', ['ncol'],
+                                         email='a@b.c'), b'http://results')
+        url, body, length = g.session.posts[0]
+        self.assertTrue(url.endswith('/graph-services/convert/a@b.c/'
+                                     'graphml/ncol/l'))
+        self.assertEqual(length, len(body))
+        archive = zipfile.ZipFile(BytesIO(body))
+        info, = archive.infolist()
+        with open(self.graph, 'rb') as f:
+            self.assertEqual(archive.read(info), f.read())
+        return info, length
+
+    def test_stored(self):
+        info, length = self.upload(grute())
+        self.assertEqual(info.compress_type, zipfile.ZIP_STORED)
+        self.assertGreater(length, info.file_size)
+
+    def test_compressed(self):
+        info, length = self.upload(grute(compress=True))
+        self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertLess(length, info.file_size / 10)
+
+    def test_failed_upload(self):
+        g = grute()
+        g.session = _session(500)
+        with self.assertRaises(RemoteDataUploadError):
+            g.compute_invariants(self.graph, 'graphml', email='a@b.c')
+
+    def test_build_graph_atlas(self):
+        atlas = os.path.join(self.tmp, 'atlas.nii')
+        with open(atlas, 'wb') as f:
+            f.write(b'atlas')
+        g = grute(email='a@b.c')
+        g.session = _session()
+        g.build_graph('p', 's', 'sub', 'ses', 'scan', grute.SMALL,
+                      fiber_file=self.graph, atlas_file=atlas)
+        archive = zipfile.ZipFile(BytesIO(g.session.posts[0][1]))
+        self.assertEqual(len(archive.namelist()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
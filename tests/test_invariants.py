@@ -0,0 +1,95 @@
+import unittest
+import itertools
+import os
+import shutil
+import tempfile
+import numpy
+import scipy.sparse
+import ndio.utils.invariants as inv
+from ndio.remote.grute import Invariants
+
+
+def _random_graph(n, p, seed):
+    rng = numpy.random.RandomState(seed)
+    a = numpy.triu(rng.rand(n, n) < p, 1)
+    return (a | a.T).astype(float)
+
+
+class TestInvariants(unittest.TestCase):
+
+    def setUp(self):
+        self.dense = _random_graph(30, 0.2, 0)
+
+    def test_against_brute_force(self):
+        a = self.dense
+        n = len(a)
+        deg = a.sum(axis=1)
+        tri = numpy.zeros(n)
+        for i, j, k in itertools.combinations(range(n), 3):
+            if a[i, j] and a[j, k] and a[i, k]:
+                tri[[i, j, k]] += 1
+        ss1 = numpy.array([a[numpy.ix_(nb, nb)].sum() / 2 for nb in
+                           [numpy.flatnonzero(a[i]).tolist() + [i]
+                            for i in range(n)]])
+
+        # Directed input, with a self-loop, gives the same simple graph
+        directed = scipy.sparse.csr_matrix(numpy.triu(a) * 3)
+        directed[0, 0] = 1
+        results = inv.compute_invariants(directed, k=5)
+
+        numpy.testing.assert_array_equal(results['deg'], deg)
+        numpy.testing.assert_array_equal(results['tri'], tri)
+        numpy.testing.assert_array_equal(results['ss1'], ss1)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            cc = numpy.nan_to_num(tri / (deg * (deg - 1) / 2))
+        numpy.testing.assert_allclose(results['cc'], cc)
+
+        values = numpy.linalg.eigvalsh(a)
+        top = values[numpy.argsort(-numpy.abs(values))[:5]]
+        numpy.testing.assert_allclose(results['eig'][0],
+                                      numpy.sort(top)[::-1])
+        self.assertEqual(results['eig'][1].shape, (n, 5))
+        self.assertAlmostEqual(results['mad'], values.max())
+
+    def test_small_graphs(self):
+        results = inv.compute_invariants(numpy.array([[0, 1], [1, 0]]))
+        numpy.testing.assert_allclose(results['eig'][0], [1, -1])
+        self.assertAlmostEqual(results['mad'], 1)
+        self.assertEqual(inv.compute_invariants(
+            numpy.zeros((0, 0)), [Invariants.EIGENS])['eig'][0].shape, (0,))
+
+    def test_no_edges(self):
+        results = inv.compute_invariants(scipy.sparse.csr_matrix((300, 300)))
+        self.assertEqual(results['mad'], 0)
+        numpy.testing.assert_array_equal(results['eig'][0], numpy.zeros(100))
+        self.assertEqual(results['eig'][1].shape, (300, 100))
+        numpy.testing.assert_array_equal(results['deg'], numpy.zeros(300))
+
+    def test_subset(self):
+        results = inv.compute_invariants(self.dense, [Invariants.cc])
+        self.assertEqual(list(results), ['cc'])
+        with self.assertRaises(ValueError):
+            inv.compute_invariants(self.dense, ['nope'])
+
+    def test_many(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            filenames = []
+            for seed in range(3):
+                filenames.append(os.path.join(tmp, '{}.npy'.format(seed)))
+                numpy.save(filenames[-1], _random_graph(20, 0.3, seed))
+            for workers in (1, 2):
+                results = inv.compute_invariants_many(
+                    filenames, invariants=['deg', 'tri'],
+                    max_workers=workers)
+                self.assertEqual(sorted(results), filenames)
+                for seed, f in enumerate(filenames):
+                    numpy.testing.assert_array_equal(
+                        results[f]['deg'],
+                        _random_graph(20, 0.3, seed).sum(axis=1))
+        finally:
+            shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import os
+import tempfile
+import shutil
+import numpy
+from ndio.utils import mesh
+
+
+class TestMesh(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        z, y, x = numpy.mgrid[:40, :50, :45]
+        self.vol = (((z - 20) ** 2 + (y - 25) ** 2 + (x - 22) ** 2) <
+                    15 ** 2).astype('uint8')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_chunked_matches_whole(self):
+        vs, fs = mesh.marching_cubes(self.vol, 0.5)
+        cvs, cfs = mesh.marching_cubes(self.vol, 0.5, (16, 16, 16))
+        self.assertEqual(len(cvs), len(vs))
+        self.assertEqual(len(cfs), len(fs))
+        numpy.testing.assert_allclose(
+            cvs, numpy.unique(numpy.round(vs, 4), axis=0))
+
+    def test_binary_ply(self):
+        vs, fs = mesh.marching_cubes(self.vol, 0.5)
+        fn = mesh.write_ply(os.path.join(self.dir, 'm.ply'), vs, fs)
+        with open(fn, 'rb') as fh:
+            content = fh.read()
+        header, body = content.split(b'end_header\n')
+        self.assertIn(b'binary_little_endian', header)
+        self.assertEqual(len(body), len(vs) * 12 + len(fs) * 13)
+
+    def test_stl(self):
+        vs, fs = mesh.marching_cubes(self.vol, 0.5)
+        fn = mesh.write_stl(os.path.join(self.dir, 'm.stl'), vs, fs)
+        self.assertEqual(os.path.getsize(fn), 84 + 50 * len(fs))
+
+    def test_label_bounding_boxes(self):
+        labels = numpy.zeros((20, 20, 20), dtype='uint32')
+        labels[1:4, 2:5, 3:6] = 9
+        labels[10:12, 10:11, 0:20] = 4
+        boxes = mesh.label_bounding_boxes(labels)
+        self.assertEqual(sorted(boxes), [4, 9])
+        self.assertEqual(tuple(boxes[9][0]), (1, 2, 3))
+        self.assertEqual(tuple(boxes[9][1]), (4, 5, 6))
+        self.assertEqual(tuple(boxes[4][1]), (12, 11, 20))
+
+    def test_export_labels(self):
+        labels = self.vol.astype('uint32') * 3
+        labels[0:5, 0:5, 0:5] = 8
+        out = mesh.export_labels(os.path.join(self.dir, 'seg.ply'), labels,
+                                 max_workers=2)
+        self.assertEqual(sorted(out), [3, 8])
+        for fn in out.values():
+            self.assertTrue(os.path.exists(fn))
+        scene = os.path.join(self.dir, 'scene.stl')
+        out = mesh.export_labels(scene, labels, fmt='stl', combined=True,
+                                 max_workers=1)
+        self.assertEqual(set(out.values()), set([scene]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import threading
+import time
+from ndio.remote.data import data
+
+
+class _response(object):
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class TestPublicDatasets(unittest.TestCase):
+    """
+    Exercises the concurrent lookup of public tokens without a server, by
+    answering `public_tokens/` and `<token>/info/` locally.
+    """
+
+    def setUp(self):
+        self.remote = data()
+        self.tokens = ['a', 'b', 'c', 'd', 'e']
+        self.datasets = {'a': 'kasthuri', 'b': 'bock', 'c': 'kasthuri',
+                         'd': 'bock', 'e': 'kasthuri'}
+        self.fetched = []
+        self.active = [0, 0]
+        self.lock = threading.Lock()
+
+        def get_url(url):
+            if url.endswith('public_tokens/'):
+                return _response(list(self.tokens))
+            token = url.rstrip('/').split('/')[-2]
+            with self.lock:
+                self.fetched.append(token)
+                self.active[0] += 1
+                self.active[1] = max(self.active)
+            time.sleep(0.01)
+            with self.lock:
+                self.active[0] -= 1
+            return _response({'dataset': {
+                'description': self.datasets[token]}})
+        self.remote.remote_utils.get_url = get_url
+
+    def test_datasets_and_tokens(self):
+        result = self.remote.get_public_datasets_and_tokens(max_workers=3)
+        self.assertEqual(result, {'kasthuri': ['a', 'c', 'e'],
+                                  'bock': ['b', 'd']})
+        self.assertEqual(sorted(self.fetched), self.tokens)
+        self.assertGreater(self.active[1], 1)
+        self.assertLessEqual(self.active[1], 3)
+
+    def test_incremental(self):
+        self.remote.get_public_datasets_and_tokens()
+        self.tokens.append('f')
+        self.datasets['f'] = 'takemura'
+        self.fetched = []
+        result = self.remote.get_public_datasets_and_tokens()
+        self.assertEqual(self.fetched, ['f'])
+        self.assertEqual(result['takemura'], ['f'])
+
+        self.fetched = []
+        self.assertEqual(sorted(self.remote.get_public_datasets(
+            refresh=True)), ['bock', 'kasthuri', 'takemura'])
+        self.assertEqual(sorted(self.fetched), self.tokens)
+
+    def test_cached_proj_info(self):
+        self.remote.get_cached_proj_info('a')
+        self.remote.get_cached_proj_info('a')
+        self.assertEqual(self.fetched, ['a'])
+        self.remote.clear_proj_info_cache()
+        self.remote.get_cached_proj_info('a')
+        self.assertEqual(self.fetched, ['a', 'a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
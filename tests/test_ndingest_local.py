@@ -0,0 +1,101 @@
+import unittest
+import os
+import tempfile
+import shutil
+import threading
+import numpy
+import tifffile
+from PIL import Image
+from ndio.remote.ndingest import NDIngest
+
+
+class _remote(object):
+    """
+    Stands in for `neurodata`, writing every upload into a local array.
+    """
+
+    def __init__(self, shape):
+        self.server = numpy.zeros(shape, dtype=numpy.uint16)
+        self.uploads = []
+        self.lock = threading.Lock()
+
+    def get_image_offset(self, token, resolution=0):
+        return [0, 0, 1]
+
+    def get_block_size(self, token, resolution=None):
+        return [16, 16, 4]
+
+    def post_cutout(self, token, channel, x_start, y_start, z_start, data,
+                    resolution=0, skip_empty=False, max_workers=None):
+        with self.lock:
+            self.uploads.append((z_start, z_start + data.shape[2]))
+            self.server[x_start:x_start + data.shape[0],
+                        y_start:y_start + data.shape[1],
+                        z_start:z_start + data.shape[2]] = data
+        return True
+
+
+class TestPostLocal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.volume = numpy.random.randint(0, 1000, (30, 20, 10)).astype(
+            numpy.uint16)
+        for z in range(10):
+            tifffile.imwrite(self.slice(z), self.volume[:, :, z].T)
+        self.ingest = NDIngest.__new__(NDIngest)
+        self.ingest.oo = _remote((40, 30, 16))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def slice(self, z):
+        return os.path.join(self.tmp, '{:04d}.tif'.format(z))
+
+    def test_post_local(self):
+        slabs = self.ingest.post_local('tok', 'chan',
+                                       os.path.join(self.tmp, '*.tif'),
+                                       x_start=5, max_workers=3)
+        # Slices start at z=1, and cubes of depth 4 start there too
+        self.assertEqual(slabs, [(1, 5), (5, 9), (9, 11)])
+        numpy.testing.assert_array_equal(
+            self.ingest.oo.server[5:35, 0:20, 1:11], self.volume)
+
+    def test_png(self):
+        filenames = []
+        for z in range(3):
+            filenames.append(os.path.join(self.tmp, '{}.png'.format(z)))
+            Image.fromarray(self.volume[:, :, z].T.astype(numpy.uint8)).save(
+                filenames[-1])
+        self.ingest.post_local('tok', 'chan', filenames, z_start=4)
+        numpy.testing.assert_array_equal(
+            self.ingest.oo.server[0:30, 0:20, 4:7],
+            self.volume[:, :, :3].astype(numpy.uint8))
+
+    def test_resume(self):
+        checkpoint = os.path.join(self.tmp, 'checkpoint.json')
+        pattern = os.path.join(self.tmp, '*.tif')
+        self.ingest.post_local('tok', 'chan', pattern, checkpoint=checkpoint)
+        self.assertEqual(len(self.ingest.oo.uploads), 3)
+
+        self.assertEqual(self.ingest.post_local('tok', 'chan', pattern,
+                                                checkpoint=checkpoint), [])
+
+        tifffile.imwrite(self.slice(5), numpy.ones((20, 31), numpy.uint16))
+        with self.assertRaises(ValueError):
+            self.ingest.post_local('tok', 'chan', pattern,
+                                   checkpoint=checkpoint)
+        tifffile.imwrite(self.slice(5), numpy.ones((20, 30), numpy.uint16))
+        self.assertEqual(self.ingest.post_local('tok', 'chan', pattern,
+                                                checkpoint=checkpoint),
+                         [(5, 9)])
+        self.assertEqual(self.ingest.oo.server[0, 0, 6], 1)
+
+    def test_no_slices(self):
+        with self.assertRaises(ValueError):
+            self.ingest.post_local('tok', 'chan',
+                                   os.path.join(self.tmp, '*.png'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+import unittest
+import threading
+from io import BytesIO
+import numpy
+import requests
+from PIL import Image
+from ndio.remote.ndingest import NDIngest, VERIFY_BY_FOLDER, \
+    VERIFY_BY_SLICE
+
+
+def _image_bytes(shape, fmt, value=0, dtype=numpy.uint8):
+    buf = BytesIO()
+    Image.fromarray(numpy.full(shape, value, dtype=dtype)).save(buf, fmt)
+    return buf.getvalue()
+
+
+class _response(object):
+
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class _session(object):
+    """
+    Serves a dict of {url: bytes}, honouring Range headers.
+    """
+
+    def __init__(self, files, ranges=True):
+        self.files = files
+        self.ranges = ranges
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def head(self, url, headers=None):
+        assert headers['Authorization'] is None
+        with self.lock:
+            self.requests.append(('HEAD', url, None))
+        folder = any(f.startswith(url) for f in self.files)
+        return _response(200 if folder else 404)
+
+    def get(self, url, headers=None, stream=False):
+        # The data host must not be sent the user's token
+        assert headers['Authorization'] is None
+        rng = headers.get('Range')
+        with self.lock:
+            self.requests.append(('GET', url, rng))
+        if url not in self.files:
+            return _response(404)
+        content = self.files[url]
+        if rng and self.ranges:
+            lo, hi = [int(i) for i in rng[len('bytes='):].split('-')]
+            return _response(206, content[lo:hi + 1])
+        return _response(200, content)
+
+
+class TestVerifyPath(unittest.TestCase):
+    """
+    Exercises `NDIngest.verify_path` without a server.
+    """
+
+    def setUp(self):
+        # Skip __init__, which downloads the JSON schemas
+        self.ingest = NDIngest.__new__(NDIngest)
+        self.ingest.channels = {}
+        self.ingest.add_project('proj', 'tok', 1)
+        self.ingest.add_dataset('ds', (40, 30, 5), (1.0, 1.0, 1.0))
+        self.ingest.add_metadata('')
+
+    def data(self):
+        return {
+            'dataset': self.ingest.dataset_dict(*self.ingest.dataset),
+            'project': self.ingest.project_dict(*self.ingest.project),
+            'channels': {name: self.ingest.channel_dict(*value)
+                         for name, value in self.ingest.channels.items()}
+        }
+
+    def test_slice(self):
+        self.ingest.add_channel('a', 'uint8', 'image', 'http://h', 'SLICE',
+                                'png')
+        self.ingest.add_channel('b', 'uint8', 'image', 'http://h', 'SLICE',
+                                'tif')
+        self.ingest.session = _session({
+            'http://h/tok/a/0000.png': _image_bytes((30, 40), 'PNG'),
+            'http://h/tok/b/0000.tif': _image_bytes((30, 40), 'TIFF'),
+        })
+        self.ingest.verify_path(self.data(), VERIFY_BY_SLICE)
+        self.assertEqual(len(self.ingest.session.requests), 2)
+        for method, url, rng in self.ingest.session.requests:
+            self.assertEqual(method, 'GET')
+            self.assertTrue(rng.startswith('bytes=0-'))
+
+    def test_slice_wrong_size(self):
+        self.ingest.add_channel('a', 'uint8', 'image', 'http://h', 'SLICE',
+                                'png')
+        self.ingest.session = _session({
+            'http://h/tok/a/0000.png': _image_bytes((40, 40), 'PNG'),
+        })
+        with self.assertRaises(ValueError):
+            self.ingest.verify_path(self.data(), VERIFY_BY_SLICE)
+
+    def test_slice_missing(self):
+        self.ingest.add_channel('a', 'uint8', 'image', 'http://h', 'SLICE',
+                                'png')
+        self.ingest.session = _session({})
+        with self.assertRaises(OSError):
+            self.ingest.verify_path(self.data(), VERIFY_BY_SLICE)
+
+    def test_range_ignored(self):
+        self.ingest.add_channel('a', 'uint8', 'image', 'http://h', 'SLICE',
+                                'png')
+        self.ingest.session = _session({
+            'http://h/tok/a/0000.png': _image_bytes((30, 40), 'PNG'),
+        }, ranges=False)
+        self.ingest.verify_path(self.data(), VERIFY_BY_SLICE)
+
+    def test_timeseries(self):
+        self.ingest.add_dataset('ds', (40, 30, 5), (1.0, 1.0, 1.0),
+                                timerange=(0, 49))
+        self.ingest.add_channel('t', 'uint8', 'timeseries', 'http://h',
+                                'SLICE', 'png')
+        png = _image_bytes((30, 40), 'PNG')
+        files = {'http://h/tok/t/time{:04d}/0000.png'.format(j): png
+                 for j in range(50)}
+        self.ingest.session = _session(files)
+        self.ingest.verify_path(self.data(), VERIFY_BY_SLICE, max_workers=4)
+        self.assertEqual(sorted(r[1] for r in self.ingest.session.requests),
+                         sorted(files))
+
+        del files['http://h/tok/t/time0031/0000.png']
+        with self.assertRaises(OSError):
+            self.ingest.verify_path(self.data(), VERIFY_BY_SLICE)
+
+    def test_folder(self):
+        self.ingest.add_channel('a', 'uint8', 'image', 'http://h', 'SLICE',
+                                'png')
+        self.ingest.session = _session({'http://h/tok/a/0000.png': b''})
+        self.ingest.verify_path(self.data(), VERIFY_BY_FOLDER)
+        self.assertEqual(self.ingest.session.requests,
+                         [('HEAD', 'http://h/tok/a/', None)])
+
+    def test_slice_offset(self):
+        # Slices are numbered from the z offset, not the x offset
+        self.ingest.add_dataset('ds', (40, 30, 5), (1.0, 1.0, 1.0),
+                                offset=(7, 0, 3))
+        self.ingest.add_channel('a', 'uint8', 'image', 'http://h', 'SLICE',
+                                'png')
+        self.ingest.session = _session({
+            'http://h/tok/a/0003.png': _image_bytes((30, 40), 'PNG'),
+        })
+        self.ingest.verify_path(self.data(), VERIFY_BY_SLICE)
+        self.assertEqual([r[1] for r in self.ingest.session.requests],
+                         ['http://h/tok/a/0003.png'])
+
+        report = self.ingest.validate(self.data())
+        self.assertEqual(sorted(path for path, error in report.errors['a']),
+                         ['http://h/tok/a/{:04d}.png'.format(z)
+                          for z in range(4, 8)])
+
+    def test_bad_verifytype(self):
+        self.ingest.add_channel('a', 'uint8', 'image', 'http://h', 'SLICE',
+                                'png')
+        self.ingest.session = _session({})
+        with self.assertRaises(TypeError):
+            self.ingest.verify_path(self.data(), 'Neither')
+
+
+class TestValidate(unittest.TestCase):
+    """
+    Exercises `NDIngest.validate` without a server.
+    """
+
+    def setUp(self):
+        self.ingest = NDIngest.__new__(NDIngest)
+        self.ingest.channels = {}
+        self.ingest.add_project('proj', 'tok', 1)
+        self.ingest.add_dataset('ds', (40, 30, 20), (1.0, 1.0, 1.0),
+                                offset=(0, 0, 3))
+        self.ingest.add_metadata('')
+        self.ingest.add_channel('a', 'uint8', 'image', 'http://h', 'SLICE',
+                                'png')
+        self.files = {}
+        for z in range(3, 23):
+            self.files['http://h/tok/a/{:04d}.png'.format(z)] = _image_bytes(
+                (30, 40), 'PNG', z)
+        self.ingest.session = _session(self.files)
+
+    def test_valid(self):
+        report = self.ingest.validate(max_workers=4, samples=3,
+                                      sample_stride=1)
+        self.assertTrue(report.ok)
+        channel = report.to_dict()['a']
+        self.assertEqual((channel['expected'], channel['checked']), (20, 20))
+        # Slices 3, 12 and 22 are sampled
+        self.assertEqual((channel['min'], channel['max']), (3, 22))
+        self.assertAlmostEqual(channel['mean'], (3 + 12 + 22) / 3.)
+        self.assertEqual(sum(1 for r in self.ingest.session.requests
+                             if r[2] is None), 3)
+
+    def test_bad_slices(self):
+        del self.files['http://h/tok/a/0007.png']
+        self.files['http://h/tok/a/0009.png'] = _image_bytes((31, 40), 'PNG')
+        self.files['http://h/tok/a/0010.png'] = _image_bytes(
+            (30, 40), 'TIFF', dtype=numpy.uint16)
+        self.files['http://h/tok/a/0011.png'] = b'not an image'
+
+        report = self.ingest.validate(samples=0)
+        self.assertFalse(report.ok)
+        errors = report.to_dict()['a']['errors']
+        self.assertEqual([path[-8:] for path, error in errors],
+                         ['0007.png', '0009.png', '0010.png', '0011.png'])
+        self.assertIn('0007.png', str(report))
+
+        with self.assertRaises(ValueError):
+            self.ingest.post_data(validate=True)
+
+    def test_bad_samples(self):
+        # Slices 3 and 22 are sampled. 3 is cut off after its header, and
+        # 22 cannot be downloaded whole.
+        self.files['http://h/tok/a/0003.png'] = \
+            self.files['http://h/tok/a/0003.png'][:40]
+        get = self.ingest.session.get
+
+        def flaky(url, headers=None, stream=False):
+            # Only the whole download fails, not the ranged header reads
+            if url.endswith('0022.png') and 'Range' not in headers:
+                raise requests.exceptions.ConnectionError('reset')
+            return get(url, headers, stream)
+        self.ingest.session.get = flaky
+
+        report = self.ingest.validate(samples=2)
+        errors = dict(report.to_dict()['a']['errors'])
+        self.assertEqual(report.to_dict()['a']['checked'], 20)
+        self.assertIn('Undecodable', errors['http://h/tok/a/0003.png'])
+        self.assertIn('reset', errors['http://h/tok/a/0022.png'])
+
+
+if __name__ == '__main__':
+    unittest.main()
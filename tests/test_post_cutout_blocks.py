@@ -0,0 +1,134 @@
+import unittest
+import os
+import tempfile
+import shutil
+import threading
+import zlib
+import re
+from io import BytesIO
+import numpy
+from ndio.remote.data import data
+from ndio.utils.parallel import nonempty_blocks
+from ndio.utils.delta import BlockHashStore, hash_block
+
+
+class _response(object):
+    status_code = 200
+    text = ''
+
+
+class TestPostCutoutBlocks(unittest.TestCase):
+    """
+    Exercises the block-wise modes of `post_cutout` without a server, by
+    writing every upload into a local array.
+    """
+
+    def setUp(self):
+        self.remote = data()
+        self.server = numpy.zeros((64, 64, 32), dtype=numpy.uint32)
+        self.uploads = []
+        self.lock = threading.Lock()
+
+        self.remote.get_proj_info = lambda token: {
+            'channels': {'c': {'datatype': 'uint32'}}}
+        self.remote.get_image_offset = lambda token, res: [0, 0, 0]
+        self.remote.get_block_size = lambda token, res: [16, 16, 8]
+
+        def post_url(url, data=None, headers=None):
+            bounds = [int(i) for i in re.search(
+                r'/npz/\d+/(\d+),(\d+)/(\d+),(\d+)/(\d+),(\d+)/',
+                url).groups()]
+            zyx = numpy.load(BytesIO(zlib.decompress(data)))[0]
+            with self.lock:
+                self.uploads.append(bounds)
+                self.server[bounds[0]:bounds[1], bounds[2]:bounds[3],
+                            bounds[4]:bounds[5]] = zyx.transpose(2, 1, 0)
+            return _response()
+        self.remote.remote_utils.post_url = post_url
+
+        self.volume = numpy.zeros((40, 40, 20), dtype=numpy.uint32)
+        self.volume[2, 3, 4] = 5
+        self.volume[30:34, 30:35, 10:18] = 9
+
+    def test_nonempty_blocks(self):
+        blocks = nonempty_blocks(self.volume, (8, 8, 4), (16, 16, 8))
+        self.assertEqual(blocks[0], ((8, 16), (8, 16), (8, 16)))
+        self.assertEqual(len(blocks), 3)
+
+    def test_skip_empty(self):
+        self.remote.post_cutout('t', 'c', 8, 8, 4, self.volume,
+                                skip_empty=True)
+        self.assertEqual(len(self.uploads), 3)
+        numpy.testing.assert_array_equal(
+            self.server[8:48, 8:48, 4:24], self.volume)
+
+    def test_sparse_threshold_crops(self):
+        self.remote.post_cutout('t', 'c', 8, 8, 4, self.volume,
+                                skip_empty=True, sparse_threshold=0.5)
+        self.assertTrue([10, 11, 11, 12, 8, 9] in self.uploads)
+        uploaded = sum((b[1] - b[0]) * (b[3] - b[2]) * (b[5] - b[4])
+                       for b in self.uploads)
+        self.assertEqual(uploaded, 1 + 4 * 5 * 8)
+        numpy.testing.assert_array_equal(
+            self.server[8:48, 8:48, 4:24], self.volume)
+
+    def test_delta_local_store(self):
+        store = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+        store.close()
+        os.remove(store.name)
+        try:
+            self.remote.post_cutout('t', 'c', 8, 8, 4, self.volume,
+                                    delta=store.name)
+            self.assertEqual(len(self.uploads), 27)
+
+            self.uploads = []
+            self.volume[39, 39, 19] = 1
+            self.remote.post_cutout('t', 'c', 8, 8, 4, self.volume,
+                                    delta=store.name)
+            self.assertEqual(self.uploads, [[32, 48, 32, 48, 16, 24]])
+            self.assertEqual(self.server[47, 47, 23], 1)
+
+            saved = BlockHashStore(store.name)
+            self.assertEqual(saved.get('t', 'c', 0, ((32, 48), (32, 48),
+                                                     (16, 24))),
+                             hash_block(self.volume[24:40, 24:40, 12:20]))
+        finally:
+            os.remove(store.name)
+
+    def test_delta_server(self):
+        server = self.server
+        self.remote.get_cutout = \
+            lambda token, channel, x0, x1, y0, y1, z0, z1, resolution: \
+            server[x0:x1, y0:y1, z0:z1]
+        self.server[8:48, 8:48, 4:24] = self.volume
+        self.volume[0, 0, 0] = 3
+        self.remote.post_cutout('t', 'c', 8, 8, 4, self.volume,
+                                delta='server')
+        self.assertEqual(self.uploads, [[8, 16, 8, 16, 4, 8]])
+
+    def test_delta_does_not_crop(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        store = BlockHashStore(os.path.join(tmp, 'hashes.json'))
+        self.remote.post_cutout('t', 'c', 8, 8, 4, self.volume, delta=store)
+        # Shrink the blob: the erased voxels must reach the server.
+        self.volume[30:34, 30:35, 10:18] = 0
+        self.volume[31, 31, 11] = 9
+        self.uploads = []
+        self.remote.post_cutout('t', 'c', 8, 8, 4, self.volume, delta=store,
+                                sparse_threshold=0.5)
+        self.assertTrue(self.uploads)
+        for b in self.uploads:
+            self.assertEqual([b[1] - b[0], b[3] - b[2]], [16, 16])
+        numpy.testing.assert_array_equal(
+            self.server[8:48, 8:48, 4:24], self.volume)
+
+    def test_hash_block(self):
+        a = numpy.arange(24, dtype=numpy.uint8).reshape(2, 3, 4)
+        self.assertEqual(hash_block(a), hash_block(a.copy()))
+        self.assertNotEqual(hash_block(a), hash_block(a.reshape(4, 3, 2)))
+        self.assertNotEqual(hash_block(a), hash_block(a.astype('uint16')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy
+import ndio.ramon as ramon
+
+
+class TestRAMONCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.ramons = []
+        for i in range(20, 0, -1):
+            self.ramons.append(ramon.RAMONSegment(
+                id=i, author='a' if i % 2 else 'b', confidence=i / 20.,
+                synapses=list(range(i % 4)), organelles=[],
+                neuron=i * 10, kvpairs={'n': str(i)} if i < 3 else {}))
+        self.ramons.append(ramon.RAMONSynapse(id=100, segments=[1, 2],
+                                              synapse_type=2, weight=0.9))
+        self.ramons.append(ramon.RAMONNeuron(id=200, segments=[3, 4, 5]))
+        self.collection = ramon.RAMONCollection.from_ramons(self.ramons)
+
+    def test_sorted_lookup(self):
+        c = self.collection
+        self.assertEqual(len(c), 22)
+        self.assertEqual(c.ids.tolist(), list(range(1, 21)) + [100, 200])
+        self.assertTrue(7 in c)
+        self.assertFalse(8000 in c)
+        self.assertEqual(c.index([200, 1]).tolist(), [21, 0])
+        self.assertRaises(KeyError, c.index, [8000])
+        self.assertEqual(c.related('segments', 200).tolist(), [3, 4, 5])
+        self.assertEqual(c.related('synapses', 7).tolist(), [0, 1, 2])
+
+    def test_round_trip(self):
+        seg = self.collection[2]
+        self.assertEqual(type(seg), ramon.RAMONSegment)
+        self.assertEqual(seg.author, 'b')
+        self.assertEqual(seg.neuron, 20)
+        self.assertEqual(seg.synapses, [0, 1])
+        self.assertEqual(seg.kvpairs, {'n': '2'})
+        # Stored as float64, so values come back exactly
+        self.assertEqual(seg.confidence, 0.1)
+        self.assertEqual(self.collection[100].weight, 0.9)
+
+        syn = self.collection[100]
+        self.assertEqual(type(syn), ramon.RAMONSynapse)
+        self.assertEqual(syn.segments, [1, 2])
+        self.assertEqual(syn.synapse_type, 2)
+        self.assertEqual(len(self.collection.to_ramons()), 22)
+
+    def test_large_ids_and_none(self):
+        big = 2 ** 40 + 1
+        seg = ramon.RAMONSegment(id=big, neuron=big + 1, synapses=[big + 2])
+        seg.segmentclass = None
+        seg.organelles = None
+        c = ramon.RAMONCollection.from_ramons([seg])
+        self.assertTrue(big in c)
+        back = c[big]
+        self.assertEqual(back.id, big)
+        self.assertEqual(back.neuron, big + 1)
+        self.assertEqual(back.synapses, [big + 2])
+        self.assertIsNone(back.segmentclass)
+        self.assertIsNone(back.organelles)
+        self.assertEqual(back.resolution, 0)
+
+    def test_filter(self):
+        c = self.collection
+        segs = c.filter(ramon_type=ramon.RAMONSegment, author='a',
+                        min_confidence=0.5)
+        self.assertEqual(segs.ids.tolist(), [11, 13, 15, 17, 19])
+        self.assertEqual(segs.related('synapses', 11).tolist(), [0, 1, 2])
+        self.assertEqual(len(c.filter(ramon_type='neuron')), 1)
+        self.assertEqual(len(c.filter(author='nobody')), 0)
+
+        small = c.filter(ids=[1, 2, 100])
+        self.assertEqual(small.kvpairs, {1: {'n': '1'}, 2: {'n': '2'}})
+        self.assertEqual(small[100].segments, [1, 2])
+        self.assertLess(small.nbytes, c.nbytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import os
+import tempfile
+import numpy
+import h5py
+import ndio.ramon as ramon
+
+
+class TestRAMONHDF5(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.NamedTemporaryFile(suffix='.hdf5', delete=False)
+        self.ramons = []
+        for i in range(1, 51):
+            self.ramons.append(ramon.RAMONSegment(
+                id=i, author='ndio', kvpairs={'n': str(i)}, synapses=[i],
+                xyz_offset=(i, 2 * i, 3 * i),
+                cutout=numpy.full((4, 4, 4), i, dtype='uint32')))
+        self.ramons.append(ramon.RAMONSynapse(id=100, segments=[1, 2],
+                                              synapse_type=2))
+
+    def tearDown(self):
+        self.tmp.close()
+        os.remove(self.tmp.name)
+
+    def test_round_trip_many(self):
+        ramon.to_hdf5_many(self.ramons, self.tmp)
+        out = ramon.from_hdf5_many(self.tmp.name)
+        self.assertEqual(len(out), len(self.ramons))
+        by_id = dict((int(r.id), r) for r in out)
+        seg = by_id[7]
+        self.assertEqual(type(seg), ramon.RAMONSegment)
+        self.assertEqual(seg.author, 'ndio')
+        self.assertEqual(seg.kvpairs, {'n': '7'})
+        self.assertEqual(list(seg.xyz_offset), [7, 14, 21])
+        numpy.testing.assert_array_equal(seg.cutout, self.ramons[6].cutout)
+        self.assertEqual(list(by_id[100].segments), [1, 2])
+
+    def test_cutouts_are_compressed(self):
+        ramon.to_hdf5_many(self.ramons, self.tmp)
+        with h5py.File(self.tmp.name, 'r') as f:
+            self.assertEqual(f['3']['CUTOUT'].compression, 'gzip')
+            self.assertIsNotNone(f['3']['CUTOUT'].chunks)
+
+    def test_select_ids(self):
+        ramon.to_hdf5_many(self.ramons, self.tmp)
+        with h5py.File(self.tmp.name, 'r') as f:
+            out = ramon.from_hdf5_many(f, [9, 3])
+            self.assertEqual([r.id for r in out], ['9', '3'])
+            with self.assertRaises(ValueError):
+                ramon.from_hdf5_many(f, [9, 1000])
+
+    def test_negative_offset(self):
+        seg = ramon.RAMONSegment(id=3, xyz_offset=(-5, 2, -1),
+                                 cutout=numpy.ones((2, 2, 2), dtype='uint8'))
+        ramon.to_hdf5(seg, self.tmp)
+        with h5py.File(self.tmp.name, 'r') as f:
+            self.assertEqual(f['3']['CUTOUT'].compression, 'gzip')
+            out = ramon.from_hdf5(f)
+        self.assertEqual(list(out.xyz_offset), [-5, 2, -1])
+
+    def test_parent_seed(self):
+        ramon.to_hdf5_many(self.ramons[:1], self.tmp)
+        with h5py.File(self.tmp.name, 'a') as f:
+            f['1']['METADATA'].create_dataset('PARENTSEED', data=[12])
+        with h5py.File(self.tmp.name, 'r') as f:
+            seg = ramon.from_hdf5(f)
+        self.assertEqual(seg.parent_seed, 12)
+        self.assertEqual(seg.synapses.tolist(), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
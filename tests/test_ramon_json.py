@@ -0,0 +1,100 @@
+import unittest
+import os
+import json
+import tempfile
+import numpy
+import ndio.ramon as ramon
+
+
+class TestRAMONJSON(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+        self.tmp.close()
+        self.ramons = [
+            ramon.RAMONSegment(id=1, author='ndio', kvpairs={'a': 'b'},
+                               neuron=numpy.uint32(4), synapses=[2],
+                               cutout=numpy.ones((2, 2, 2), dtype='uint8')),
+            ramon.RAMONSynapse(id=2, segments=[1], synapse_type=3, weight=5),
+            ramon.RAMONOrganelle(id=3, organelle_class=7),
+            ramon.RAMONNeuron(id=4, segments=[1]),
+        ]
+
+    def tearDown(self):
+        os.remove(self.tmp.name)
+
+    def check(self, out):
+        by_id = dict((int(r.id), r) for r in out)
+        self.assertEqual(by_id[1].kvpairs, {'a': 'b'})
+        self.assertEqual(by_id[1].neuron, 4)
+        self.assertEqual(by_id[1].synapses, [2])
+        self.assertEqual(by_id[2].synapse_type, 3)
+        self.assertEqual(by_id[2].weight, 5)
+        self.assertEqual(by_id[3].organelle_class, 7)
+        self.assertEqual(by_id[4].segments, [1])
+
+    def test_to_json_skips_cutouts(self):
+        doc = json.loads(ramon.to_json(self.ramons))
+        self.assertFalse('cutout' in doc['1']['metadata'])
+        self.check(ramon.from_json(doc))
+
+    def test_dump_json(self):
+        self.assertEqual(ramon.dump_json(iter(self.ramons), self.tmp.name), 4)
+        with open(self.tmp.name) as f:
+            self.check(ramon.from_json(f.read()))
+
+    def test_iter_json(self):
+        ramon.dump_json(self.ramons, self.tmp.name,
+                        cutout_ref=lambda r: 'cutout-{}'.format(r.id))
+        loaded = []
+        # Small chunks, so that records and numbers span chunk boundaries
+        out = ramon.iter_json(self.tmp.name, loaded.append, chunk_size=7)
+        first = next(out)
+        self.assertEqual(int(first.id), 1)
+        self.assertEqual(loaded, ['cutout-1'])
+        self.check([first] + list(out))
+
+        ramon.dump_json([], self.tmp.name)
+        self.assertEqual(list(ramon.iter_json(self.tmp.name)), [])
+        with open(self.tmp.name, 'w') as f:
+            f.write('{"1": {"type": "segment"')
+        with self.assertRaises(ValueError):
+            list(ramon.iter_json(self.tmp.name))
+
+    def test_to_dict(self):
+        metadata = ramon.to_dict(self.ramons)[1]['metadata']
+        self.assertEqual(metadata['cutout'].shape, (2, 2, 2))
+        self.assertIn('voxels', metadata)
+
+        metadata = ramon.to_dict(self.ramons, volumes=False)[1]['metadata']
+        self.assertNotIn('cutout', metadata)
+        self.assertNotIn('voxels', metadata)
+        self.assertEqual(metadata['xyz_offset'], (0, 0, 0))
+
+    def test_non_str_keys(self):
+        self.ramons[0].kvpairs = {1: 'b'}
+        ramon.to_json_lines(self.ramons[:1], self.tmp.name)
+        out, = ramon.iter_json_lines(self.tmp.name)
+        self.assertEqual(out.kvpairs, {'1': 'b'})
+
+    def test_json_lines(self):
+        ramon.to_json_lines(self.ramons, self.tmp.name,
+                            cutout_ref=lambda r: 'cutout-{}'.format(r.id))
+        with open(self.tmp.name) as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+        loaded = []
+        out = ramon.iter_json_lines(self.tmp.name, loaded.append)
+        self.assertFalse(loaded)
+        self.check(list(out))
+        self.assertEqual(loaded, ['cutout-1'])
+
+    def test_legacy_organelle_class(self):
+        doc = {'3': {'type': 'organelle', 'metadata': {
+            'author': '', 'status': 0, 'confidence': 0, 'kvpairs': {},
+            'organelleclass': 2}}}
+        self.assertEqual(ramon.from_json(doc)[0].organelle_class, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
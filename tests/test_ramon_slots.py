@@ -0,0 +1,40 @@
+import unittest
+import pickle
+import json
+import numpy
+import ndio.ramon as ramon
+
+
+class TestRAMONSlots(unittest.TestCase):
+
+    def setUp(self):
+        self.synapse = ramon.RAMONSynapse(id=5, segments=[1, 2], weight=3,
+                                          author='ndio',
+                                          cutout=numpy.ones((2, 2, 2)))
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.synapse, '__dict__'))
+        self.assertRaises(AttributeError, setattr, self.synapse, 'typo', 1)
+
+    def test_attributes(self):
+        attributes = self.synapse._attributes()
+        self.assertEqual(attributes['segments'], [1, 2])
+        self.assertEqual(attributes['author'], 'ndio')
+        self.assertTrue('cutout' in attributes)
+        self.assertFalse('_rle' in attributes)
+
+        neuron = ramon.RAMONNeuron(id=7, segments=[3])
+        out = json.loads(ramon.to_json(neuron))
+        self.assertEqual(out['7']['metadata']['segments'], [3])
+
+    def test_pickle(self):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            r = pickle.loads(pickle.dumps(self.synapse, protocol))
+            self.assertEqual(type(r), ramon.RAMONSynapse)
+            self.assertEqual(r.segments, [1, 2])
+            self.assertEqual(r.weight, 3)
+            numpy.testing.assert_array_equal(r.cutout, self.synapse.cutout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import numpy
+import ndio.ramon as ramon
+
+
+class TestRAMONVolume(unittest.TestCase):
+
+    def setUp(self):
+        self.cutout = numpy.zeros((10, 12, 8), dtype='uint32')
+        self.cutout[2:4, 5:9, 1:3] = 5
+
+    def test_dense(self):
+        r = ramon.RAMONSegment(cutout=self.cutout)
+        self.assertIs(r.data(), self.cutout)
+
+    def test_empty(self):
+        self.assertIsNone(ramon.RAMONVolume().data())
+
+    def test_voxels_stay_sparse(self):
+        r = ramon.RAMONSegment(xyz_offset=(100, 100, 100),
+                               cutout=self.cutout)
+        voxels = r.voxels
+        s = ramon.RAMONSegment(voxels=voxels)
+        self.assertEqual(s.bounding_box(), (102, 104, 105, 109, 101, 103))
+        s.crop()
+        self.assertIsNone(s._cutout)
+        self.assertEqual(tuple(s.xyz_offset), (102, 105, 101))
+        self.assertEqual(s.data().shape, (2, 4, 2))
+        self.assertTrue(s.data().all())
+
+    def test_rle(self):
+        r = ramon.RAMONSegment(cutout=self.cutout)
+        rle = r.rle
+        s = ramon.RAMONSegment()
+        s.rle = rle
+        s.shape = self.cutout.shape
+        numpy.testing.assert_array_equal(s.data(), self.cutout)
+
+    def test_compact_and_nbytes(self):
+        r = ramon.RAMONSegment(cutout=self.cutout)
+        r.voxels
+        r.rle
+        self.assertGreater(r.nbytes, self.cutout.nbytes)
+        r.compact('rle')
+        self.assertEqual(r.nbytes, r.rle.nbytes)
+        numpy.testing.assert_array_equal(r.data(), self.cutout)
+        self.assertEqual(r.data().dtype, numpy.uint32)
+
+        big = self.cutout.astype('uint64')
+        r = ramon.RAMONSegment(cutout=big).compact('rle')
+        self.assertEqual(r.data().dtype, numpy.uint64)
+
+        r = ramon.RAMONSegment(voxels=[[1, 1, 1]]).compact('rle')
+        self.assertEqual(r.data().dtype, bool)
+
+    def test_move_offset(self):
+        r = ramon.RAMONSegment(xyz_offset=(100, 100, 100),
+                               cutout=self.cutout)
+        r.voxels
+        r.xyz_offset = (0, 0, 0)
+        self.assertEqual(r.bounding_box(), (2, 4, 5, 9, 1, 3))
+        self.assertEqual(tuple(r.voxels.min(axis=0)), (2, 5, 1))
+
+        s = ramon.RAMONSegment(xyz_offset=(10, 10, 10),
+                               voxels=[[10, 10, 10], [12, 11, 10]])
+        s.xyz_offset = (20, 20, 20)
+        self.assertEqual(tuple(s.voxels[1]), (22, 21, 20))
+        self.assertEqual(s.data().shape, (3, 2, 1))
+
+    def test_crop_dense(self):
+        r = ramon.RAMONSegment(cutout=self.cutout).crop()
+        self.assertEqual(tuple(r.xyz_offset), (2, 5, 1))
+        self.assertEqual(r.cutout.shape, (2, 4, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
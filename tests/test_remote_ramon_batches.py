@@ -0,0 +1,190 @@
+import unittest
+import threading
+import h5py
+import numpy
+import ndio.ramon as ramon
+import ndio.remote.ramon as ramon_module
+from ndio.remote.ramon import ramon as ramon_remote
+from ndio.remote.errors import RemoteDataUploadError
+from ndio.utils.parallel import imap_unordered
+
+
+class TestParallelRAMONDownload(unittest.TestCase):
+    """
+    Exercises the batching of `ramon.iter_ramon` without a server, by
+    answering batch requests locally.
+    """
+
+    def setUp(self):
+        self.remote = ramon_remote()
+        self.batches = []
+        self.lock = threading.Lock()
+
+        def get_batch(token, channel, ids, resolution):
+            with self.lock:
+                self.batches.append(list(ids))
+            return [ramon.RAMONSegment(id=i) for i in ids]
+        self.remote._get_ramon_batch = get_batch
+
+    def test_batches_and_order(self):
+        ids = list(range(1, 251))
+        rs = self.remote.get_ramon('t', 'c', ids, batch_size=500,
+                                   max_workers=4)
+        self.assertEqual([int(r.id) for r in rs], ids)
+        self.assertEqual(sorted(len(b) for b in self.batches), [50, 100, 100])
+
+    def test_sieve_before_cutout(self):
+        fetched = []
+        self.remote._add_ramon_cutout = \
+            lambda token, channel, r, resolution: fetched.append(r.id) or r
+        rs = list(self.remote.iter_ramon(
+            't', 'c', list(range(10)), include_cutout=True,
+            sieve=lambda r: int(r.id) % 2 == 0, batch_size=3))
+        self.assertEqual(sorted(int(r.id) for r in rs), [0, 2, 4, 6, 8])
+        self.assertEqual(sorted(int(i) for i in fetched), [0, 2, 4, 6, 8])
+
+    def test_single_id_sieved_out(self):
+        self.assertIsNone(self.remote.get_ramon(
+            't', 'c', 3, sieve=lambda r: False))
+        self.assertEqual(int(self.remote.get_ramon('t', 'c', 3).id), 3)
+
+    def test_imap_unordered_bounds_pending(self):
+        consumed = []
+
+        def work():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        results = imap_unordered(lambda x: x, work(), max_workers=2,
+                                 max_pending=4)
+        next(results)
+        self.assertTrue(len(consumed) <= 5)
+        self.assertEqual(len(list(results)), 99)
+
+    def test_imap_unordered_raises(self):
+        def fail(x):
+            raise ValueError(x)
+        self.assertRaises(ValueError, list,
+                          imap_unordered(fail, range(10)))
+
+
+class _response(object):
+
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+
+
+class TestParallelRAMONUpload(unittest.TestCase):
+    """
+    Exercises `ramon.post_ramon` without a server, by answering reservation
+    and upload requests locally.
+    """
+
+    def setUp(self):
+        ramon_module.RETRY_BACKOFF = 0
+        self.remote = ramon_remote()
+        self.reserved = []
+        self.failures = {'left': 0}
+        self.next_id = [1000]
+        self.lock = threading.Lock()
+
+        def reserve_ids(token, channel, quantity):
+            with self.lock:
+                self.reserved.append(quantity)
+                start = self.next_id[0]
+                self.next_id[0] += quantity
+            return list(range(start, start + quantity))
+
+        def post_url(url, data=None, **kwargs):
+            with self.lock:
+                if self.failures['left']:
+                    self.failures['left'] -= 1
+                    return _response(503)
+            with open(self.tmp, 'wb') as f:
+                f.write(data)
+            with h5py.File(self.tmp, 'r') as f:
+                return _response(200, ','.join(sorted(f.keys(), key=int)))
+
+        self.remote.reserve_ids = reserve_ids
+        self.remote.remote_utils.post_url = post_url
+        self.tmp = None
+
+    def post(self, rs, **kwargs):
+        import tempfile
+        import os
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            self.tmp = f.name
+        try:
+            return self.remote.post_ramon('t', 'c', rs, **kwargs)
+        finally:
+            os.remove(self.tmp)
+
+    def test_reserves_in_blocks(self):
+        rs = [ramon.RAMONSegment() for i in range(250)] + \
+            [ramon.RAMONSegment(id=7)]
+        ids = self.post(rs, batch_size=40, max_workers=1, reserve_block=100)
+        # No more IDs than the 250 objects without one
+        self.assertEqual(self.reserved, [100, 100, 50])
+        self.assertEqual(ids[:40], list(range(1000, 1040)))
+        self.assertEqual(sorted(ids), [7] + list(range(1000, 1250)))
+
+    def test_reserve_for_one(self):
+        self.post(ramon.RAMONSegment())
+        self.assertEqual(self.reserved, [1])
+
+        # The length of a generator is unknown, so whole blocks are reserved
+        del self.reserved[:]
+        self.post((ramon.RAMONSegment() for i in range(3)), reserve_block=10)
+        self.assertEqual(self.reserved, [10])
+
+    def test_retries(self):
+        self.failures['left'] = 2
+        ids = self.post([ramon.RAMONSynapse(id=5)], max_workers=1)
+        self.assertEqual(ids, [5])
+
+        self.failures['left'] = 10
+        self.assertRaises(RemoteDataUploadError, self.post,
+                          [ramon.RAMONSynapse(id=5)], retries=1)
+
+    def test_voxel_volume_posted_as_labels(self):
+        posted = []
+        payloads = []
+        self.remote.post_cutout = lambda token, channel, x, y, z, data, \
+            resolution=0: posted.append(((x, y, z), data))
+        post_url = self.remote.remote_utils.post_url
+
+        def record(url, data=None, **kwargs):
+            res = post_url(url, data=data)
+            with h5py.File(self.tmp, 'r') as f:
+                payloads.append(sorted(f[res.text].keys()))
+            return res
+        self.remote.remote_utils.post_url = record
+
+        rid = 2 ** 33 + 3
+        seg = ramon.RAMONSegment(id=rid, xyz_offset=(10, 20, 30),
+                                 voxels=[[10, 20, 30], [11, 21, 31]])
+        self.assertEqual(self.post([seg], max_workers=1), [rid])
+        self.assertNotIn('VOXELS', payloads[0])
+        self.assertNotIn('CUTOUT', payloads[0])
+        self.assertEqual(len(posted), 1)
+        origin, labels = posted[0]
+        self.assertEqual(origin, (10, 20, 30))
+        self.assertEqual(labels.dtype, numpy.uint64)
+        self.assertEqual(labels[0, 0, 0], rid)
+        self.assertEqual(labels[1, 1, 1], rid)
+        self.assertEqual(numpy.count_nonzero(labels), 2)
+
+        # Dense cutouts go in the HDF5 only
+        posted[:] = []
+        payloads[:] = []
+        seg = ramon.RAMONSegment(id=9, cutout=numpy.ones((2, 2, 2),
+                                                         numpy.uint32))
+        self.post([seg], max_workers=1)
+        self.assertIn('CUTOUT', payloads[0])
+        self.assertEqual(posted, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import numpy
+from ndio.utils.parallel import aligned_blocks
+from ndio.utils.stats import LabelStats, label_stats, remote_label_stats
+
+
+class TestLabelStats(unittest.TestCase):
+
+    def setUp(self):
+        rng = numpy.random.RandomState(0)
+        self.cutout = numpy.zeros((40, 30, 20), dtype=numpy.uint32)
+        self.cutout[rng.rand(40, 30, 20) < 0.1] = 5
+        self.cutout[5:15, 3:9, 2:4] = 7
+        self.cutout[20:40, 0:30, 10:11] = 3
+        self.cutout[rng.rand(40, 30, 20) < 0.01] = 9
+
+    def check(self, stats, offset=(0, 0, 0)):
+        for i, label in enumerate(stats.labels):
+            where = numpy.argwhere(self.cutout == label) + offset
+            self.assertEqual(stats.counts[i], len(where))
+            self.assertEqual(stats.lo[i].tolist(), where.min(0).tolist())
+            self.assertEqual(stats.hi[i].tolist(),
+                             (where.max(0) + 1).tolist())
+            numpy.testing.assert_allclose(stats.centroids[i], where.mean(0))
+
+    def test_single_pass(self):
+        stats = label_stats(self.cutout, offset=(100, 200, 300))
+        self.assertEqual(stats.labels.tolist(), [3, 5, 7, 9])
+        self.check(stats, (100, 200, 300))
+        self.assertEqual(len(label_stats(self.cutout, ids=[7, 8])), 1)
+        self.assertEqual(len(label_stats(numpy.zeros((2, 2, 2)))), 0)
+
+    def test_blockwise_matches_whole(self):
+        stats = LabelStats()
+        for b in aligned_blocks(0, 40, 0, 30, 0, 20, (16, 16, 8)):
+            block = self.cutout[b[0][0]:b[0][1], b[1][0]:b[1][1],
+                                b[2][0]:b[2][1]]
+            stats.update(block, (b[0][0], b[1][0], b[2][0]))
+        self.check(stats)
+        self.assertEqual(stats.to_dict(),
+                         label_stats(self.cutout).to_dict())
+
+    def test_remote(self):
+        cutout = self.cutout
+
+        class remote(object):
+            def get_cutout(self, token, channel, x0, x1, y0, y1, z0, z1,
+                           resolution=0):
+                return cutout[x0:x1, y0:y1, z0:z1]
+
+        stats = remote_label_stats(remote(), 't', 'c', 0, 40, 0, 30, 0, 20,
+                                   block_size=(16, 16, 8))
+        self.check(stats)
+
+
+if __name__ == '__main__':
+    unittest.main()